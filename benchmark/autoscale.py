@@ -0,0 +1,126 @@
+"""Scripted resize cycle of PoolAutoscaler against the fake Batch pool.
+
+Drives ``evaluate`` (``compute_target`` + ``decide`` + ``apply``) on an explicit
+clock with backlogs put into the in-memory broker and fakeredis, and checks the
+pool size FakeBatchServiceClient ends up with after every step: scale-up,
+cooldown, allocation in progress, the scale-down window and the autoscale
+formula used when Batch autoscaling is enabled on the pool.
+
+    python -m benchmark.autoscale
+
+Requires ``fakeredis[lua]`` in addition to the server dependencies; exits 1
+when a step does not end in the expected pool size.
+"""
+import asyncio
+import logging
+import sys
+import uuid
+
+QUEUE_NAME = "autoscale-request"
+SLOTS_PER_NODE = 4
+# a queued request is worth runtime / drain_seconds = 0.5 slots
+SETTINGS = dict(
+    min_nodes=1,
+    max_nodes=20,
+    drain_seconds=60,
+    default_runtime=30,
+    cooldown=100,
+    scale_down_window=300,
+    tolerance=0.1,
+)
+
+
+async def enqueue(transport, count: int) -> None:
+    from src.transport import OutgoingMessage
+
+    async with transport.get_sender(QUEUE_NAME) as sender:
+        await sender.send([
+            OutgoingMessage(body=b"{}", session_id=f"autoscale-{uuid.uuid4().hex[:8]}") for _ in range(count)
+        ])
+
+
+async def drain(transport) -> None:
+    from src.exceptions import SessionNotAvailableError
+
+    while await transport.queue_depth(QUEUE_NAME):
+        try:
+            async with transport.accept_session(QUEUE_NAME, max_wait_time=0.01) as receiver:
+                async for message in receiver:
+                    await receiver.complete(message)
+        except SessionNotAvailableError:
+            break
+
+
+async def run() -> list[str]:
+    import fakeredis.aioredis
+    from azure.batch.models import AllocationState
+
+    from benchmark.fakes import FakeBatchServiceClient
+    from src.repository.redis_repository import RedisConnector
+    from src.service.autoscaler import PoolAutoscaler
+    from src.service.batch_client import AsyncBatchClient
+    from src.transport.memory import InMemoryBroker, InMemoryTransport
+
+    fake_batch = FakeBatchServiceClient(latency=0, nodes=2, slots_per_node=SLOTS_PER_NODE)
+    pool = fake_batch.pool_state
+    transport = InMemoryTransport(InMemoryBroker())
+    autoscaler = PoolAutoscaler(
+        AsyncBatchClient(fake_batch),
+        RedisConnector(client=fakeredis.aioredis.FakeRedis(decode_responses=True)),
+        transport,
+        pool_id=pool.id,
+        queue_name=QUEUE_NAME,
+        **SETTINGS,
+    )
+    failures: list[str] = []
+
+    async def step(now: float, name: str, expected_nodes: int) -> None:
+        await autoscaler.evaluate(now=now)
+        nodes = pool.target_dedicated_nodes + pool.target_low_priority_nodes
+        resizes = fake_batch.calls["pool.resize"] + fake_batch.calls["pool.enable_auto_scale"]
+        print(f"t={now:>5.0f}s  {name:<44} queue={await transport.queue_depth(QUEUE_NAME):>3}  "
+              f"nodes={nodes:>2}  resizes={resizes}")
+        if nodes != expected_nodes:
+            failures.append(f"t={now:.0f}s {name}: pool has {nodes} nodes, expected {expected_nodes}")
+
+    if not await autoscaler._hold_leadership():
+        return ["autoscaler did not take the leader lease"]
+    autoscaler.leader_since = 0.0  # the scripted clock starts with the lease
+
+    await enqueue(transport, 40)
+    await step(0, "backlog of 40: scale up", 5)
+    await enqueue(transport, 40)
+    await step(50, "backlog of 80 within cooldown: hold", 5)
+    pool.allocation_state = AllocationState.resizing
+    await step(120, "cooldown over, pool still allocating: hold", 5)
+    pool.allocation_state = AllocationState.steady
+    await step(130, "pool steady: scale up", 10)
+    await drain(transport)
+    await step(250, "idle, peak within scale-down window: hold", 10)
+    await step(450, "idle for the whole window: scale down", 1)
+
+    pool.enable_auto_scale = True
+    await enqueue(transport, 16)
+    await step(600, "Batch autoscaling on: pin through formula", 1)
+    formula = pool.auto_scale_formula or ""
+    print(f"formula: {formula!r}")
+    if "$TargetDedicatedNodes = 2;" not in formula:
+        failures.append(f"autoscale formula does not pin 2 dedicated nodes: {formula!r}")
+
+    await autoscaler.close()
+    return failures
+
+
+def main() -> int:
+    logging.disable(logging.WARNING)
+    failures = asyncio.run(run())
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    if failures:
+        return 1
+    print("autoscaler resize cycle ok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Local stand-ins for Azure Batch used by the benchmark harness"""
+import hashlib
+import json
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from azure.batch.models import (
+    AllocationState,
+    BatchErrorException,
+    ComputeNodeState,
+    SchedulingState,
+    TaskAddStatus,
+    TaskState,
+)
+
+from src.service.task_script import NODE_MANIFEST_FILE
+
+
+class FakeBatchError(BatchErrorException):
+    """BatchErrorException without an HTTP response behind it"""
+
+    def __init__(self, message: str):
+        Exception.__init__(self, message)
+        self.message = message
+        self.error = None
+        self.response = None
+
+
+class _Operations:
+    def __init__(self, client: "FakeBatchServiceClient"):
+        self._client = client
+
+
+class _JobOperations(_Operations):
+    def add(self, job):
+        self._client._call("job.add")
+        with self._client._lock:
+            if job.id in self._client.jobs:
+                raise FakeBatchError(f"JobExists: {job.id}")
+            self._client.jobs[job.id] = {}
+
+    def terminate(self, job_id):
+        self._client._call("job.terminate")
+        with self._client._lock:
+            self._client.terminated_jobs.add(job_id)
+
+    def patch(self, job_id, job_patch_parameter):
+        self._client._call("job.patch")
+
+    def list(self, job_list_options=None):
+        self._client._call("job.list")
+        with self._client._lock:
+            job_ids = [job_id for job_id in self._client.jobs if job_id not in self._client.terminated_jobs]
+        return iter([
+            SimpleNamespace(
+                id=job_id,
+                creation_time=datetime.now(timezone.utc),
+                on_all_tasks_complete=None,
+                pool_info=SimpleNamespace(pool_id=self._client.pool_state.id),
+            )
+            for job_id in job_ids
+        ])
+
+    def get_task_counts(self, job_id):
+        self._client._call("job.get_task_counts")
+        running, active = self._client._occupancy(job_id)
+        return SimpleNamespace(task_counts=SimpleNamespace(active=active, running=running))
+
+
+class _TaskOperations(_Operations):
+    def add(self, job_id, task):
+        self._client._call("task.add")
+        self._client._add_task(job_id, task)
+
+    def add_collection(self, job_id, value):
+        self._client._call("task.add_collection")
+        for task in value:
+            self._client._add_task(job_id, task)
+        return SimpleNamespace(value=[
+            SimpleNamespace(task_id=task.id, status=TaskAddStatus.success, error=None) for task in value
+        ])
+
+    def delete(self, job_id, task_id):
+        self._client._call("task.delete")
+        with self._client._lock:
+            self._client.jobs.get(job_id, {}).pop(task_id, None)
+
+    def get(self, job_id, task_id):
+        self._client._call("task.get")
+        return self._client._task_view(job_id, task_id)
+
+    def list(self, job_id, task_list_options=None):
+        self._client._call("task.list")
+        with self._client._lock:
+            task_ids = list(self._client.jobs.get(job_id, {}))
+        tasks = [self._client._task_view(job_id, task_id) for task_id in task_ids]
+        if task_list_options is not None and task_list_options.filter == "state eq 'completed'":
+            tasks = [task for task in tasks if task.state == TaskState.completed]
+        return iter(tasks)
+
+
+class _PoolOperations(_Operations):
+    def get(self, pool_id, pool_get_options=None):
+        self._client._call("pool.get")
+        return self._client.pool_state
+
+    def resize(self, pool_id, pool_resize_parameter):
+        """Nodes are allocated (or released) at once"""
+        self._client._call("pool.resize")
+        pool = self._client.pool_state
+        if pool.enable_auto_scale:
+            raise FakeBatchError("Pool has autoscale enabled")
+        pool.target_dedicated_nodes = pool.current_dedicated_nodes = pool_resize_parameter.target_dedicated_nodes or 0
+        pool.target_low_priority_nodes = pool.current_low_priority_nodes = (
+            pool_resize_parameter.target_low_priority_nodes or 0
+        )
+
+    def enable_auto_scale(self, pool_id, auto_scale_formula=None, auto_scale_evaluation_interval=None):
+        self._client._call("pool.enable_auto_scale")
+        self._client.pool_state.enable_auto_scale = True
+        self._client.pool_state.auto_scale_formula = auto_scale_formula
+
+
+class _ComputeNodeOperations(_Operations):
+    def list(self, pool_id, compute_node_list_options=None):
+        self._client._call("compute_node.list")
+        pool = self._client.pool_state
+        running, _ = self._client._occupancy()
+        nodes = []
+        for i in range(pool.current_dedicated_nodes + pool.current_low_priority_nodes):
+            slots = min(pool.task_slots_per_node, max(0, running - i * pool.task_slots_per_node))
+            nodes.append(SimpleNamespace(
+                id=f"node-{i}",
+                state=ComputeNodeState.running if slots else ComputeNodeState.idle,
+                scheduling_state=SchedulingState.enabled,
+                running_task_slots_count=slots,
+                running_tasks_count=slots,
+            ))
+        return iter(nodes)
+
+
+class _FileOperations(_Operations):
+    def get_properties_from_task(self, job_id, task_id, file_path, raw=False):
+        self._client._call("file.get_properties_from_task")
+        output = self._client._task_output(job_id, task_id)
+        return SimpleNamespace(headers={"Content-Length": str(len(output))})
+
+    def get_from_task(self, job_id, task_id, file_path, file_get_from_task_options=None):
+        self._client._call("file.get_from_task")
+        if file_path == NODE_MANIFEST_FILE:
+            return iter([self._client._task_manifest(job_id, task_id)])
+        output = self._client._task_output(job_id, task_id)
+        if file_get_from_task_options is not None and file_get_from_task_options.ocp_range:
+            start, _, end = file_get_from_task_options.ocp_range.removeprefix("bytes=").partition("-")
+            output = output[int(start):int(end) + 1]
+        return iter([output])
+
+
+class FakeBatchServiceClient:
+    """Thread-safe in-memory BatchServiceClient with configurable call latency.
+
+    Every SDK call sleeps ``latency`` seconds (the benchmark runs them on the
+    AsyncBatchClient thread pool like the real client). Tasks complete
+    ``task_runtime`` seconds after submission; commands containing ``fail``
+    complete with a failure result. The pool reports unfinished tasks beyond
+    its ``nodes * slots_per_node`` slots as active (queued) tasks.
+    """
+
+    def __init__(self, latency: float = 0.005, task_runtime: float = 0.05, nodes: int = 64, slots_per_node: int = 16):
+        self.latency = latency
+        self.task_runtime = task_runtime
+        self.config = SimpleNamespace(keep_alive=False)
+        self.calls: Counter[str] = Counter()
+        self.jobs: dict[str, dict[str, dict]] = {}
+        self.terminated_jobs: set[str] = set()
+        self.pool_state = SimpleNamespace(
+            id="bench-pool",
+            task_slots_per_node=slots_per_node,
+            current_dedicated_nodes=nodes,
+            target_dedicated_nodes=nodes,
+            current_low_priority_nodes=0,
+            target_low_priority_nodes=0,
+            allocation_state=AllocationState.steady,
+            enable_auto_scale=False,
+            auto_scale_formula=None,
+        )
+        self._lock = threading.Lock()
+        self.job = _JobOperations(self)
+        self.task = _TaskOperations(self)
+        self.file = _FileOperations(self)
+        self.pool = _PoolOperations(self)
+        self.compute_node = _ComputeNodeOperations(self)
+
+    def _call(self, name: str) -> None:
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _add_task(self, job_id: str, task) -> None:
+        # the request command travels in the wrapper script's environment
+        command = next(
+            (setting.value for setting in task.environment_settings or [] if setting.name == "JOB_COMMAND"),
+            task.command_line,
+        )
+        with self._lock:
+            self.jobs.setdefault(job_id, {})[task.id] = {
+                "command": command,
+                "submitted_at": time.monotonic(),
+            }
+
+    def _occupancy(self, job_id: str | None = None) -> tuple[int, int]:
+        """(running, active) unfinished tasks of one job or the whole pool; the oldest tasks hold the slots"""
+        now = time.monotonic()
+        pool = self.pool_state
+        slots = (pool.current_dedicated_nodes + pool.current_low_priority_nodes) * pool.task_slots_per_node
+        with self._lock:
+            unfinished = sorted(
+                (task["submitted_at"], tasks_job_id)
+                for tasks_job_id, tasks in self.jobs.items()
+                for task in tasks.values()
+                if now - task["submitted_at"] < self.task_runtime
+            )
+        running = unfinished[:slots]
+        active = unfinished[slots:]
+        if job_id is None:
+            return len(running), len(active)
+        return (
+            sum(1 for _, owner in running if owner == job_id),
+            sum(1 for _, owner in active if owner == job_id),
+        )
+
+    def _task_output(self, job_id: str, task_id: str) -> bytes:
+        """Output grows linearly over the task runtime: one line per tenth of it"""
+        with self._lock:
+            task = self.jobs.get(job_id, {}).get(task_id)
+        if task is None:
+            raise FakeBatchError(f"Task {job_id}/{task_id} not found")
+        progress = min(1.0, (time.monotonic() - task["submitted_at"]) / self.task_runtime) if self.task_runtime else 1.0
+        return b"".join(f"{task_id} line {i}\n".encode() for i in range(int(progress * 10)))
+
+    def _task_manifest(self, job_id: str, task_id: str) -> bytes:
+        """manifest.json the wrapper script writes next to the uploaded output"""
+        output = self._task_output(job_id, task_id)
+        entry = {
+            "path": "output.txt",
+            "size": len(output),
+            "sha256": hashlib.sha256(output).hexdigest(),
+            "compression": None,
+            "original_size": len(output),
+        }
+        return json.dumps({"exit_code": 0, "files": [entry]}).encode()
+
+    def _task_view(self, job_id: str, task_id: str) -> SimpleNamespace:
+        with self._lock:
+            task = self.jobs.get(job_id, {}).get(task_id)
+        if task is None:
+            raise FakeBatchError(f"Task {job_id}/{task_id} not found")
+        done = time.monotonic() - task["submitted_at"] >= self.task_runtime
+        failed = "fail" in task["command"]
+        return SimpleNamespace(
+            id=task_id,
+            state=TaskState.completed if done else TaskState.running,
+            execution_info=SimpleNamespace(
+                result="failure" if failed else "success",
+                failure_info=SimpleNamespace(message="command failed") if failed else None,
+            ) if done else None,
+        )
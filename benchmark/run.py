@@ -0,0 +1,372 @@
+"""End-to-end throughput/latency benchmark for ServiceBusServer.
+
+Drives the real server (handle_message -> BatchService.run -> ResponsePublisher)
+with synthetic RequestMessages through local stand-ins: the in-memory broker,
+FakeBatchServiceClient, SQLite (or a local Postgres via --db-url) and fakeredis.
+
+    python -m benchmark.run --requests 2000 --duplicate-ratio 0.3
+    python -m benchmark.run --save-baseline benchmark/baseline.json
+    python -m benchmark.run --compare benchmark/baseline.json
+
+Requires ``aiosqlite`` and ``fakeredis[lua]`` in addition to the server dependencies.
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="number of synthetic requests")
+    parser.add_argument("--duplicate-ratio", type=float, default=0.0, help="share of requests repeating an earlier command")
+    parser.add_argument("--workers", type=int, default=64, help="SERVER_MAX_WORKERS for the run")
+    parser.add_argument("--batch-latency", type=float, default=0.005, help="seconds per fake Batch SDK call")
+    parser.add_argument("--task-runtime", type=float, default=0.05, help="seconds a fake Batch task runs")
+    parser.add_argument("--pool-nodes", type=int, default=64, help="nodes of the fake Batch pool")
+    parser.add_argument("--slots-per-node", type=int, default=16, help="task slots per fake Batch node")
+    parser.add_argument("--capacity-interval", type=float, default=0,
+                        help="BATCH_CAPACITY_INTERVAL for the run (0 disables admission control)")
+    parser.add_argument("--job-mode", default="per_request", help="BATCH_JOB_MODE for the run")
+    parser.add_argument("--progress", action="store_true", help="request progress messages for every task")
+    parser.add_argument("--content-type", default="application/json",
+                        help="wire format of requests: application/json or application/msgpack")
+    parser.add_argument("--db-url", default=None, help="SQLAlchemy async URL (default: temporary SQLite file)")
+    parser.add_argument("--receivers", type=int, default=32, help="response sessions the collector reads at once")
+    parser.add_argument("--timeout", type=float, default=300, help="give up waiting for responses after this many seconds")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the report as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a baseline and exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression when comparing")
+    return parser.parse_args(argv)
+
+
+def configure_env(args: argparse.Namespace) -> None:
+    """Config classes read the environment at import time, so this runs before importing src"""
+    os.environ.update({
+        "TRANSPORT": "memory",
+        "SERVER_MAX_WORKERS": str(args.workers),
+        "SERVICEBUS_REQUEST_QUEUE_NAME": "bench-request",
+        "SERVICEBUS_RESPONSE_QUEUE_NAME": "bench-response",
+        "SERVICEBUS_SESSION_IDLE_TIMEOUT": "0.05",
+        "BATCH_POLL_MIN_INTERVAL": str(min(args.task_runtime, 0.05) or 0.01),
+        "BATCH_POLL_BACKOFF": "0.01",
+        "BATCH_DEDUP_POLL_INTERVAL": "0.05",
+        "POOL_ID": "bench-pool",
+        "BATCH_JOB_MODE": args.job_mode,
+        "BATCH_PROGRESS_INTERVAL": str(max(args.task_runtime / 5, 0.01)),
+        "BATCH_CAPACITY_INTERVAL": str(args.capacity_interval),
+        "BLOB_URL": "https://bench.blob.core.windows.net/output",
+        "METRICS_PORT": "0",
+    })
+
+
+class Recorder:
+    """Per-stage latency samples in seconds"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, stage: str, seconds: float) -> None:
+        self.samples[stage].append(seconds)
+
+    def timed(self, owner, name: str, stage: str) -> None:
+        """Wrap the coroutine method ``owner.name`` so every call is recorded under ``stage``"""
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(owner, name, wrapper)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {stage: percentiles(values) for stage, values in sorted(self.samples.items())}
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        cuts = ordered * 99
+    else:
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive")
+    return {
+        "count": len(ordered),
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+async def create_database(db_url: str):
+    from sqlalchemy import event
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    from src.models.base import Base
+    import src.models.request  # noqa: F401  register tables
+    import src.models.result  # noqa: F401
+
+    connect_args = {"timeout": 30} if db_url.startswith("sqlite") else {}
+    engine = create_async_engine(db_url, connect_args=connect_args)
+    statements: Counter[str] = Counter()
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statements[statement.split(None, 1)[0].upper()] += 1
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    statements.clear()
+    return engine, async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False), statements
+
+
+def instrument(recorder: Recorder, sent_at: dict[str, float]) -> None:
+    """Time the stages of the request path by wrapping their methods"""
+    from src.app.main import ServiceBusServer
+    from src.repository.request_repository import RequestRepository
+    from src.repository.result_repository import ResultRepository
+    from src.repository.request_result_repository import RequestResultRepository
+    from src.repository.unit_of_work import UnitOfWork
+    from src.service.batch_client import AsyncBatchClient
+    from src.service.batch_service import BatchService
+    from src.service.response_publisher import ResponsePublisher
+
+    original_run = BatchService.run
+
+    @functools.wraps(original_run)
+    async def run(self, request, *args, **kwargs):
+        started = sent_at.get(request.request_id)
+        if started is not None:
+            recorder.record("queue_to_start", time.perf_counter() - started)
+        return await original_run(self, request, *args, **kwargs)
+
+    BatchService.run = run
+    recorder.timed(BatchService, "run", "batch_service.run")
+    recorder.timed(ServiceBusServer, "_process_message", "server.process_message")
+    recorder.timed(ServiceBusServer, "save_task_state", "redis.save_task_state")
+    recorder.timed(ServiceBusServer, "remove_task_state", "redis.remove_task_state")
+    recorder.timed(ResponsePublisher, "publish", "publisher.publish")
+    recorder.timed(RequestRepository, "create_request", "db.create_request")
+    recorder.timed(ResultRepository, "get_result", "db.get_result")
+    recorder.timed(RequestResultRepository, "create_relation", "db.create_relation")
+    recorder.timed(UnitOfWork, "__aexit__", "db.unit_of_work_commit")
+    for name in ("add_job", "add_task", "add_task_collection", "get_task", "list_tasks", "terminate_job"):
+        recorder.timed(AsyncBatchClient, name, f"batch.{name}")
+
+
+async def send_requests(transport, queue_name: str, args: argparse.Namespace, sent_at: dict[str, float]) -> None:
+    from src.dto import RequestMessage, codec
+    from src.transport import OutgoingMessage
+
+    unique = max(1, round(args.requests * (1 - args.duplicate_ratio)))
+    run_id = uuid.uuid4().hex[:8]
+    async with transport.get_sender(queue_name) as sender:
+        for i in range(args.requests):
+            session_id = f"bench-{run_id}-{i}"
+            message = RequestMessage(
+                session_id=session_id, command=f"echo bench-{run_id}-{i % unique}", progress=args.progress
+            )
+            sent_at[session_id] = time.perf_counter()
+            content_type = codec.normalize(args.content_type)
+            await sender.send([OutgoingMessage(body=message.to_bytes(content_type), session_id=session_id,
+                                               content_type=content_type)])
+
+
+def final_responses(statuses: Counter) -> int:
+    """Responses that end a request (progress messages come before them)"""
+    return sum(count for status, count in statuses.items() if status != "progress")
+
+
+# one response session per request: release a session as soon as it is idle
+RESPONSE_IDLE_TIMEOUT = 0.02
+
+
+async def collect_responses(transport, queue_name: str, expected: int, sent_at: dict[str, float],
+                            recorder: Recorder, timeout: float, receivers: int = 32,
+                            errors: list[str] | None = None) -> Counter:
+    """Read response sessions with ``receivers`` concurrent receivers until ``expected`` requests finished"""
+    from src.dto import codec
+    from src.exceptions import SessionNotAvailableError
+
+    statuses: Counter[str] = Counter()
+    deadline = time.perf_counter() + timeout
+
+    def finished() -> bool:
+        return final_responses(statuses) >= expected or time.perf_counter() >= deadline
+
+    async def receive() -> None:
+        while not finished():
+            try:
+                async with transport.accept_session(queue_name, max_wait_time=RESPONSE_IDLE_TIMEOUT) as receiver:
+                    async for message in receiver:
+                        response = codec.decode(message.body, message.content_type)
+                        await receiver.complete(message)
+                        statuses[response["status"]] += 1
+                        if response["status"] == "progress":
+                            continue
+                        if response["status"] == "error" and errors is not None and len(errors) < 5:
+                            errors.append(response.get("error_message") or "")
+                        started = sent_at.get(response.get("request_id") or response["session_id"])
+                        if started is not None:
+                            recorder.record("end_to_end", time.perf_counter() - started)
+                        if finished():
+                            break
+            except SessionNotAvailableError:
+                continue
+
+    await asyncio.gather(*(receive() for _ in range(max(1, receivers))))
+    return statuses
+
+
+async def benchmark(args: argparse.Namespace) -> dict:
+    import fakeredis.aioredis
+
+    from benchmark.fakes import FakeBatchServiceClient
+    from src.app.main import ServiceBusServer
+    from src.config.servicebus_config import ServiceBusConfig
+    from src.repository.redis_repository import RedisConnector
+    from src.service.batch_client import AsyncBatchClient
+    from src.service.batch_service import BatchService
+    from src.transport.memory import InMemoryBroker, InMemoryTransport
+
+    tmpdir = None
+    db_url = args.db_url
+    if db_url is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="bench-")
+        db_url = f"sqlite+aiosqlite:///{tmpdir.name}/bench.db"
+
+    engine, session_factory, statements = await create_database(db_url)
+    recorder = Recorder()
+    sent_at: dict[str, float] = {}
+    instrument(recorder, sent_at)
+
+    fake_batch = FakeBatchServiceClient(
+        latency=args.batch_latency,
+        task_runtime=args.task_runtime,
+        nodes=args.pool_nodes,
+        slots_per_node=args.slots_per_node,
+    )
+    redis = RedisConnector(client=fakeredis.aioredis.FakeRedis(decode_responses=True))
+    transport = InMemoryTransport(InMemoryBroker())
+    batch_service = BatchService(
+        batch_client=AsyncBatchClient(fake_batch),
+        session_factory=session_factory,
+        redis=redis,
+    )
+    server = ServiceBusServer(
+        transport=transport, redis=redis, batch_service=batch_service, session_factory=session_factory
+    )
+
+    server_task = asyncio.create_task(server.start())
+    started = time.perf_counter()
+    errors: list[str] = []
+    try:
+        await send_requests(transport, ServiceBusConfig.request_queue, args, sent_at)
+        statuses = await collect_responses(
+            transport, ServiceBusConfig.response_queue, args.requests, sent_at, recorder, args.timeout,
+            receivers=args.receivers, errors=errors,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        server_task.cancel()
+        await asyncio.gather(server_task, return_exceptions=True)
+        await server.hand_off()
+        if server.heartbeat_task is not None:
+            server.heartbeat_task.cancel()
+        await batch_service.close()
+        await engine.dispose()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    completed = final_responses(statuses)
+    return {
+        "config": {
+            "requests": args.requests,
+            "duplicate_ratio": args.duplicate_ratio,
+            "workers": args.workers,
+            "batch_latency": args.batch_latency,
+            "task_runtime": args.task_runtime,
+            "job_mode": args.job_mode,
+            "progress": args.progress,
+            "db": db_url.split(":", 1)[0],
+        },
+        "elapsed_s": elapsed,
+        "throughput_rps": completed / elapsed if elapsed else 0.0,
+        "responses": dict(statuses),
+        "error_samples": errors,
+        "stages": recorder.summary(),
+        "db_statements": dict(statements),
+        "batch_calls": dict(fake_batch.calls),
+    }
+
+
+def print_report(report: dict) -> None:
+    print(f"requests/s: {report['throughput_rps']:.1f} ({final_responses(report['responses'])} responses "
+          f"in {report['elapsed_s']:.2f}s, {report['responses']})")
+    print(f"{'stage':<30}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for stage, stats in report["stages"].items():
+        print(f"{stage:<30}{stats['count']:>8}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+    print(f"db statements: {report['db_statements']} (total {sum(report['db_statements'].values())})")
+    print(f"batch calls: {report['batch_calls']} (total {sum(report['batch_calls'].values())})")
+    for error in report.get("error_samples", []):
+        print(f"error response: {error}")
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return human-readable regressions beyond ``tolerance`` (relative)"""
+    regressions = []
+    if report["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {report['throughput_rps']:.1f} < baseline {baseline['throughput_rps']:.1f} rps")
+    for stage, stats in report["stages"].items():
+        base = baseline["stages"].get(stage)
+        if base is None:
+            continue
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            if stats[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{stage} {key} {stats[key]:.2f} > baseline {base[key]:.2f}")
+    requests = report["config"]["requests"] / max(1, baseline["config"]["requests"])
+    for counter in ("db_statements", "batch_calls"):
+        total, base_total = sum(report[counter].values()), sum(baseline[counter].values()) * requests
+        if total > base_total * (1 + tolerance):
+            regressions.append(f"{counter} {total} > baseline {base_total:.0f}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    configure_env(args)
+    logging.disable(logging.WARNING)
+
+    report = asyncio.run(benchmark(args))
+    print_report(report)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,10 +18,14 @@ CREATE TABLE IF NOT EXISTS requests (
 CREATE TABLE IF NOT EXISTS results (
     result_id VARCHAR PRIMARY KEY,
     result_path VARCHAR,
+    manifest JSONB,
     status resultstatus NOT NULL DEFAULT 'PENDING',
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Add manifest column to databases created before result manifests
+ALTER TABLE results ADD COLUMN IF NOT EXISTS manifest JSONB;
+
 -- Create request_result relation table
 CREATE TABLE IF NOT EXISTS request_result (
     request_id VARCHAR,
@@ -1,35 +1,103 @@
 import asyncio
-import json
+import contextlib
 import os
-from datetime import datetime
+import signal
+import time
+from datetime import datetime, timezone
 import logging
 import traceback
 
 import dotenv
-from azure.servicebus.aio import ServiceBusClient, ServiceBusSender
-from azure.servicebus import ServiceBusMessage, NEXT_AVAILABLE_SESSION
 from asyncio.tasks import Task
-from azure.servicebus.exceptions import OperationTimeoutError, ServiceBusError
-from azure.core.exceptions import ServiceRequestError
+from typing import Callable
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.service.batch_service import BatchService
 from src.repository.redis_repository import RedisConnector
 from src.dto import RequestMessage, ResponseMessage
 from src.utils.teams_alert import send_alert
 from src.config.servicebus_config import ServiceBusConfig
+from src.config.server_config import ServerConfig
+from src.config.batch_config import BatchConfig
 from src.repository.request_repository import RequestRepository
+from src.repository.database import get_session_factory, dispose_engine
+from src.service.response_publisher import ResponsePublisher
+from src.service.progress import ProgressListener
+from src.service.scheduler import FairScheduler
+from src.service.capacity import PoolCapacityMonitor
+from src.service.autoscaler import PoolAutoscaler
+from src.transport import IncomingMessage, SessionReceiver, Transport, create_transport
+from src.exceptions import QuotaExceededError, SessionNotAvailableError, TransportError
+from src.utils.metrics import (
+    ACTIVE_WORKERS,
+    INFLIGHT_BATCH_TASKS,
+    POOL_AVAILABLE_SLOTS,
+    QUEUE_WAIT_SECONDS,
+    REDIS_TASK_STATES,
+    REQUESTS_TOTAL,
+    RESULT_CACHE_HIT_RATIO,
+    SCHEDULER_QUEUED,
+    SESSION_ACQUIRE_SECONDS,
+    SESSION_ADMISSION_OPEN,
+    WORKER_LIMIT,
+    MetricsServer,
+)
+from src.utils.tracing import extract, inject, start_span, traced
 import src.utils.myLogger
 
 dotenv.load_dotenv()
 
 
 class ServiceBusServer:
-    def __init__(self):
-        self.max_workers: int = 1
+    def __init__(
+        self,
+        transport: Transport | None = None,
+        redis: RedisConnector | None = None,
+        batch_service: BatchService | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ):
+        self.max_workers: int = max(1, ServerConfig.max_workers)
+        self.min_workers: int = min(max(1, ServerConfig.min_workers), self.max_workers)
+        self.adaptive_workers: bool = ServerConfig.adaptive_workers
+        # adaptive 모드에서는 min_workers부터 시작해서 세션 유무에 따라 조절
+        self.worker_limit: int = self.min_workers if self.adaptive_workers else self.max_workers
         self.active_tasks: set[Task] = set()
-        self.batch_client: BatchService = BatchService()
-        self.redis: RedisConnector = RedisConnector()
-        self.request_repo = RequestRepository()
+        self.message_tasks: set[Task] = set()
+        self.accept_task: Task | None = None
+        # 종료 signal을 받으면 set: 새 세션/메시지를 받지 않고 처리 중인 요청만 마무리
+        self.draining: asyncio.Event = asyncio.Event()
+        self.slot_freed: asyncio.Event = asyncio.Event()
+        self.heartbeat_task: Task | None = None
+        self.recovery_loop_task: Task | None = None
+        self.publisher: ResponsePublisher | None = None
+        self.transport: Transport = transport or create_transport()
+        self.recovery_tasks: set[Task] = set()
+        self.recovery_slots: asyncio.Semaphore = asyncio.Semaphore(max(1, ServerConfig.recovery_concurrency))
+        # 모든 repository가 하나의 DB connection pool을 공유
+        session_factory = session_factory or get_session_factory()
+        self.redis: RedisConnector = redis or RedisConnector()
+        self.batch_client: BatchService = batch_service or BatchService(session_factory=session_factory, redis=self.redis)
+        self.request_repo = RequestRepository(session_factory)
+        # 수신한 요청을 priority / tenant fair-share 순서로 Batch에 전달
+        self.scheduler = FairScheduler()
+        # Batch pool이 가득 차면 새 세션을 받지 않고 메시지를 queue에 남겨둠
+        self.capacity = PoolCapacityMonitor(self.batch_client.batch_client)
+        # queue 길이에 맞춰 pool 크기 조절 (Redis lease를 가진 노드 하나만 실행)
+        self.autoscaler: PoolAutoscaler | None = (
+            PoolAutoscaler(self.batch_client.batch_client, self.redis, self.transport)
+            if BatchConfig.autoscale_enabled else None
+        )
+        self.metrics_server: MetricsServer | None = (
+            MetricsServer(port=ServerConfig.metrics_port) if ServerConfig.metrics_port else None
+        )
+        ACTIVE_WORKERS.set_function(lambda: len(self.active_tasks))
+        WORKER_LIMIT.set_function(lambda: self.worker_limit)
+        INFLIGHT_BATCH_TASKS.set_function(lambda: len(self.batch_client.task_poller))
+        REDIS_TASK_STATES.set_function(self.redis.count_tasks)
+        RESULT_CACHE_HIT_RATIO.set_function(self.batch_client.result_cache.hit_ratio)
+        SCHEDULER_QUEUED.set_function(lambda: len(self.scheduler))
+        POOL_AVAILABLE_SLOTS.set_function(lambda: self.capacity.available or 0)
+        SESSION_ADMISSION_OPEN.set_function(lambda: int(self.capacity.admitting))
 
     async def start(self) -> None:
         """서버 시작 시 초기화 및 작업 복구"""
@@ -42,219 +110,493 @@ class ServiceBusServer:
         except Exception as e:
             logging.error(f"Redis connection failed: {e}")
             raise
-            
-        # await self.recover_active_tasks()
+
+        migrated = await self.redis.migrate_legacy_tasks()
+        if migrated:
+            logging.info(f"Migrated legacy task states: {migrated}")
+        self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+        if self.metrics_server is not None:
+            await self.metrics_server.start()
+        await self.capacity.start()
         await self.run()
 
+    def shutdown(self) -> None:
+        """새 세션 수신을 멈추고 drain 시작 (signal handler에서 호출)"""
+        self.draining.set()
+        # 다른 노드의 작업도 새로 가져오지 않음
+        for task in (self.accept_task, self.recovery_loop_task):
+            if task is not None:
+                task.cancel()
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """처리 중인 요청이 timeout 안에 끝나기를 기다리고, 남은 요청은 다른 노드로 넘김"""
+        timeout = ServerConfig.drain_timeout if timeout is None else timeout
+        if self.message_tasks:
+            logging.info(f"Draining {len(self.message_tasks)} in-flight requests (up to {timeout:.0f}s)...")
+            await asyncio.wait(set(self.message_tasks), timeout=timeout)
+        await self.hand_off()
+
+    async def hand_off(self) -> None:
+        """남은 작업을 취소하고 Redis lease를 만료시켜 다른 노드가 바로 복구하도록 함
+
+        Batch job은 그대로 두므로 checkpoint(job_id, task_id)가 저장된 요청은 다시 실행하지 않고
+        실행 중인 task에 다시 붙고, Batch에 제출되기 전이던 요청은 처음부터 실행됨
+        """
+        tasks = {*self.active_tasks, *self.message_tasks, *self.recovery_tasks}
+        if self.recovery_loop_task is not None:
+            # 넘긴 작업을 자기 자신이 다시 가져오지 않도록 복구도 중단
+            tasks.add(self.recovery_loop_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            released = await self.redis.release_tasks()
+        except Exception as e:
+            logging.error(f"Handing off requests failed, they are recovered after the lease expires: {e}")
+            return
+        if released:
+            logging.info(f"Handed off {released} requests to other nodes")
+
     async def stop(self) -> None:
         """서버 종료"""
         logging.info("Terminate server...")
+        # drain 없이 종료되는 경우(두 번째 signal, 오류)에도 남은 요청을 넘김
+        await self.hand_off()
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+        if self.metrics_server is not None:
+            await self.metrics_server.close()
+        await self.capacity.close()
+        await self.batch_client.close()
         await self.redis.close()
+        await dispose_engine()
 
+    @traced()
     async def save_task_state(self, task_id: str, state: dict) -> None:
         """작업 상태를 Redis에 저장"""
         logging.info(f"Save request state at Redis: {task_id}")
         await self.redis.save_task_state(task_id, state)
 
 
+    @traced()
     async def remove_task_state(self, task_id: str) -> None:
         """완료된 작업 상태를 Redis에서 제거"""
         logging.info(f"Remove request from Redis: {task_id}")
         await self.redis.remove_task_state(task_id)
 
 
+    async def _heartbeat_loop(self) -> None:
+        """소유한 작업의 lease를 주기적으로 연장"""
+        while True:
+            await asyncio.sleep(self.redis.lease_ttl / 3)
+            try:
+                await self.redis.heartbeat()
+            except Exception as e:
+                logging.error(f"Task heartbeat failed: {e}")
+
+    async def _recovery_loop(self) -> None:
+        """lease가 만료된 작업을 주기적으로 가져와서 복구 (죽은 노드의 작업 포함)"""
+        while True:
+            try:
+                await self.recover_active_tasks()
+            except Exception as e:
+                logging.error(f"Task recovery sweep failed: {e}")
+            await asyncio.sleep(ServerConfig.recovery_interval)
+
     async def recover_active_tasks(self) -> None:
-        """Redis에서 이전 작업 상태 복구"""
-        stored_tasks = await self.redis.get_all_tasks()
-        async with ServiceBusClient.from_connection_string(ServiceBusConfig.connection_str) as servicebus_client:
-            async with servicebus_client.get_queue_sender(queue_name=ServiceBusConfig.response_queue) as sender:
-                for task_id, state in stored_tasks.items():
-                    try:
-                        logging.info(f"Restore saved requests from Redis: {task_id}")
-                        task = asyncio.create_task(
-                            self.handle_message(
-                                servicebus_client=servicebus_client,
-                                sender=sender,
-                                queue_name=ServiceBusConfig.request_queue,
-                                recovery_state=state,
-                            )
+        """Redis에서 lease가 만료된 작업을 가져와서 동시에 복구"""
+        stored_tasks = await self.redis.claim_expired_tasks()
+        for task_id, state in stored_tasks.items():
+            logging.info(f"Restore saved requests from Redis: {task_id}")
+            task = asyncio.create_task(self.recover_task(task_id, state))
+            self.recovery_tasks.add(task)
+            task.add_done_callback(self.recovery_tasks.discard)
+
+    async def recover_task(self, task_id: str, state: dict) -> None:
+        """복구된 작업 처리: Batch task가 남아 있으면 다시 붙어서 결과만 기다림"""
+        async with self.recovery_slots:
+            with start_span("recover_task", parent=extract(state), task_id=task_id):
+                session_id = state.get("session_id", task_id)
+                content_type = state.get("content_type")
+                try:
+                    req_msg = RequestMessage.from_dict(state)
+                    request_id = req_msg.request_id or req_msg.session_id
+                    req = await self.request_repo.get_request(request_id)
+                    if req is None:
+                        req = await self.request_repo.create_request(request_id, req_msg.command)
+
+                    # Batch에 제출되기 전이던 요청만 다시 scheduler 순서를 기다림
+                    slot = (
+                        contextlib.nullcontext() if state.get("job_id")
+                        else self.scheduler.slot(req_msg.tenant, req_msg.priority)
+                    )
+                    async with slot:
+                        manifest = await self.batch_client.resume(
+                            req,
+                            state,
+                            checkpoint=lambda info: self.redis.update_task_state(task_id, info),
+                            progress=(
+                                self._progress_listener(task_id, session_id, request_id, content_type)
+                                if req_msg.progress else None
+                            ),
                         )
-                        self.active_tasks.add(task)
-                        await task
-                        await send_alert(f"Restored request from Redis success: {task_id}")
-                        logging.info(f"Restored request from Redis success: {task_id}")
-                    except Exception as e:
-                        await send_alert(f"Restored request from Redis failed: {task_id}")
-                        logging.error(f"Resotring request from Redis failed {task_id}: {str(e)}")
+                    response = ResponseMessage(
+                        session_id=session_id,
+                        result_paths=manifest.paths,
+                        status="completed",
+                        request_id=request_id,
+                        manifest=manifest.to_dict(),
+                    )
+                    await self.publisher.publish(response, content_type)
+                    await self.remove_task_state(task_id)
+
+                    await send_alert(f"Restored request from Redis success: {task_id}")
+                    logging.info(f"Restored request from Redis success: {task_id}")
 
-    async def handle_message(
-        self,
-        servicebus_client: ServiceBusClient,
-        sender: ServiceBusSender,
-        queue_name: str,
-        recovery_state: str | None = None,
-    ) -> None:
-        """메시지 처리 (복구 상태 포함)"""
-        try:
-            if recovery_state:
-                # 복구된 상태에서 BatchRequest 생성
-                request = RequestMessage.from_dict(recovery_state)
-                result_paths = await self.batch_client.run(
-                    request.job_id,
-                    request.command,
-                )
-
-                response = ResponseMessage(job_id=request.job_id, result_paths=result_paths, status="completed")
-
-                # Service Bus 메시지로 변환하여 전송
-                message = ServiceBusMessage(json.dumps(response.to_dict()), job_id=response.job_id)
-                await sender.send_messages(message)
-                await self.remove_task_state(request.job_id)
-
-                logging.info(f"Job closed: {request.job_id}")
-
-            else:
-                try:
-                    async with servicebus_client.get_queue_receiver(
-                        queue_name=queue_name, 
-                        session_id=NEXT_AVAILABLE_SESSION, 
-                        max_wait_time=30,
-                        prefetch_count=0
-                    ) as receiver:
-                        if not receiver.session:
-                            logging.info("No available session, will retry...")
-                            return
-                                               
-                        await receiver.session.set_state("OPEN")
-                        status = await receiver.session.get_state()
-                        logging.info(f"Session connected: {receiver.session.session_id}: {status}")
-                        session_id = receiver.session.session_id
-
-                        async for message in receiver:
-                            try:
-                                # 수신된 메시지를 BatchRequest로 변환
-                                print(json.loads(str(message)))
-                                req_msg = RequestMessage.from_dict(json.loads(str(message)))
-                                req = await self.request_repo.create_request(req_msg.session_id, req_msg.command)
-                                logging.info(f"Run Batch with new request: {req}")
-
-                                # 메시지 완료 처리
-                                await receiver.complete_message(message)
-                                logging.info(f"\nNew message received: {req_msg}")
-
-                                # Redis에 작업 상태 저장
-                                await self.save_task_state(req_msg.session_id, req_msg.to_dict())
-
-                                result_paths = await self.batch_client.run(req)
-                                logging.info(f"Batch request success: {result_paths}")
-                                response = ResponseMessage(
-                                    session_id=req_msg.session_id, result_paths=result_paths, status="completed"
-                                )
-
-                                # response를 직렬화
-                                message = ServiceBusMessage(json.dumps(response.to_dict()), session_id=response.session_id)
-                                await sender.send_messages(message)
-
-                                logging.info(f"Message sent successfully: {response}")
-
-                                # Redis에서 작업 상태 제거
-                                await self.remove_task_state(receiver.session.session_id)
-
-                                # 세션 종료
-                                await receiver.session.set_state("CLOSED")
-                                status = await receiver.session.get_state()
-                                logging.info(f"Session closed: {receiver.session.session_id}: {status}")
-                                await send_alert(f"Batch request success: {response}")
-                                return
-
-                            except Exception as msg_error:
-                                error_response = ResponseMessage(
-                                    session_id=session_id,
-                                    result_paths="",
-                                    status="error",
-                                    error_message=str(msg_error),
-                                )
-                                logging.error(msg_error)
-                                # 에러 응답도 JSON 직렬화
-                                error_message = ServiceBusMessage(
-                                    json.dumps(error_response.to_dict()), session_id=session_id
-                                )
-                                await sender.send_messages(error_message)
-                                await send_alert(f"Batch request failed: {error_response}")
-                                return
-
-                except OperationTimeoutError:
-                    logging.info("No available session, waiting for next attempt...")
-                    await asyncio.sleep(1)
-                    return
-                except ServiceBusError as sb_error:
-                    if "timeout" in str(sb_error).lower():
-                        logging.info("Service Bus timeout, will retry...")
-                        await asyncio.sleep(1)
-                    else:
-                        logging.error(f"Service Bus error: {str(sb_error)}")
-                        await asyncio.sleep(5)
-                    return
-                except ServiceRequestError as req_error:
-                    logging.error(f"Service request error: {str(req_error)}")
-                    await asyncio.sleep(5)
-                    return
                 except Exception as e:
-                    error_trace = traceback.format_exc()
-                    logging.error(f"Unexpected error: {str(e)}")
-                    logging.error(f"Error traceback: {error_trace}")
-                    await asyncio.sleep(5)
-                    return
+                    await send_alert(f"Restored request from Redis failed: {task_id}")
+                    logging.error(f"Restoring request from Redis failed {task_id}: {str(e)}")
+                    error_response = ResponseMessage(
+                        session_id=session_id,
+                        result_paths=[],
+                        status="error",
+                        error_message=str(e),
+                        request_id=state.get("request_id", task_id),
+                    )
+                    await self.publisher.publish(error_response, content_type)
+                    await self.remove_task_state(task_id)
+
+    async def handle_message(self, queue_name: str) -> bool:
+        """세션 하나를 받아서 idle timeout까지 들어오는 메시지를 처리, 세션을 처리했으면 True 반환"""
+        try:
+            acquire_started = time.perf_counter()
+            try:
+                async with self.transport.accept_session(
+                    queue_name=queue_name,
+                    max_wait_time=ServiceBusConfig.session_idle_timeout,
+                    prefetch_count=ServiceBusConfig.prefetch_count,
+                ) as receiver:
+                    SESSION_ACQUIRE_SECONDS.observe(time.perf_counter() - acquire_started, outcome="acquired")
+                    self._on_session_acquired()
+                    await receiver.set_state("OPEN")
+                    status = await receiver.get_state()
+                    logging.info(f"Session connected: {receiver.session_id}: {status}")
+                    session_id = receiver.session_id
+
+                    # 세션 내 독립적인 메시지는 session_concurrency 만큼 동시에 처리
+                    slots = asyncio.Semaphore(max(1, ServiceBusConfig.session_concurrency))
+                    in_flight: set[Task] = set()
+                    received = 0
+                    async for message in receiver:
+                        # 세션의 첫 메시지는 기존처럼 session_id를 request_id로 사용
+                        request_id = session_id if received == 0 else f"{session_id}:{message.sequence_number}"
+                        received += 1
+                        await slots.acquire()
+                        if self.draining.is_set():
+                            # 종료 중: complete하지 않은 메시지는 세션 lock이 풀리면 다른 노드로 다시 전달됨
+                            slots.release()
+                            break
+                        task = asyncio.create_task(self._process_message(receiver, session_id, request_id, message))
+                        in_flight.add(task)
+                        self.message_tasks.add(task)
+                        task.add_done_callback(self.message_tasks.discard)
+                        task.add_done_callback(in_flight.discard)
+                        task.add_done_callback(lambda _: slots.release())
+                        if ServiceBusConfig.session_concurrency <= 1:
+                            await task
+
+                    if in_flight:
+                        await asyncio.gather(*in_flight)
+
+                    # 세션 종료
+                    await receiver.set_state("CLOSED")
+                    status = await receiver.get_state()
+                    logging.info(f"Session closed: {session_id}: {status} ({received} messages)")
+                    return True
+
+            except SessionNotAvailableError:
+                SESSION_ACQUIRE_SECONDS.observe(time.perf_counter() - acquire_started, outcome="empty")
+                logging.info("No available session, waiting for next attempt...")
+                await asyncio.sleep(1)
+                return False
+            except TransportError as transport_error:
+                logging.error(f"Transport error: {str(transport_error)}")
+                await asyncio.sleep(5)
+                return False
+            except Exception as e:
+                error_trace = traceback.format_exc()
+                logging.error(f"Unexpected error: {str(e)}")
+                logging.error(f"Error traceback: {error_trace}")
+                await asyncio.sleep(5)
+                return False
 
         except Exception as e:
             logging.error(f"Critical error: {str(e)}")
             await asyncio.sleep(5)
+        return False
 
-    async def run(self) -> None:
-        logging.info(f"Connect to ServiceBus...")
-
-        async with ServiceBusClient.from_connection_string(ServiceBusConfig.connection_str) as servicebus_client:
-            async with servicebus_client.get_queue_sender(queue_name=ServiceBusConfig.response_queue) as sender:
-                while True:
-                    try:
-                        # 완료된 작업 제거
-                        done_tasks = {task for task in self.active_tasks if task.done()}
-                        self.active_tasks.difference_update(done_tasks)
-
-                        # 새로운 작업 추가 (여기서는 recovery_state=None)
-                        while len(self.active_tasks) < self.max_workers:
-                            task = asyncio.create_task(
-                                self.handle_message(
-                                    servicebus_client=servicebus_client,
-                                    sender=sender,
-                                    queue_name=ServiceBusConfig.request_queue,
-                                )
+    async def _process_message(
+        self,
+        receiver: SessionReceiver,
+        session_id: str,
+        request_id: str,
+        message: IncomingMessage,
+    ) -> None:
+        """세션에서 받은 메시지 하나를 Batch로 실행하고 응답 전송"""
+        if message.enqueued_time is not None:
+            enqueued = message.enqueued_time
+            if enqueued.tzinfo is None:
+                enqueued = enqueued.replace(tzinfo=timezone.utc)
+            QUEUE_WAIT_SECONDS.observe((datetime.now(timezone.utc) - enqueued).total_seconds())
+        # client가 message property로 보낸 trace context를 이어서 사용
+        with start_span(
+            "process_message",
+            parent=extract(message.application_properties),
+            session_id=session_id,
+            request_id=request_id,
+        ) as span:
+            saved = False
+            stage = "processing"  # processing -> delivering -> delivered
+            # 응답에 실을 request_id: client가 보낸 값이 있으면 그 값 (파싱 전에는 서버가 정한 값)
+            response_id = request_id
+            try:
+                # 수신된 메시지를 BatchRequest로 변환
+                req_msg = RequestMessage.from_bytes(message.body, message.content_type)
+                req_msg.request_id = response_id = req_msg.request_id or request_id
+
+                # tenant의 대기열이 quota를 넘으면 complete 전에 거절 (메시지는 queue에 남음)
+                self.scheduler.admit(req_msg.tenant)
+
+                req = await self.request_repo.create_request(req_msg.request_id, req_msg.command)
+                logging.info(f"Run Batch with new request: {req}")
+
+                # 메시지 완료 처리
+                await receiver.complete(message)
+                logging.info(f"\nNew message received: {req_msg}")
+
+                # Redis에 작업 상태 저장 (복구된 작업도 같은 trace로 이어지도록 trace context 포함)
+                # 응답은 요청과 같은 content type으로 전송 (복구 시에도 사용)
+                state = {**req_msg.to_dict(), "content_type": message.content_type}
+                await self.save_task_state(req_msg.request_id, inject(state))
+                saved = True
+
+                # priority / tenant fair-share 순서가 될 때까지 대기한 뒤 Batch로 전달
+                async with self.scheduler.slot(req_msg.tenant, req_msg.priority):
+                    # 세션 하나가 여러 메시지를 처리하므로 slot은 Batch로 보내는 요청마다 예약
+                    self.capacity.reserve()
+                    manifest = await self.batch_client.run(
+                        req,
+                        checkpoint=lambda info: self.redis.update_task_state(req_msg.request_id, info),
+                        progress=(
+                            self._progress_listener(
+                                req_msg.request_id, session_id, req_msg.request_id, message.content_type
                             )
-                            self.active_tasks.add(task)
-
-                        await asyncio.sleep(1)
+                            if req_msg.progress else None
+                        ),
+                    )
+                logging.info(f"Batch request success: {manifest}")
+                response = ResponseMessage(
+                    session_id=session_id,
+                    result_paths=manifest.paths,
+                    status="completed",
+                    request_id=req_msg.request_id,
+                    manifest=manifest.to_dict(),
+                )
 
+                # response는 publisher가 모아서 batch로 전송
+                stage = "delivering"
+                await self.publisher.publish(response, message.content_type)
+                stage = "delivered"
+
+                logging.info(f"Message sent successfully: {response}")
+
+                # Redis에서 작업 상태 제거
+                saved = False
+                await self.remove_task_state(req_msg.request_id)
+                REQUESTS_TOTAL.inc(status="completed")
+                await send_alert(f"Batch request success: {response}")
+
+            except QuotaExceededError as quota_error:
+                # settle하지 않은 메시지는 세션 lock이 풀리면 다시 전달되므로 backpressure로 동작
+                span.set_attribute("deferred", str(quota_error))
+                logging.warning(f"Request deferred, leaving message in queue {response_id}: {str(quota_error)}")
+                REQUESTS_TOTAL.inc(status="deferred")
+
+            except Exception as msg_error:
+                span.status, span.error = "error", str(msg_error)
+                logging.error(msg_error)
+                if stage == "delivered":
+                    # 응답은 이미 전송됨: 후처리 실패는 기록만
+                    logging.error(f"Cleanup after response failed {response_id}: {str(msg_error)}")
+                elif stage == "delivering":
+                    # publisher가 재시도 끝에 실패한 전송: 같은 publisher로 error 응답을 다시 보내지 않음
+                    REQUESTS_TOTAL.inc(status="undelivered")
+                else:
+                    REQUESTS_TOTAL.inc(status="error")
+                    await self._publish_error(
+                        ResponseMessage(
+                            session_id=session_id,
+                            result_paths=[],
+                            status="error",
+                            error_message=str(msg_error),
+                            request_id=response_id,
+                        ),
+                        message.content_type,
+                    )
+                # 실패한 요청은 복구 대상이 아니므로 heartbeat 중인 작업 상태도 제거
+                if saved:
+                    try:
+                        await self.remove_task_state(req_msg.request_id)
                     except Exception as e:
-                        logging.error(f"An error occurred in the main loop: {str(e)}")
-                        await asyncio.sleep(1)
+                        logging.error(f"Removing failed request from Redis failed {req_msg.request_id}: {str(e)}")
+
+    async def _publish_error(self, response: ResponseMessage, content_type: str | None = None) -> None:
+        """error 응답과 알림 전송 (전송 실패가 session worker를 멈추지 않도록 기록만)"""
+        try:
+            await self.publisher.publish(response, content_type)
+        except Exception as e:
+            logging.error(f"Sending error response failed {response.request_id}: {str(e)}")
+        try:
+            await send_alert(f"Batch request failed: {response}")
+        except Exception as e:
+            logging.error(f"Sending alert failed {response.request_id}: {str(e)}")
 
+    def _progress_listener(
+        self,
+        task_id: str,
+        session_id: str,
+        request_id: str,
+        content_type: str | None = None,
+    ) -> ProgressListener:
+        """실행 중 출력을 progress 메시지로 전송하고, 복구 시 이어서 보내도록 offset을 기록"""
+        async def publish(output: str, offset: int) -> None:
+            await self.publisher.publish(
+                ResponseMessage(
+                    session_id=session_id,
+                    result_paths=[],
+                    status="progress",
+                    request_id=request_id,
+                    output=output,
+                    offset=offset,
+                ),
+                content_type,
+            )
+            await self.redis.update_task_state(task_id, {"progress_offset": offset})
+
+        return ProgressListener(publish)
+
+    def _on_session_acquired(self) -> None:
+        """세션을 받았으면 backlog가 있다는 뜻이므로 adaptive 모드면 바로 worker 하나 추가
+
+        세션은 몇 시간씩 이어질 수 있어서 세션이 끝날 때까지 기다리면 worker 수가 늘지 않음
+        """
+        if self.adaptive_workers and self.worker_limit < self.max_workers:
+            self.worker_limit += 1
+            self.slot_freed.set()
+
+    def _on_worker_done(self, task: Task) -> None:
+        """worker 종료 즉시 슬롯 반환 (adaptive 모드면 세션을 못 받은 worker만큼 줄임)"""
+        self.active_tasks.discard(task)
+        if self.adaptive_workers and not task.cancelled() and task.exception() is None and not task.result():
+            self.worker_limit = max(self.worker_limit - 1, self.min_workers)
+        self.slot_freed.set()
+
+    async def _wait_for_free_slot(self) -> None:
+        """빈 worker 슬롯이 생길 때까지 대기"""
+        while len(self.active_tasks) >= self.worker_limit:
+            self.slot_freed.clear()
+            await self.slot_freed.wait()
 
-def main() -> None:
+    async def run(self) -> None:
+        logging.info(f"Connect to message broker ({type(self.transport).__name__})...")
+
+        async with self.transport:
+            async with self.transport.get_sender(ServiceBusConfig.response_queue) as sender:
+                self.publisher = ResponsePublisher(sender)
+                self.publisher.start()
+                # 복구는 새 세션 수신을 막지 않도록 백그라운드에서 진행
+                self.recovery_loop_task = asyncio.create_task(self._recovery_loop())
+                if self.autoscaler is not None:
+                    self.autoscaler.start()
+                self.accept_task = asyncio.create_task(self._accept_sessions())
+                try:
+                    # shutdown()이 accept_task를 취소할 때까지 세션을 받은 뒤 drain
+                    await asyncio.wait({self.accept_task})
+                    await self.drain()
+                finally:
+                    if self.autoscaler is not None:
+                        await self.autoscaler.close()
+                    await self.publisher.close()
+
+    async def _accept_sessions(self) -> None:
+        """빈 worker 슬롯이 생길 때마다 새 세션 수신 작업 추가"""
+        while not self.draining.is_set():
+            try:
+                await self._wait_for_free_slot()
+                # pool이 가득 찬 동안은 세션을 받지 않음 (다른 노드/pool이 가져갈 수 있도록)
+                await self.capacity.wait_for_capacity()
+
+                # 새로운 작업 추가
+                task = asyncio.create_task(self.handle_message(queue_name=ServiceBusConfig.request_queue))
+                self.active_tasks.add(task)
+                task.add_done_callback(self._on_worker_done)
+
+            except Exception as e:
+                logging.error(f"An error occurred in the main loop: {str(e)}")
+                await asyncio.sleep(1)
+
+
+def configure_logging() -> None:
     # 모든 관련 로거의 레벨 조정
     logging.getLogger("uamqp").setLevel(logging.WARNING)
     logging.getLogger("azure").setLevel(logging.WARNING)
     logging.getLogger("azure.servicebus").setLevel(logging.WARNING)
     logging.getLogger("azure.core").setLevel(logging.WARNING)
-    
+
+
+async def _heartbeat(beat: Callable[[], None]) -> None:
+    while True:
+        beat()
+        await asyncio.sleep(ServerConfig.worker_heartbeat_interval)
+
+
+async def serve(
+    heartbeat: Callable[[], None] | None = None,
+    signals: tuple[signal.Signals, ...] = (signal.SIGTERM, signal.SIGINT),
+) -> None:
+    """서버를 실행하고 signal을 받으면 drain 후 종료 (한 번 더 받으면 기다리지 않고 바로 넘김)
+
+    heartbeat는 event loop가 살아 있는 동안 주기적으로 호출됨 (supervisor의 상태 확인용)
+    """
     server = ServiceBusServer()
+    loop = asyncio.get_running_loop()
+    serving = asyncio.current_task()
+
+    def on_signal() -> None:
+        if server.draining.is_set():
+            serving.cancel()
+        else:
+            logging.info("Server draining...")
+            server.shutdown()
+
+    for sig in signals:
+        loop.add_signal_handler(sig, on_signal)
+    beat = asyncio.create_task(_heartbeat(heartbeat)) if heartbeat is not None else None
     try:
         logging.info("Server starting...")
-        asyncio.run(server.start())
-
-    except KeyboardInterrupt:
+        await server.start()
+    except asyncio.CancelledError:
         logging.info("Server shutting down...")
-        asyncio.run(server.stop())
+    finally:
+        if beat is not None:
+            beat.cancel()
+        await server.stop()
+
 
+def main() -> None:
+    configure_logging()
+    try:
+        asyncio.run(serve())
     except Exception as e:
         logging.error(f"An unexpected error has occurred: {str(e)}")
 
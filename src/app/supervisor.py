@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from dataclasses import dataclass
+from multiprocessing.process import BaseProcess
+from multiprocessing.sharedctypes import Synchronized
+
+import dotenv
+
+from src.config.server_config import ServerConfig
+import src.utils.myLogger
+
+dotenv.load_dotenv()
+
+# spawn: 각 worker가 Service Bus/Redis/DB/Batch 연결과 event loop를 새로 만들도록 fork 대신 사용
+_context = multiprocessing.get_context("spawn")
+
+
+def run_worker(index: int, heartbeat: Synchronized) -> None:
+    """worker process 진입점: 자체 연결을 가진 ServiceBusServer 하나를 실행"""
+    # 터미널의 Ctrl+C는 process group 전체로 가므로 무시하고, supervisor가 보내는 SIGTERM으로만 drain
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if ServerConfig.metrics_port:
+        ServerConfig.metrics_port += index
+
+    from src.app.main import configure_logging, serve
+
+    def beat() -> None:
+        heartbeat.value = time.time()
+
+    configure_logging()
+    asyncio.run(serve(heartbeat=beat, signals=(signal.SIGTERM,)))
+
+
+@dataclass
+class _Worker:
+    index: int
+    heartbeat: Synchronized
+    process: BaseProcess | None = None
+    started_at: float = 0.0
+    restarts: int = 0  # consecutive restarts, reset once the worker stays up
+    restart_at: float = 0.0
+
+
+class Supervisor:
+    """Runs ``processes`` worker processes, each with its own ServiceBusServer.
+
+    Workers share nothing but the environment: every process opens its own
+    broker, Redis, database and Batch connections, and Service Bus sessions
+    spread over all receivers. A worker that exits or whose event loop stops
+    updating its heartbeat for ``heartbeat_timeout`` seconds is replaced, with
+    an exponential backoff of up to ``max_restart_delay`` seconds while it
+    keeps crashing. SIGTERM/SIGINT are forwarded to all workers, which finish
+    their cleanup within ``shutdown_timeout`` seconds before they are killed;
+    SIGHUP restarts the workers one at a time.
+    """
+
+    def __init__(
+        self,
+        processes: int | None = None,
+        heartbeat_timeout: float | None = None,
+        shutdown_timeout: float | None = None,
+        max_restart_delay: float | None = None,
+    ):
+        processes = processes or ServerConfig.worker_processes or os.cpu_count() or 1
+        self.heartbeat_timeout = heartbeat_timeout or ServerConfig.worker_heartbeat_timeout
+        self.shutdown_timeout = shutdown_timeout or ServerConfig.worker_shutdown_timeout
+        self.max_restart_delay = max_restart_delay or ServerConfig.worker_max_restart_delay
+        self.workers = [_Worker(index, _context.Value("d", 0.0)) for index in range(max(1, processes))]
+        self._stopping = False
+        self._reload = False
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        logging.info(f"Starting {len(self.workers)} worker processes")
+        for worker in self.workers:
+            self._start(worker)
+        try:
+            while not self._stopping:
+                if self._reload:
+                    self._reload = False
+                    self._rolling_restart()
+                self._check()
+                time.sleep(1)
+        finally:
+            self._shutdown()
+
+    def _on_stop(self, signum, frame) -> None:
+        logging.info(f"Received signal {signal.Signals(signum).name}, stopping workers...")
+        self._stopping = True
+
+    def _on_reload(self, signum, frame) -> None:
+        self._reload = True
+
+    def _start(self, worker: _Worker) -> None:
+        worker.heartbeat.value = time.time()  # startup counts against the heartbeat timeout
+        worker.process = _context.Process(
+            target=run_worker, args=(worker.index, worker.heartbeat), name=f"worker-{worker.index}"
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        logging.info(f"Worker {worker.index} started (pid {worker.process.pid})")
+
+    def _check(self) -> None:
+        now = time.monotonic()
+        for worker in self.workers:
+            process = worker.process
+            if process is None:
+                if now >= worker.restart_at:
+                    self._start(worker)
+                continue
+            if process.is_alive():
+                stalled = time.time() - worker.heartbeat.value
+                if stalled < self.heartbeat_timeout:
+                    if worker.restarts and now - worker.started_at > self.max_restart_delay:
+                        worker.restarts = 0
+                    continue
+                logging.error(f"Worker {worker.index} (pid {process.pid}) unresponsive for {stalled:.0f}s, killing it")
+                process.kill()
+                process.join(5)
+            else:
+                logging.error(f"Worker {worker.index} (pid {process.pid}) exited with code {process.exitcode}")
+            process.close()
+            worker.process = None
+            delay = min(self.max_restart_delay, 2 ** worker.restarts - 1)
+            worker.restarts += 1
+            worker.restart_at = now + delay
+            logging.info(f"Restarting worker {worker.index} in {delay:.0f}s")
+
+    def _rolling_restart(self) -> None:
+        logging.info("Restarting workers one at a time")
+        for worker in self.workers:
+            if self._stopping:
+                return
+            if worker.process is not None:
+                self._terminate([worker.process])
+                worker.process.close()
+            worker.restarts = 0
+            self._start(worker)
+
+    def _shutdown(self) -> None:
+        self._terminate([worker.process for worker in self.workers if worker.process is not None])
+        logging.info("All workers stopped")
+
+    def _terminate(self, processes: list[BaseProcess]) -> None:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                logging.warning(f"Worker pid {process.pid} did not stop in {self.shutdown_timeout:.0f}s, killing it")
+                process.kill()
+                process.join()
+
+
+def main() -> None:
+    Supervisor().run()
+
+
+if __name__ == "__main__":
+    main()
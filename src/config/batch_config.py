@@ -8,5 +8,34 @@ class BatchConfig:
     account_key: str = os.getenv("BATCH_ACCOUNT_KEY")
     account_url: str = os.getenv("BATCH_ACCOUNT_URL")
     pool_id: str = os.getenv("POOL_ID")
+    max_concurrency: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    poll_min_interval: float = float(os.getenv("BATCH_POLL_MIN_INTERVAL", "1"))
+    poll_max_interval: float = float(os.getenv("BATCH_POLL_MAX_INTERVAL", "60"))
+    poll_backoff: float = float(os.getenv("BATCH_POLL_BACKOFF", "0.05"))
+    poll_max_jobs_per_tick: int = int(os.getenv("BATCH_POLL_MAX_JOBS_PER_TICK", "20"))
+    dedup_poll_interval: float = float(os.getenv("BATCH_DEDUP_POLL_INTERVAL", "5"))
+    job_mode: str = os.getenv("BATCH_JOB_MODE", "per_request")  # per_request, shared, packed
+    job_max_age: float = float(os.getenv("BATCH_JOB_MAX_AGE", "3600"))
+    job_max_tasks: int = int(os.getenv("BATCH_JOB_MAX_TASKS", "10000"))
+    job_cleanup_interval: float = float(os.getenv("BATCH_JOB_CLEANUP_INTERVAL", "60"))
+    progress_interval: float = float(os.getenv("BATCH_PROGRESS_INTERVAL", "10"))
+    progress_max_bytes: int = int(os.getenv("BATCH_PROGRESS_MAX_BYTES", "65536"))
+    output_compression: str = os.getenv("BATCH_OUTPUT_COMPRESSION", "none")  # none, gzip, zstd
+    output_compress_min_bytes: int = int(os.getenv("BATCH_OUTPUT_COMPRESS_MIN_BYTES", "1048576"))
+    pack_window: float = float(os.getenv("BATCH_PACK_WINDOW", "0.2"))
+    pack_max_tasks: int = int(os.getenv("BATCH_PACK_MAX_TASKS", "500"))
+    capacity_interval: float = float(os.getenv("BATCH_CAPACITY_INTERVAL", "0"))  # 0 disables admission control
+    capacity_pause_at: int = int(os.getenv("BATCH_CAPACITY_PAUSE_AT", "0"))  # stop accepting at <= this many slots
+    capacity_resume_at: int = int(os.getenv("BATCH_CAPACITY_RESUME_AT", "2"))  # accept again from this many slots
+    autoscale_enabled: bool = os.getenv("BATCH_AUTOSCALE_ENABLED", "false").lower() == "true"
+    autoscale_interval: float = float(os.getenv("BATCH_AUTOSCALE_INTERVAL", "60"))
+    autoscale_min_nodes: int = int(os.getenv("BATCH_AUTOSCALE_MIN_NODES", "0"))
+    autoscale_max_nodes: int = int(os.getenv("BATCH_AUTOSCALE_MAX_NODES", "10"))
+    autoscale_low_priority_ratio: float = float(os.getenv("BATCH_AUTOSCALE_LOW_PRIORITY_RATIO", "0"))
+    autoscale_drain_seconds: float = float(os.getenv("BATCH_AUTOSCALE_DRAIN_SECONDS", "600"))  # backlog work-off target
+    autoscale_default_runtime: float = float(os.getenv("BATCH_AUTOSCALE_DEFAULT_RUNTIME", "300"))  # before samples exist
+    autoscale_cooldown: float = float(os.getenv("BATCH_AUTOSCALE_COOLDOWN", "300"))  # min seconds between resizes
+    autoscale_scale_down_window: float = float(os.getenv("BATCH_AUTOSCALE_SCALE_DOWN_WINDOW", "900"))
+    autoscale_tolerance: float = float(os.getenv("BATCH_AUTOSCALE_TOLERANCE", "0.1"))  # ignore smaller changes
 
     
@@ -9,5 +9,11 @@ class PSQLConfig:
     password: str = os.getenv("PGSQL_PASSWORD")
     database: str = os.getenv("PGSQL_DATABASE")
     port: int = os.getenv("PGSQL_PORT")
+    pool_size: int = int(os.getenv("PGSQL_POOL_SIZE", "5"))
+    max_overflow: int = int(os.getenv("PGSQL_MAX_OVERFLOW", "5"))
+    pool_timeout: float = float(os.getenv("PGSQL_POOL_TIMEOUT", "30"))
+    pool_recycle: int = int(os.getenv("PGSQL_POOL_RECYCLE", "1800"))
+    pool_pre_ping: bool = os.getenv("PGSQL_POOL_PRE_PING", "true").lower() == "true"
+    statement_cache_size: int = int(os.getenv("PGSQL_STATEMENT_CACHE_SIZE", "100"))
 
     
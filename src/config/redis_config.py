@@ -8,5 +8,9 @@ class RedisConfig:
     port: int = os.getenv("REDIS_PORT")
     password: str = os.getenv("REDIS_PASSWORD")
     db: int = os.getenv("REDIS_DB")
+    lease_ttl: float = float(os.getenv("REDIS_LEASE_TTL", "30"))
+    result_cache_size: int = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+    result_cache_ttl: float = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+    result_cache_negative_ttl: float = float(os.getenv("RESULT_CACHE_NEGATIVE_TTL", "5"))
 
     
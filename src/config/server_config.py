@@ -0,0 +1,30 @@
+from dotenv import load_dotenv
+import os
+import socket
+load_dotenv()
+
+
+class ServerConfig:
+    max_workers: int = int(os.getenv("SERVER_MAX_WORKERS", "1"))
+    min_workers: int = int(os.getenv("SERVER_MIN_WORKERS", "1"))
+    adaptive_workers: bool = os.getenv("SERVER_ADAPTIVE_WORKERS", "false").lower() == "true"
+    node_name: str = os.getenv("NODE_NAME") or socket.gethostname()
+    recovery_concurrency: int = int(os.getenv("SERVER_RECOVERY_CONCURRENCY", "8"))
+    recovery_interval: float = float(os.getenv("SERVER_RECOVERY_INTERVAL", "30"))
+    transport: str = os.getenv("TRANSPORT", "servicebus")
+    metrics_port: int = int(os.getenv("METRICS_PORT", "9000"))  # 0 disables the /metrics endpoint
+    trace_exporter: str = os.getenv("TRACE_EXPORTER", "none")  # none, console, file
+    trace_file: str = os.getenv("TRACE_FILE", "traces.jsonl")
+    # fair-share scheduling between receive and Batch (0 disables it)
+    scheduler_max_running: int = int(os.getenv("SCHEDULER_MAX_RUNNING", "0"))
+    scheduler_tenant_max_running: int = int(os.getenv("SCHEDULER_TENANT_MAX_RUNNING", "0"))  # 0: no limit
+    scheduler_tenant_max_queued: int = int(os.getenv("SCHEDULER_TENANT_MAX_QUEUED", "0"))  # 0: no limit
+    # on SIGTERM/SIGINT: seconds in-flight requests get to finish before they are handed off to other nodes
+    drain_timeout: float = float(os.getenv("SERVER_DRAIN_TIMEOUT", "30"))
+    # supervisor (src/app/supervisor.py): worker processes, 0 = one per CPU
+    worker_processes: int = int(os.getenv("WORKER_PROCESSES", "0"))
+    worker_heartbeat_interval: float = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "5"))
+    worker_heartbeat_timeout: float = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "60"))  # restart a stalled worker
+    worker_shutdown_timeout: float = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "60"))  # then SIGKILL
+    worker_max_restart_delay: float = float(os.getenv("WORKER_MAX_RESTART_DELAY", "60"))
+    scheduler_tenant_weights: str = os.getenv("SCHEDULER_TENANT_WEIGHTS", "")  # e.g. "team-a=3,team-b=1"
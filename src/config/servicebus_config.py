@@ -7,5 +7,15 @@ class ServiceBusConfig:
     connection_str: str = os.getenv("SERVICEBUS_CONNECTION_STRING")
     request_queue: str = os.getenv("SERVICEBUS_REQUEST_QUEUE_NAME")
     response_queue: str = os.getenv("SERVICEBUS_RESPONSE_QUEUE_NAME")
+    prefetch_count: int = int(os.getenv("SERVICEBUS_PREFETCH_COUNT", "0"))
+    session_idle_timeout: float = float(os.getenv("SERVICEBUS_SESSION_IDLE_TIMEOUT", "30"))
+    session_concurrency: int = int(os.getenv("SERVICEBUS_SESSION_CONCURRENCY", "1"))
+    lock_renewal_duration: float = float(os.getenv("SERVICEBUS_LOCK_RENEWAL_DURATION", "604800"))
+    publish_max_batch: int = int(os.getenv("SERVICEBUS_PUBLISH_MAX_BATCH", "100"))
+    publish_max_delay: float = float(os.getenv("SERVICEBUS_PUBLISH_MAX_DELAY", "0.05"))
+    publish_max_retries: int = int(os.getenv("SERVICEBUS_PUBLISH_MAX_RETRIES", "3"))
+    publish_retry_backoff: float = float(os.getenv("SERVICEBUS_PUBLISH_RETRY_BACKOFF", "0.5"))
+    # responses use the request's content type; this one when it is unknown (application/json, application/msgpack)
+    content_type: str = os.getenv("SERVICEBUS_CONTENT_TYPE", "application/json")
 
     
@@ -1,4 +1,5 @@
 from src.dto.request_message import RequestMessage
 from src.dto.response_message import ResponseMessage
+from src.dto.result_manifest import ManifestFile, ResultManifest
 
-__all__ = ["RequestMessage", "ResponseMessage"]
+__all__ = ["RequestMessage", "ResponseMessage", "ManifestFile", "ResultManifest"]
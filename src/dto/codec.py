@@ -0,0 +1,74 @@
+"""Wire codec for messages exchanged with clients.
+
+The body format is chosen by the message ``content_type``: ``application/json``
+(orjson when installed, otherwise the standard library) or
+``application/msgpack``. Messages without a content type are JSON, as sent by
+existing clients. Every encoded message carries the wire version in ``v``;
+messages without it are version 0, which has the same fields.
+"""
+import json
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+from src.exceptions import MessageCodecError
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+CONTENT_TYPES = (JSON, MSGPACK)
+
+WIRE_VERSION = 1
+VERSION_FIELD = "v"
+
+_MSGPACK_ALIASES = {MSGPACK, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+def normalize(content_type: str | None) -> str:
+    """Supported content type for a message (JSON when absent or unknown)"""
+    if not content_type:
+        return JSON
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return MSGPACK if media_type in _MSGPACK_ALIASES else JSON
+
+
+def encode(data: dict, content_type: str | None = None) -> bytes:
+    """Serialize a message dict with the wire version"""
+    payload = {VERSION_FIELD: WIRE_VERSION, **data}
+    if normalize(content_type) == MSGPACK:
+        if msgpack is None:
+            raise MessageCodecError("msgpack is not installed")
+        return msgpack.packb(payload, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def decode(body: bytes, content_type: str | None = None) -> dict:
+    """Parse a message body straight from bytes and check its wire version"""
+    try:
+        if normalize(content_type) == MSGPACK:
+            if msgpack is None:
+                raise MessageCodecError("msgpack is not installed")
+            data = msgpack.unpackb(body, raw=False)
+        elif orjson is not None:
+            data = orjson.loads(body)
+        else:
+            data = json.loads(body)
+    except MessageCodecError:
+        raise
+    except Exception as e:
+        raise MessageCodecError(f"Invalid {normalize(content_type)} message: {str(e)}")
+
+    if not isinstance(data, dict):
+        raise MessageCodecError(f"Message must be an object, got {type(data).__name__}")
+    version = data.pop(VERSION_FIELD, 0)
+    if not isinstance(version, int) or version > WIRE_VERSION:
+        raise MessageCodecError(f"Unsupported message version: {version}")
+    return data
@@ -1,13 +1,20 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 import hashlib
 
-@dataclass
+from src.dto import codec
+
+
+@dataclass(slots=True)
 class RequestMessage:
     """Service Bus를 통해 전달되는 요청 메시지"""
     session_id: str
     command: str
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = field(default_factory=datetime.now)
+    request_id: str | None = None  # 세션 내 여러 메시지를 구분하는 id
+    progress: bool = False  # 실행 중 출력을 progress 메시지로 받을지 여부
+    priority: int = 0  # 높을수록 먼저 Batch로 전달
+    tenant: str | None = None  # fair-share 단위 (없으면 default tenant)
 
     @classmethod
     def from_dict(
@@ -18,6 +25,10 @@ class RequestMessage:
             session_id=data["session_id"],
             timestamp=datetime.fromisoformat(data["timestamp"]) if "timestamp" in data else datetime.now(),
             command=data["command"],
+            request_id=data.get("request_id"),
+            progress=bool(data.get("progress", False)),
+            priority=int(data.get("priority") or 0),
+            tenant=data.get("tenant"),
         )
 
     def to_dict(self) -> dict[str, str | int | None | datetime | dict[str, str | float | int], list[str]]:
@@ -26,8 +37,20 @@ class RequestMessage:
             "session_id": self.session_id,
             "timestamp": self.timestamp.isoformat(),
             "command": self.command,
+            "request_id": self.request_id,
+            "progress": self.progress,
+            "priority": self.priority,
+            "tenant": self.tenant,
         }
-    
+
+    @classmethod
+    def from_bytes(cls, body: bytes, content_type: str | None = None) -> "RequestMessage":
+        """메시지 body(bytes)에서 바로 RequestMessage 객체 생성"""
+        return cls.from_dict(codec.decode(body, content_type))
+
+    def to_bytes(self, content_type: str | None = None) -> bytes:
+        """content_type에 맞는 wire format으로 직렬화"""
+        return codec.encode(self.to_dict(), content_type)
 
     def __str__(self) -> str:
         """문자열 표현"""
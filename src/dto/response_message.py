@@ -1,15 +1,21 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 
+from src.dto import codec
 
-@dataclass
+
+@dataclass(slots=True)
 class ResponseMessage:
     """Batch 작업 결과 응답 메시지"""
     session_id: str
     result_paths: list[str]  # Blob storage의 결과 파일 경로
-    status: str = "completed"  # completed, error
+    status: str = "completed"  # completed, error, progress
     error_message: str | None = None
-    timestamp: datetime = datetime.now()
+    timestamp: datetime = field(default_factory=datetime.now)
+    request_id: str | None = None  # 응답이 어떤 요청에 대한 것인지
+    output: str | None = None  # progress 메시지: 새로 추가된 task 출력
+    offset: int | None = None  # progress 메시지: 지금까지 전달한 출력의 byte offset
+    manifest: dict | None = None  # 결과 파일 목록 (크기, sha256, 압축 방식)
 
     @classmethod
     def from_dict(cls, data: dict[str, str | None | datetime]) -> "ResponseMessage":
@@ -20,6 +26,10 @@ class ResponseMessage:
             status=data.get("status", "completed"),
             error_message=data.get("error_message"),
             timestamp=datetime.fromisoformat(data["timestamp"]) if "timestamp" in data else datetime.now(),
+            request_id=data.get("request_id"),
+            output=data.get("output"),
+            offset=data.get("offset"),
+            manifest=data.get("manifest"),
         )
 
     def to_dict(self) -> dict[str, str | None, datetime]:
@@ -30,8 +40,21 @@ class ResponseMessage:
             "status": self.status,
             "error_message": self.error_message,
             "timestamp": self.timestamp.isoformat(),
+            "request_id": self.request_id,
+            "output": self.output,
+            "offset": self.offset,
+            "manifest": self.manifest,
         }
 
+    @classmethod
+    def from_bytes(cls, body: bytes, content_type: str | None = None) -> "ResponseMessage":
+        """메시지 body(bytes)에서 바로 ResponseMessage 객체 생성"""
+        return cls.from_dict(codec.decode(body, content_type))
+
+    def to_bytes(self, content_type: str | None = None) -> bytes:
+        """content_type에 맞는 wire format으로 직렬화"""
+        return codec.encode(self.to_dict(), content_type)
+
     def __str__(self) -> str:
         """문자열 표현"""
         return f"ResponseMessage(session={self.session_id}, status={self.status}, path={self.result_paths})"
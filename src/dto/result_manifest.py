@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+
+# wrapper script가 command의 stdout/stderr를 쓰는 파일 (압축되면 .gz/.zst가 붙음)
+PRIMARY_FILE = "output.txt"
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+
+
+@dataclass(slots=True)
+class ManifestFile:
+    """Blob에 업로드된 결과 파일 하나"""
+    path: str  # base_url 기준 상대 경로 (압축된 경우 .gz/.zst 포함)
+    size: int | None = None  # 업로드된 파일 크기 (bytes)
+    sha256: str | None = None  # 업로드된 파일의 checksum
+    compression: str | None = None  # gzip, zstd 또는 None
+    original_size: int | None = None  # 압축 전 크기
+
+    @property
+    def original_path(self) -> str:
+        """압축 확장자를 뺀 결과 파일 경로"""
+        suffix = COMPRESSION_SUFFIXES.get(self.compression or "")
+        if suffix and self.path.endswith(suffix):
+            return self.path[:-len(suffix)]
+        return self.path
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ManifestFile":
+        """딕셔너리에서 ManifestFile 객체 생성"""
+        return cls(
+            path=data["path"],
+            size=data.get("size"),
+            sha256=data.get("sha256"),
+            compression=data.get("compression"),
+            original_size=data.get("original_size"),
+        )
+
+    def to_dict(self) -> dict[str, str | int | None]:
+        """ManifestFile 객체를 딕셔너리로 변환"""
+        return {
+            "path": self.path,
+            "size": self.size,
+            "sha256": self.sha256,
+            "compression": self.compression,
+            "original_size": self.original_size,
+        }
+
+
+@dataclass(slots=True)
+class ResultManifest:
+    """Batch task가 만든 결과 파일 목록"""
+    base_url: str  # 결과 파일이 업로드된 blob 경로
+    files: list[ManifestFile] = field(default_factory=list)
+    exit_code: int | None = None
+
+    @property
+    def paths(self) -> list[str]:
+        """모든 결과 파일의 blob URL"""
+        return [f"{self.base_url}/{file.path}" for file in self.files]
+
+    @property
+    def primary_path(self) -> str | None:
+        """대표 결과 경로 (stdout인 output.txt, 없으면 첫 파일)"""
+        for file in self.files:
+            if file.original_path == PRIMARY_FILE:
+                return f"{self.base_url}/{file.path}"
+        return self.paths[0] if self.files else None
+
+    @classmethod
+    def from_result_path(cls, result_path: str) -> "ResultManifest":
+        """manifest가 없는 기존 결과(output.txt 하나)를 manifest로 변환"""
+        base_url, _, name = result_path.rpartition("/")
+        return cls(base_url=base_url, files=[ManifestFile(path=name)])
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ResultManifest":
+        """딕셔너리에서 ResultManifest 객체 생성"""
+        return cls(
+            base_url=data["base_url"],
+            files=[ManifestFile.from_dict(file) for file in data.get("files", [])],
+            exit_code=data.get("exit_code"),
+        )
+
+    def to_dict(self) -> dict:
+        """ResultManifest 객체를 딕셔너리로 변환"""
+        return {
+            "base_url": self.base_url,
+            "files": [file.to_dict() for file in self.files],
+            "exit_code": self.exit_code,
+        }
+
+    def __str__(self) -> str:
+        """문자열 표현"""
+        return f"ResultManifest(base={self.base_url}, files={len(self.files)})"
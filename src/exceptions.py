@@ -16,4 +16,30 @@ class TaskExecutionError(BatchServiceError):
 
 class ResultNotFoundError(BatchServiceError):
     """Result not found in database"""
-    pass 
\ No newline at end of file
+    pass 
+
+class QuotaExceededError(BatchServiceError):
+    """A tenant has more requests queued than its quota allows"""
+    pass
+
+class LeaderFailedError(BatchServiceError):
+    """The node running an identical in-flight request failed it"""
+    pass
+
+class TransportError(Exception):
+    """Error raised by a message transport backend"""
+    def __init__(self, message: str = "", sent: int = 0):
+        super().__init__(message)
+        self.sent = sent  # number of leading messages delivered before a send failed
+
+class SessionNotAvailableError(TransportError):
+    """No session could be acquired within the wait time"""
+    pass
+
+class MessageTooLargeError(TransportError):
+    """A single message exceeds the transport's batch size limit (``sent``: messages sent before it)"""
+    pass
+
+class MessageCodecError(Exception):
+    """A message body could not be encoded or decoded"""
+    pass
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, DateTime, Enum
+from sqlalchemy import Column, String, DateTime, Enum, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -19,6 +20,7 @@ class Result(Base):
 
     result_id = Column(String, primary_key=True)
     result_path = Column(String, nullable=True)  # 초기에는 NULL 가능
+    manifest = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)  # 결과 파일 목록 (ResultManifest)
     status = Column(
         Enum(ResultStatus, name='resultstatus', create_constraint=True, native_enum=True),  # PostgreSQL enum 사용
         default=ResultStatus.PENDING,
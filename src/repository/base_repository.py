@@ -1,22 +1,47 @@
 from typing import TypeVar, Generic, Type
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, Table
+from sqlalchemy.dialects import postgresql, sqlite
 from src.models.base import Base
 
 ModelType = TypeVar("ModelType", bound=Base)
 
+
+def dialect_insert(session: AsyncSession, table: Table | Type[Base]):
+    """ON CONFLICT를 지원하는 dialect별 insert 문 생성"""
+    if session.bind.dialect.name == "sqlite":
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
 class BaseRepository(Generic[ModelType]):
-    def __init__(self, model: Type[ModelType], session: AsyncSession):
+    def __init__(self, model: Type[ModelType], session: AsyncSession, autocommit: bool = True):
         self.model = model
         self.session = session  # SQLAlchemy의 데이터베이스 연결 세션
+        self.autocommit = autocommit  # False면 UnitOfWork가 commit 담당
 
     async def create(self, **kwargs) -> ModelType:
         instance = self.model(**kwargs)
         self.session.add(instance)
-        await self.session.commit()
+        if self.autocommit:
+            await self.session.commit()
+        else:
+            await self.session.flush()
         return instance
     
-    async def update(self, **kwargs) -> ModelType:
+    async def upsert(self, **kwargs) -> None:
+        """INSERT ... ON CONFLICT (pk) DO UPDATE"""
+        pk_name = self.model.__mapper__.primary_key[0].name
+        stmt = dialect_insert(self.session, self.model).values(**kwargs)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[pk_name],
+            set_={k: v for k, v in kwargs.items() if k != pk_name},
+        )
+        await self.session.execute(stmt)
+        if self.autocommit:
+            await self.session.commit()
+
+    async def update(self, returning: bool = False, **kwargs) -> ModelType | None:
         # Get primary key from kwargs
         pk_name = self.model.__mapper__.primary_key[0].name
         pk_value = kwargs.pop(pk_name)
@@ -29,10 +54,13 @@ class BaseRepository(Generic[ModelType]):
         )
         
         await self.session.execute(stmt)
-        await self.session.commit()
+        if self.autocommit:
+            await self.session.commit()
         
-        # Return updated instance
-        return await self.get(**{pk_name: pk_value})
+        # Read back the updated instance only when asked for
+        if returning:
+            return await self.get(**{pk_name: pk_value})
+        return None
 
     async def get(self, **kwargs) -> ModelType | None:
         stmt = select(self.model).filter_by(**kwargs)
@@ -42,4 +70,4 @@ class BaseRepository(Generic[ModelType]):
     async def get_all(self, **kwargs) -> list[ModelType]:
         stmt = select(self.model).filter_by(**kwargs)
         result = await self.session.execute(stmt)
-        return list(result.scalars().all()) 
\ No newline at end of file
+        return list(result.scalars().all()) 
@@ -0,0 +1,41 @@
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from src.config.psql_config import PSQLConfig
+
+_engine: AsyncEngine | None = None
+_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+def get_engine() -> AsyncEngine:
+    """Process-wide engine shared by every repository"""
+    global _engine
+    if _engine is None:
+        _engine = create_async_engine(
+            f"postgresql+asyncpg://{PSQLConfig.user}:{PSQLConfig.password}@"
+            f"{PSQLConfig.host}:{PSQLConfig.port}/{PSQLConfig.database}"
+            f"?prepared_statement_cache_size={PSQLConfig.statement_cache_size}",
+            pool_size=PSQLConfig.pool_size,
+            max_overflow=PSQLConfig.max_overflow,
+            pool_timeout=PSQLConfig.pool_timeout,
+            pool_recycle=PSQLConfig.pool_recycle,
+            pool_pre_ping=PSQLConfig.pool_pre_ping,
+            connect_args={"statement_cache_size": PSQLConfig.statement_cache_size},
+        )
+    return _engine
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory bound to the shared engine"""
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = async_sessionmaker(get_engine(), class_=AsyncSession, expire_on_commit=False)
+    return _session_factory
+
+
+async def dispose_engine() -> None:
+    """Close all pooled connections of the shared engine"""
+    global _engine, _session_factory
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _session_factory = None
@@ -1,43 +1,225 @@
 from redis import asyncio as aioredis
 import json
+import time
 from typing import Dict, Optional
 import logging
 
 from src.config.redis_config import RedisConfig
+from src.utils.node import get_node_id
+
+# 소유자가 일치할 때만 lease 연장/해제
+RENEW_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+# lease가 만료된 작업만 원자적으로 가져감 (작업 키가 없으면 heartbeat에서 제거), 작업 hash 전체 반환
+CLAIM_TASK_SCRIPT = """
+local score = redis.call('zscore', KEYS[1], ARGV[1])
+if not score or tonumber(score) > tonumber(ARGV[2]) then
+    return false
+end
+if redis.call('hexists', KEYS[2], 'state') == 0 then
+    redis.call('zrem', KEYS[1], ARGV[1])
+    return false
+end
+redis.call('zadd', KEYS[1], ARGV[3], ARGV[1])
+redis.call('hset', KEYS[2], 'owner', ARGV[4])
+return redis.call('hgetall', KEYS[2])
+"""
+# 소유자가 일치하는 작업만 lease 만료 시각을 변경 (연장 또는 0으로 넘김), 소유권을 잃은 작업 id 반환
+# KEYS: heartbeat, task:{id}...  ARGV: owner, score, id...
+SET_OWNED_LEASES_SCRIPT = """
+local lost = {}
+for i = 2, #KEYS do
+    local task_id = ARGV[i + 1]
+    if redis.call('hget', KEYS[i], 'owner') == ARGV[1] and redis.call('zscore', KEYS[1], task_id) then
+        redis.call('zadd', KEYS[1], ARGV[2], task_id)
+    else
+        table.insert(lost, task_id)
+    end
+end
+return lost
+"""
+# 소유자가 일치할 때만 작업 상태 삭제
+REMOVE_TASK_SCRIPT = """
+if redis.call('hget', KEYS[2], 'owner') ~= ARGV[2] then
+    return 0
+end
+redis.call('del', KEYS[2])
+redis.call('zrem', KEYS[1], ARGV[1])
+return 1
+"""
+# 소유자가 일치할 때만 checkpoint 필드 기록 (ARGV: owner, field, value, ...)
+UPDATE_TASK_SCRIPT = """
+if redis.call('hget', KEYS[1], 'owner') ~= ARGV[1] then
+    return 0
+end
+redis.call('hset', KEYS[1], unpack(ARGV, 2))
+return 1
+"""
+
+LEGACY_TASKS_KEY = "active_tasks"
+HEARTBEAT_KEY = "tasks:heartbeat"
+TASK_KEY_PREFIX = "task:"
+TASK_RUNTIMES_KEY = "tasks:runtimes"
+TASK_RUNTIME_SAMPLES = 200
+# update_task_state로 기록한 필드 (state JSON과 별도의 hash 필드라서 동시에 써도 서로 덮어쓰지 않음)
+TASK_FIELD_PREFIX = "field:"
 
 
 class RedisConnector:
-    def __init__(self):
-        self.redis = aioredis.Redis(
-            host=RedisConfig.host, 
+    """작업 상태 저장소
+
+    작업마다 `task:{id}` hash(state, owner, field:*)를 두고, `tasks:heartbeat` sorted set에
+    lease 만료 시각을 score로 기록한다. 각 노드는 owner가 자신인 작업만 heartbeat로
+    연장/삭제하고(다른 노드가 가져간 작업은 owned_tasks에서 제외), 복구 시에는 만료된
+    lease만 조회해서 가져간다.
+    """
+
+    def __init__(self, client: aioredis.Redis | None = None):
+        self.redis = client or aioredis.Redis(
+            host=RedisConfig.host,
             port=RedisConfig.port,
             password=RedisConfig.password,
             decode_responses=True,
             ssl=False
         )
+        self.node_id = get_node_id()
+        self.lease_ttl = RedisConfig.lease_ttl
+        self.owned_tasks: set[str] = set()
+        self._renew_lease = self.redis.register_script(RENEW_LEASE_SCRIPT)
+        self._release_lease = self.redis.register_script(RELEASE_LEASE_SCRIPT)
+        self._claim_task = self.redis.register_script(CLAIM_TASK_SCRIPT)
+        self._set_owned_leases = self.redis.register_script(SET_OWNED_LEASES_SCRIPT)
+        self._remove_task = self.redis.register_script(REMOVE_TASK_SCRIPT)
+        self._update_task = self.redis.register_script(UPDATE_TASK_SCRIPT)
+
+    @staticmethod
+    def _task_key(task_id: str) -> str:
+        return f"{TASK_KEY_PREFIX}{task_id}"
+
+    @staticmethod
+    def _decode_state(fields: dict) -> Optional[Dict]:
+        """작업 hash -> 상태 dict (update_task_state로 기록한 필드를 state 위에 병합)"""
+        if not fields or not fields.get("state"):
+            return None
+        state = json.loads(fields["state"])
+        for key, value in fields.items():
+            if key.startswith(TASK_FIELD_PREFIX):
+                state[key[len(TASK_FIELD_PREFIX):]] = json.loads(value)
+        return state
+
     async def save_task_state(self, task_id: str, state: dict):
-        """작업 상태를 Redis에 저장"""
+        """작업 상태를 Redis에 저장하고 lease 획득"""
         try:
-            await self.redis.hset(
-                "active_tasks",
-                task_id,
-                json.dumps(state)
-            )
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(self._task_key(task_id), mapping={"state": json.dumps(state), "owner": self.node_id})
+                pipe.zadd(HEARTBEAT_KEY, {task_id: time.time() + self.lease_ttl})
+                await pipe.execute()
+            self.owned_tasks.add(task_id)
         except Exception as e:
             logging.error(f"Redis save error: {e}")
             raise
 
-    async def remove_task_state(self, task_id: str):
-        """완료된 작업 상태를 Redis에서 제거"""
-        await self.redis.hdel("active_tasks", task_id)
+    async def update_task_state(self, task_id: str, fields: dict) -> bool:
+        """작업 상태에 checkpoint 정보(result_id, job_id, task_id 등) 병합 (소유한 작업만)"""
+        args = [self.node_id]
+        for key, value in fields.items():
+            args += [f"{TASK_FIELD_PREFIX}{key}", json.dumps(value)]
+        updated = bool(await self._update_task(keys=[self._task_key(task_id)], args=args))
+        if not updated:
+            logging.warning(f"Task {task_id} is no longer owned by this node, checkpoint not saved")
+            self.owned_tasks.discard(task_id)
+        return updated
+
+    async def remove_task_state(self, task_id: str) -> bool:
+        """완료된 작업 상태를 Redis에서 제거 (다른 노드가 가져간 작업은 그대로 둠)"""
+        removed = bool(
+            await self._remove_task(keys=[HEARTBEAT_KEY, self._task_key(task_id)], args=[task_id, self.node_id])
+        )
+        if not removed:
+            logging.warning(f"Task {task_id} is no longer owned by this node, state left in place")
+        self.owned_tasks.discard(task_id)
+        return removed
+
+    async def _set_leases(self, task_ids: list[str], score: float) -> list[str]:
+        """소유한 작업의 lease score 변경, 소유권을 잃은 작업 id 반환"""
+        lost = await self._set_owned_leases(
+            keys=[HEARTBEAT_KEY, *(self._task_key(task_id) for task_id in task_ids)],
+            args=[self.node_id, score, *task_ids],
+        )
+        if lost:
+            logging.warning(f"Tasks claimed by another node, no longer renewed here: {lost}")
+        return lost
+
+    async def heartbeat(self) -> int:
+        """소유한 모든 작업의 lease 연장 (다른 노드가 가져간 작업은 owned_tasks에서 제외)"""
+        task_ids = list(self.owned_tasks)
+        if not task_ids:
+            return 0
+        lost = await self._set_leases(task_ids, time.time() + self.lease_ttl)
+        self.owned_tasks.difference_update(lost)
+        return len(task_ids) - len(lost)
+
+    async def release_tasks(self) -> int:
+        """소유한 작업의 lease를 즉시 만료시켜 다른 노드가 바로 복구하도록 넘김 (종료 시 사용)"""
+        task_ids, self.owned_tasks = list(self.owned_tasks), set()
+        if not task_ids:
+            return 0
+        lost = await self._set_leases(task_ids, 0)
+        return len(task_ids) - len(lost)
+
+    async def claim_expired_tasks(self, limit: int = 100) -> Dict:
+        """lease가 만료된 작업을 최대 limit개 가져옴"""
+        try:
+            now = time.time()
+            task_ids = await self.redis.zrangebyscore(HEARTBEAT_KEY, "-inf", now, start=0, num=limit)
+            claimed = {}
+            for task_id in task_ids:
+                fields = await self._claim_task(
+                    keys=[HEARTBEAT_KEY, self._task_key(task_id)],
+                    args=[task_id, now, now + self.lease_ttl, self.node_id],
+                )
+                if fields:
+                    claimed[task_id] = self._decode_state(dict(zip(fields[::2], fields[1::2])))
+                    self.owned_tasks.add(task_id)
+            return claimed
+        except Exception as e:
+            logging.error(f"Redis claim error: {e}")
+            raise
+
+    async def migrate_legacy_tasks(self) -> int:
+        """기존 active_tasks hash의 작업을 만료된 lease 상태로 옮김"""
+        migrated = 0
+        async for task_id, state in self.redis.hscan_iter(LEGACY_TASKS_KEY):
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(self._task_key(task_id), mapping={"state": state, "owner": ""})
+                pipe.zadd(HEARTBEAT_KEY, {task_id: 0}, nx=True)
+                pipe.hdel(LEGACY_TASKS_KEY, task_id)
+                await pipe.execute()
+            migrated += 1
+        return migrated
 
     async def get_all_tasks(self) -> Dict:
-        """모든 활성 작업 상태 조회"""
+        """모든 활성 작업 상태 조회 (관리/디버깅용)"""
         try:
-            tasks = await self.redis.hgetall("active_tasks")
+            task_ids = [task_id async for task_id, _ in self.redis.zscan_iter(HEARTBEAT_KEY)]
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for task_id in task_ids:
+                    pipe.hgetall(self._task_key(task_id))
+                states = [self._decode_state(fields) for fields in await pipe.execute()]
             return {
-                task_id: json.loads(state)
-                for task_id, state in tasks.items()
+                task_id: state
+                for task_id, state in zip(task_ids, states)
+                if state
             }
         except Exception as e:
             logging.error(f"Redis get error: {e}")
@@ -45,8 +227,46 @@ class RedisConnector:
 
     async def get_task_state(self, task_id: str) -> Optional[Dict]:
         """특정 작업의 상태 조회"""
-        state = await self.redis.hget("active_tasks", task_id)
-        return json.loads(state) if state else None
+        return self._decode_state(await self.redis.hgetall(self._task_key(task_id)))
+
+    async def count_tasks(self) -> int:
+        """활성 작업 수"""
+        return await self.redis.zcard(HEARTBEAT_KEY)
+
+    async def record_task_runtime(self, seconds: float) -> None:
+        """완료된 Batch task의 실행 시간 기록 (최근 TASK_RUNTIME_SAMPLES개만 유지)"""
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.lpush(TASK_RUNTIMES_KEY, f"{seconds:.3f}")
+            pipe.ltrim(TASK_RUNTIMES_KEY, 0, TASK_RUNTIME_SAMPLES - 1)
+            await pipe.execute()
+
+    async def recent_task_runtimes(self) -> list[float]:
+        """최근 Batch task 실행 시간 (전체 노드 기준, 최신순)"""
+        return [float(value) for value in await self.redis.lrange(TASK_RUNTIMES_KEY, 0, -1)]
+
+    async def acquire_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """lease 획득 (이미 다른 소유자가 있으면 False)"""
+        return bool(await self.redis.set(key, owner, nx=True, px=int(ttl * 1000)))
+
+    async def renew_lease(self, key: str, owner: str, ttl: float) -> bool:
+        """보유 중인 lease 연장"""
+        return bool(await self._renew_lease(keys=[key], args=[owner, int(ttl * 1000)]))
+
+    async def release_lease(self, key: str, owner: str) -> bool:
+        """보유 중인 lease 해제"""
+        return bool(await self._release_lease(keys=[key], args=[owner]))
+
+    async def get_lease_owner(self, key: str) -> Optional[str]:
+        """lease 소유자 조회"""
+        return await self.redis.get(key)
+
+    async def set_marker(self, key: str, value: str, ttl: float) -> None:
+        """ttl 후 사라지는 marker 저장"""
+        await self.redis.set(key, value, px=int(ttl * 1000))
+
+    async def get_marker(self, key: str) -> Optional[str]:
+        """marker 조회 (없거나 만료되면 None)"""
+        return await self.redis.get(key)
 
     async def flush_all(self):
         """모든 데이터 삭제 (테스트용)"""
@@ -54,4 +274,4 @@ class RedisConnector:
 
     async def close(self):
         """Redis 연결 종료"""
-        await self.redis.close() 
\ No newline at end of file
+        await self.redis.close()
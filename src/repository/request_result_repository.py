@@ -1,29 +1,26 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from datetime import datetime
 
-from src.config.psql_config import PSQLConfig
 from src.models.request_result import request_result
-from src.repository.base_repository import BaseRepository
+from src.repository.base_repository import BaseRepository, dialect_insert
+from src.repository.database import get_session_factory
+from src.utils.metrics import db_call
+from src.utils.tracing import traced
 
 class RequestResultRepository:
-    def __init__(self):
-        self.engine = create_async_engine(
-            f"postgresql+asyncpg://{PSQLConfig.user}:{PSQLConfig.password}@"
-            f"{PSQLConfig.host}:{PSQLConfig.port}/{PSQLConfig.database}"
-        )
-        self.async_session = sessionmaker(
-            self.engine, class_=AsyncSession, expire_on_commit=False
-        )
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] | None = None):
+        self.async_session = session_factory or get_session_factory()
 
+    @db_call
+    @traced()
     async def create_relation(self, request_id: str, result_id: str) -> None:
         """Create relation between request and result"""
         async with self.async_session() as session:
             await session.execute(
-                request_result.insert().values(
+                dialect_insert(session, request_result).values(
                     request_id=request_id,
                     result_id=result_id,
                     created_at=datetime.now()
-                )
+                ).on_conflict_do_nothing()
             )
             await session.commit() 
\ No newline at end of file
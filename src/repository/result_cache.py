@@ -0,0 +1,130 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+
+from src.config.redis_config import RedisConfig
+from src.models.result import Result, ResultStatus
+from src.repository.redis_repository import RedisConnector
+from src.utils.metrics import RESULT_CACHE_LOOKUPS_TOTAL
+
+
+class ResultCache:
+    """Two-level cache of COMPLETED results: in-process LRU backed by Redis.
+
+    Only final (COMPLETED) results are cached positively. Unknown result ids are
+    cached as misses for a short ``negative_ttl`` so repeated lookups of a new
+    command do not hit the database either. Redis failures fall back to the
+    database instead of failing the request.
+    """
+
+    def __init__(
+        self,
+        redis: RedisConnector | None = None,
+        max_entries: int | None = None,
+        ttl: float | None = None,
+        negative_ttl: float | None = None,
+        prefix: str = "result:",
+    ):
+        self.redis = redis
+        self.max_entries = max_entries or RedisConfig.result_cache_size
+        self.ttl = ttl or RedisConfig.result_cache_ttl
+        self.negative_ttl = negative_ttl or RedisConfig.result_cache_negative_ttl
+        self.prefix = prefix
+        self._local: OrderedDict[str, tuple[float, dict | None]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, result_id: str) -> tuple[bool, Result | None]:
+        """Return (hit, result); a hit with None result is a cached miss"""
+        entry = self._local.get(result_id)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(result_id)
+                self._count(hit=True)
+                return True, self._to_result(payload)
+            del self._local[result_id]
+
+        if self.redis is not None:
+            try:
+                raw = await self.redis.redis.get(f"{self.prefix}{result_id}")
+            except Exception as e:
+                logging.warning(f"Result cache read failed: {str(e)}")
+                raw = None
+            if raw is not None:
+                payload = json.loads(raw)
+                if payload.get("missing"):
+                    self._store_local(result_id, None, self.negative_ttl)
+                    self._count(hit=True)
+                    return True, None
+                self._store_local(result_id, payload, self.ttl)
+                self._count(hit=True)
+                return True, self._to_result(payload)
+
+        self._count(hit=False)
+        return False, None
+
+    def _count(self, hit: bool) -> None:
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        RESULT_CACHE_LOOKUPS_TOTAL.inc(outcome="hit" if hit else "miss")
+
+    def hit_ratio(self) -> float:
+        """Share of lookups answered without the database"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    async def set(self, result: Result) -> None:
+        """Cache a COMPLETED result (other states are never cached)"""
+        if result.status != ResultStatus.COMPLETED:
+            return
+        payload = {
+            "result_id": result.result_id,
+            "result_path": result.result_path,
+            "manifest": result.manifest,
+            "status": result.status.value,
+        }
+        self._store_local(result.result_id, payload, self.ttl)
+        await self._store_remote(result.result_id, payload, self.ttl)
+
+    async def set_missing(self, result_id: str) -> None:
+        """Negative-cache an unknown result id"""
+        self._store_local(result_id, None, self.negative_ttl)
+        await self._store_remote(result_id, {"missing": True}, self.negative_ttl)
+
+    async def invalidate(self, result_id: str) -> None:
+        """Drop a result from both levels (called on status transitions)"""
+        self._local.pop(result_id, None)
+        if self.redis is not None:
+            try:
+                await self.redis.redis.delete(f"{self.prefix}{result_id}")
+            except Exception as e:
+                logging.warning(f"Result cache invalidation failed: {str(e)}")
+
+    def _store_local(self, result_id: str, payload: dict | None, ttl: float) -> None:
+        self._local[result_id] = (time.monotonic() + ttl, payload)
+        self._local.move_to_end(result_id)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _store_remote(self, result_id: str, payload: dict, ttl: float) -> None:
+        if self.redis is None:
+            return
+        try:
+            await self.redis.redis.set(f"{self.prefix}{result_id}", json.dumps(payload), px=int(ttl * 1000))
+        except Exception as e:
+            logging.warning(f"Result cache write failed: {str(e)}")
+
+    @staticmethod
+    def _to_result(payload: dict | None) -> Result | None:
+        if payload is None:
+            return None
+        return Result(
+            result_id=payload["result_id"],
+            result_path=payload["result_path"],
+            manifest=payload.get("manifest"),
+            status=ResultStatus(payload["status"]),
+        )
@@ -1,20 +1,23 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from src.config.psql_config import PSQLConfig
 from src.models.result import Result, ResultStatus
 from src.repository.base_repository import BaseRepository
+from src.repository.database import get_session_factory
+from src.repository.result_cache import ResultCache
+from src.utils.metrics import DB_CALL_SECONDS, db_call
+from src.utils.tracing import traced
 
 class ResultRepository:
-    def __init__(self):
-        self.engine = create_async_engine(
-            f"postgresql+asyncpg://{PSQLConfig.user}:{PSQLConfig.password}@"
-            f"{PSQLConfig.host}:{PSQLConfig.port}/{PSQLConfig.database}"
-        )
-        self.async_session = sessionmaker(
-            self.engine, class_=AsyncSession, expire_on_commit=False
-        )
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        cache: ResultCache | None = None,
+    ):
+        self.async_session = session_factory or get_session_factory()
+        self.cache = cache
 
+    @db_call
+    @traced()
     async def create_result(self, result_id: str) -> None:
         """Save result to database"""
         async with self.async_session() as session:
@@ -23,31 +26,56 @@ class ResultRepository:
                 result_id=result_id,
                 status=ResultStatus.PENDING
             )
+        await self.invalidate(result_id)
     
+    @db_call
+    @traced()
     async def update_status(self, result_id: str, status: ResultStatus) -> None:
         """Update result status"""
         async with self.async_session() as session:
             repo = BaseRepository(Result, session)
             await repo.update(result_id=result_id, status=status)
+        await self.invalidate(result_id)
     
+    @db_call
+    @traced()
     async def update_result_path(self, result_id: str, result_path: str) -> None:
         """Update result path"""
         async with self.async_session() as session:
             repo = BaseRepository(Result, session)
             await repo.update(result_id=result_id, result_path=result_path)
+        await self.invalidate(result_id)
 
-    async def get_result(self, result_id: str) -> Result | None:
-        """Get result by result_id"""
-        async with self.async_session() as session:
-            repo = BaseRepository(Result, session)
-            return await repo.get(result_id=result_id)
+    @traced()
+    async def get_result(self, result_id: str, use_cache: bool = True) -> Result | None:
+        """Get result by result_id (served from cache when possible)"""
+        if self.cache is not None and use_cache:
+            hit, cached = await self.cache.get(result_id)
+            if hit:
+                return cached
+
+        # only the database fallback counts as a DB call
+        with DB_CALL_SECONDS.time(repository="ResultRepository", method="get_result"):
+            async with self.async_session() as session:
+                repo = BaseRepository(Result, session)
+                result = await repo.get(result_id=result_id)
 
+        if self.cache is not None:
+            if result is None:
+                await self.cache.set_missing(result_id)
+            else:
+                await self.cache.set(result)
+        return result
+
+    async def invalidate(self, result_id: str) -> None:
+        """Drop cached state after a status transition"""
+        if self.cache is not None:
+            await self.cache.invalidate(result_id)
+
+    @db_call
+    @traced()
     async def get_results_by_session(self, session_id: str) -> list[Result]:
         """Get all results for a session"""
         async with self.async_session() as session:
             repo = BaseRepository(Result, session)
             return await repo.get_all(session_id=session_id)
-
-    async def disconnect(self):
-        """Close the database connection"""
-        await self.engine.dispose()
@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.models.request import Request
+from src.models.request_result import request_result
+from src.models.result import Result
+from src.repository.base_repository import BaseRepository, dialect_insert
+from src.repository.database import get_session_factory
+from src.utils.metrics import DB_CALL_SECONDS
+from src.utils.tracing import start_span
+
+
+class UnitOfWork:
+    """Groups several repository writes into one transaction.
+
+    Usage::
+
+        async with UnitOfWork() as uow:
+            await uow.results.create(result_id=result_id)
+            await uow.create_relation(request_id, result_id)
+
+    The transaction commits when the block exits normally and rolls back on error.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession] | None = None):
+        self.session_factory = session_factory or get_session_factory()
+        self.session: AsyncSession | None = None
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session = self.session_factory()
+        self.requests = BaseRepository(Request, self.session, autocommit=False)
+        self.results = BaseRepository(Result, self.session, autocommit=False)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        try:
+            if exc_type is None:
+                with DB_CALL_SECONDS.time(repository="UnitOfWork", method="commit"), start_span("UnitOfWork.commit"):
+                    await self.session.commit()
+            else:
+                await self.session.rollback()
+        finally:
+            await self.session.close()
+
+    async def create_relation(self, request_id: str, result_id: str) -> None:
+        """Create relation between request and result (no-op if it already exists)"""
+        await self.session.execute(
+            dialect_insert(self.session, request_result).values(
+                request_id=request_id,
+                result_id=result_id,
+                created_at=datetime.now()
+            ).on_conflict_do_nothing()
+        )
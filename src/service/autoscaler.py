@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import timedelta
+
+from azure.batch.models import AllocationState, ComputeNodeDeallocationOption, PoolResizeParameter
+
+from src.config.batch_config import BatchConfig
+from src.config.servicebus_config import ServiceBusConfig
+from src.repository.redis_repository import RedisConnector
+from src.service.batch_client import AsyncBatchClient
+from src.transport import Transport
+from src.utils.metrics import AUTOSCALE_TARGET_NODES
+from src.utils.node import get_node_id
+
+LEADER_KEY_PREFIX = "lease:autoscaler:"
+# evaluation interval of the fixed formula written to pools with Batch autoscaling enabled
+FORMULA_EVALUATION_INTERVAL = timedelta(minutes=5)
+
+
+@dataclass
+class PoolTarget:
+    dedicated: int
+    low_priority: int
+
+    @property
+    def nodes(self) -> int:
+        return self.dedicated + self.low_priority
+
+
+@dataclass
+class ScalingInputs:
+    queue_depth: int  # requests waiting in the broker
+    in_flight: int  # requests admitted by any node and not finished (Redis task states)
+    runtime: float  # mean recent task runtime in seconds
+    slots_per_node: int
+
+
+class PoolAutoscaler:
+    """Resizes the Batch pool from the request backlog.
+
+    The target is the number of task slots needed to work through the queued
+    and in-flight requests within ``drain_seconds`` at the recent mean task
+    runtime (never fewer slots than requests in flight, never more than
+    requests), rounded up to nodes and clamped to ``[min_nodes, max_nodes]``.
+    ``low_priority_ratio`` of the nodes are requested as low-priority nodes.
+
+    Growing applies at once, shrinking uses the largest target seen during
+    ``scale_down_window`` so a short lull does not release nodes. Changes
+    within ``tolerance`` of the current size are ignored and resizes are at
+    least ``cooldown`` seconds apart. Only the node holding the Redis leader
+    lease evaluates; the pool is resized with ``taskCompletion`` deallocation,
+    or through a fixed autoscale formula when Batch autoscaling is enabled on
+    the pool.
+    """
+
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient,
+        redis: RedisConnector,
+        transport: Transport,
+        pool_id: str | None = None,
+        queue_name: str | None = None,
+        interval: float | None = None,
+        min_nodes: int | None = None,
+        max_nodes: int | None = None,
+        low_priority_ratio: float | None = None,
+        drain_seconds: float | None = None,
+        default_runtime: float | None = None,
+        cooldown: float | None = None,
+        scale_down_window: float | None = None,
+        tolerance: float | None = None,
+    ):
+        self.batch_client = batch_client
+        self.redis = redis
+        self.transport = transport
+        self.pool_id = pool_id or BatchConfig.pool_id
+        self.queue_name = queue_name or ServiceBusConfig.request_queue
+        self.interval = interval or BatchConfig.autoscale_interval
+        self.min_nodes = max(0, min_nodes if min_nodes is not None else BatchConfig.autoscale_min_nodes)
+        self.max_nodes = max(self.min_nodes, max_nodes if max_nodes is not None else BatchConfig.autoscale_max_nodes)
+        ratio = low_priority_ratio if low_priority_ratio is not None else BatchConfig.autoscale_low_priority_ratio
+        self.low_priority_ratio = min(1.0, max(0.0, ratio))
+        self.drain_seconds = max(1.0, drain_seconds or BatchConfig.autoscale_drain_seconds)
+        self.default_runtime = default_runtime or BatchConfig.autoscale_default_runtime
+        self.cooldown = cooldown if cooldown is not None else BatchConfig.autoscale_cooldown
+        self.scale_down_window = (
+            scale_down_window if scale_down_window is not None else BatchConfig.autoscale_scale_down_window
+        )
+        self.tolerance = tolerance if tolerance is not None else BatchConfig.autoscale_tolerance
+        self.owner = get_node_id()
+        self.leader_key = f"{LEADER_KEY_PREFIX}{self.pool_id}"
+        self.is_leader = False
+        self.leader_since: float | None = None
+        self.last_resize: float | None = None
+        self.history: deque[tuple[float, int]] = deque()  # (time, computed node count)
+        self._runner: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+        if self.is_leader:
+            await self.redis.release_lease(self.leader_key, self.owner)
+            self.is_leader = False
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if await self._hold_leadership():
+                    await self.evaluate()
+            except Exception as e:
+                logging.error(f"Pool autoscaling failed: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    async def _hold_leadership(self) -> bool:
+        ttl = self.interval * 3
+        if self.is_leader:
+            self.is_leader = await self.redis.renew_lease(self.leader_key, self.owner, ttl)
+        else:
+            self.is_leader = await self.redis.acquire_lease(self.leader_key, self.owner, ttl)
+            if self.is_leader:
+                logging.info(f"Autoscaler leader for pool {self.pool_id}: {self.owner}")
+                self.leader_since = time.monotonic()
+                self.history.clear()
+        return self.is_leader
+
+    async def evaluate(self, now: float | None = None) -> PoolTarget | None:
+        """Compute the target from the current inputs and resize the pool if needed; returns the applied target"""
+        pool = await self.batch_client.get_pool(
+            self.pool_id,
+            select="id,allocationState,enableAutoScale,taskSlotsPerNode,targetDedicatedNodes,targetLowPriorityNodes",
+        )
+        inputs = await self.inputs(pool.task_slots_per_node or 1)
+        target = self.compute_target(inputs)
+        AUTOSCALE_TARGET_NODES.set(target.nodes)
+        current = PoolTarget(pool.target_dedicated_nodes or 0, pool.target_low_priority_nodes or 0)
+        now = time.monotonic() if now is None else now
+        decision = self.decide(current, target, now)
+        if decision is None:
+            return None
+        if pool.allocation_state is not None and pool.allocation_state != AllocationState.steady:
+            logging.info(f"Pool {self.pool_id} is {pool.allocation_state}, postponing resize to {decision}")
+            return None
+        await self.apply(decision, autoscale_formula=bool(pool.enable_auto_scale))
+        self.last_resize = now
+        logging.info(f"Resized pool {self.pool_id}: {current} -> {decision} ({inputs})")
+        return decision
+
+    async def inputs(self, slots_per_node: int) -> ScalingInputs:
+        queue_depth, in_flight, runtimes = await asyncio.gather(
+            self.transport.queue_depth(self.queue_name),
+            self.redis.count_tasks(),
+            self.redis.recent_task_runtimes(),
+        )
+        return ScalingInputs(
+            queue_depth=queue_depth or 0,
+            in_flight=in_flight,
+            runtime=sum(runtimes) / len(runtimes) if runtimes else self.default_runtime,
+            slots_per_node=slots_per_node,
+        )
+
+    def compute_target(self, inputs: ScalingInputs) -> PoolTarget:
+        tasks = inputs.queue_depth + inputs.in_flight
+        slots = math.ceil(tasks * inputs.runtime / self.drain_seconds)
+        slots = min(tasks, max(inputs.in_flight, slots))
+        nodes = math.ceil(slots / max(1, inputs.slots_per_node))
+        return self._split(min(self.max_nodes, max(self.min_nodes, nodes)))
+
+    def decide(self, current: PoolTarget, target: PoolTarget, now: float) -> PoolTarget | None:
+        """Apply cooldown and hysteresis; returns the target to resize to or None"""
+        self.history.append((now, target.nodes))
+        while self.history and self.history[0][0] < now - self.scale_down_window:
+            self.history.popleft()
+
+        if self.last_resize is not None and now - self.last_resize < self.cooldown:
+            return None
+        if target.nodes < current.nodes:
+            if self.leader_since is not None and now - self.leader_since < self.scale_down_window:
+                # a new leader has not seen the recent peaks yet
+                return None
+            peak = max(nodes for _, nodes in self.history)
+            if peak >= current.nodes:
+                return None
+            target = self._split(peak)
+        if target == current:
+            return None
+        if abs(target.nodes - current.nodes) <= current.nodes * self.tolerance:
+            return None
+        return target
+
+    def _split(self, nodes: int) -> PoolTarget:
+        low_priority = math.floor(nodes * self.low_priority_ratio)
+        return PoolTarget(dedicated=nodes - low_priority, low_priority=low_priority)
+
+    async def apply(self, target: PoolTarget, autoscale_formula: bool = False) -> None:
+        if autoscale_formula:
+            # resize is rejected while Batch autoscaling is on: pin the target through the formula instead
+            formula = (
+                f"$TargetDedicatedNodes = {target.dedicated};\n"
+                f"$TargetLowPriorityNodes = {target.low_priority};\n"
+                "$NodeDeallocationOption = taskcompletion;"
+            )
+            await self.batch_client.enable_pool_autoscale(self.pool_id, formula, FORMULA_EVALUATION_INTERVAL)
+            return
+        await self.batch_client.resize_pool(
+            self.pool_id,
+            PoolResizeParameter(
+                target_dedicated_nodes=target.dedicated,
+                target_low_priority_nodes=target.low_priority,
+                node_deallocation_option=ComputeNodeDeallocationOption.task_completion,
+            ),
+        )
@@ -0,0 +1,127 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable
+
+from azure.batch import BatchServiceClient
+from azure.batch.batch_auth import SharedKeyCredentials
+from azure.batch.models import (
+    CloudJob,
+    CloudPool,
+    CloudTask,
+    ComputeNode,
+    ComputeNodeListOptions,
+    FileGetFromTaskOptions,
+    JobAddParameter,
+    JobListOptions,
+    JobPatchParameter,
+    PoolGetOptions,
+    PoolResizeParameter,
+    TaskAddCollectionResult,
+    TaskCountsResult,
+    TaskAddParameter,
+    TaskListOptions,
+)
+
+from src.config.batch_config import BatchConfig
+
+
+class AsyncBatchClient:
+    """Async facade over the synchronous BatchServiceClient.
+
+    The Azure Batch SDK has no asyncio support, so every call is run on a
+    bounded thread pool to keep HTTP round trips off the event loop. One
+    BatchServiceClient (and its keep-alive HTTP session) is shared by all calls.
+    """
+
+    def __init__(self, client: BatchServiceClient | None = None, max_concurrency: int | None = None):
+        self.client = client or BatchServiceClient(
+            credentials=SharedKeyCredentials(BatchConfig.account_name, BatchConfig.account_key),
+            batch_url=BatchConfig.account_url,
+        )
+        # reuse the underlying requests session between calls
+        if hasattr(self.client, "config"):
+            self.client.config.keep_alive = True
+        self.max_concurrency = max(1, max_concurrency or BatchConfig.max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="batch")
+
+    async def _call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+
+    async def add_job(self, job: JobAddParameter) -> None:
+        await self._call(self.client.job.add, job)
+
+    async def terminate_job(self, job_id: str) -> None:
+        await self._call(self.client.job.terminate, job_id=job_id)
+
+    async def add_task(self, job_id: str, task: TaskAddParameter) -> None:
+        await self._call(self.client.task.add, job_id, task)
+
+    async def add_task_collection(self, job_id: str, tasks: list[TaskAddParameter]) -> TaskAddCollectionResult:
+        """Add up to 100 tasks in one request"""
+        return await self._call(self.client.task.add_collection, job_id, tasks)
+
+    async def patch_job(self, job_id: str, patch: JobPatchParameter) -> None:
+        await self._call(self.client.job.patch, job_id, patch)
+
+    async def list_jobs(self, filter: str | None = None, select: str | None = None) -> list[CloudJob]:
+        options = JobListOptions(filter=filter, select=select)
+        return await self._call(lambda: list(self.client.job.list(job_list_options=options)))
+
+    async def get_task_counts(self, job_id: str) -> TaskCountsResult:
+        """Active/running/completed task counts of a job (one call, no task listing)"""
+        return await self._call(self.client.job.get_task_counts, job_id)
+
+    async def get_pool(self, pool_id: str, select: str | None = None) -> CloudPool:
+        return await self._call(self.client.pool.get, pool_id, pool_get_options=PoolGetOptions(select=select))
+
+    async def resize_pool(self, pool_id: str, resize: PoolResizeParameter) -> None:
+        await self._call(self.client.pool.resize, pool_id, resize)
+
+    async def enable_pool_autoscale(self, pool_id: str, formula: str, evaluation_interval: timedelta) -> None:
+        await self._call(
+            self.client.pool.enable_auto_scale,
+            pool_id,
+            auto_scale_formula=formula,
+            auto_scale_evaluation_interval=evaluation_interval,
+        )
+
+    async def list_compute_nodes(self, pool_id: str, select: str | None = None) -> list[ComputeNode]:
+        """List the nodes of a pool in one paged call"""
+        options = ComputeNodeListOptions(select=select)
+        return await self._call(lambda: list(self.client.compute_node.list(pool_id, compute_node_list_options=options)))
+
+    async def delete_task(self, job_id: str, task_id: str) -> None:
+        await self._call(self.client.task.delete, job_id, task_id)
+
+    async def get_task(self, job_id: str, task_id: str) -> CloudTask:
+        return await self._call(self.client.task.get, job_id, task_id)
+
+    async def get_task_file_size(self, job_id: str, task_id: str, file_path: str) -> int:
+        """Size of a file in the task directory on the compute node (HEAD request, no content)"""
+        response = await self._call(self.client.file.get_properties_from_task, job_id, task_id, file_path, raw=True)
+        return int(response.headers["Content-Length"])
+
+    async def read_task_file(self, job_id: str, task_id: str, file_path: str, start: int, end: int) -> bytes:
+        """Read bytes [start, end] (inclusive) of a file in the task directory"""
+        options = FileGetFromTaskOptions(ocp_range=f"bytes={start}-{end}")
+        return await self._call(
+            lambda: b"".join(self.client.file.get_from_task(job_id, task_id, file_path, file_get_from_task_options=options))
+        )
+
+    async def get_task_file(self, job_id: str, task_id: str, file_path: str) -> bytes:
+        """Read a whole file from the task directory"""
+        return await self._call(lambda: b"".join(self.client.file.get_from_task(job_id, task_id, file_path)))
+
+    async def list_tasks(self, job_id: str, filter: str | None = None, select: str | None = None) -> list[CloudTask]:
+        """List tasks of a job in one paged call (pages are drained on the worker thread)"""
+        options = TaskListOptions(filter=filter, select=select)
+        return await self._call(lambda: list(self.client.task.list(job_id, task_list_options=options)))
+
+    def close(self) -> None:
+        """Shut down the worker threads"""
+        self.executor.shutdown(wait=False)
+        logging.info("Batch client executor closed")
@@ -1,16 +1,20 @@
 import asyncio
+import json
 import os
 import logging
 import traceback
 import hashlib
+import time
+import uuid
+from typing import Awaitable, Callable
 from src.models.request import Request
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from azure.batch.models import (
     TaskAddParameter,
     UserIdentity,
     AutoUserSpecification,
     AutoUserScope,
     ElevationLevel,
-    TaskState,
     JobAddParameter,
     PoolInformation,
     BatchErrorException,
@@ -20,67 +24,208 @@ from azure.batch.models import (
     OutputFileUploadOptions,
     OutputFile
 )
-from azure.batch import BatchServiceClient
-from azure.batch.batch_auth import SharedKeyCredentials
 
 from src.repository.result_repository import ResultRepository
+from src.repository.result_cache import ResultCache
 from src.models.result import ResultStatus
 from src.config.batch_config import BatchConfig
 from src.config.blob_config import BlobConfig
 from src.exceptions import *
 from src.repository.request_result_repository import RequestResultRepository
+from src.repository.unit_of_work import UnitOfWork
+from src.service.batch_client import AsyncBatchClient
+from src.service.task_poller import BatchTaskPoller
+from src.service.single_flight import SingleFlight
+from src.service.task_packer import TaskPacker
+from src.service.job_manager import JobManager
+from src.service.progress import ProgressListener, ProgressTailer
+from src.service.task_script import COMMAND_LINE, NODE_MANIFEST_FILE, UPLOAD_DIR, task_environment
+from src.dto.result_manifest import PRIMARY_FILE, ResultManifest
+from src.repository.redis_repository import RedisConnector
+from src.utils.metrics import BATCH_SUBMIT_SECONDS, TASK_RUNTIME_SECONDS
+from src.utils.tracing import current_span, traced
+
+# job/task id 등을 작업 상태에 기록하는 콜백 (복구 시 reattach에 사용)
+Checkpoint = Callable[[dict], Awaitable[None]]
+
+# job-per-request 모드의 task id (job 하나에 task 하나)
+SINGLE_TASK_ID = "task"
 
 
 class BatchService:
-    def __init__(self):
-        self.result_repo = ResultRepository()
-        self.request_result_repo = RequestResultRepository()
-        self.batch_client = BatchServiceClient(
-            credentials=SharedKeyCredentials(BatchConfig.account_name, BatchConfig.account_key),
-            batch_url=BatchConfig.account_url,
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        redis: RedisConnector | None = None,
+    ):
+        self.session_factory = session_factory
+        self.redis = redis or RedisConnector()
+        self.result_cache = ResultCache(self.redis)
+        self.result_repo = ResultRepository(session_factory, cache=self.result_cache)
+        self.request_result_repo = RequestResultRepository(session_factory)
+        self.batch_client = batch_client or AsyncBatchClient()
+        self.task_poller = BatchTaskPoller(self.batch_client)
+        self.progress_tailer = ProgressTailer(self.batch_client)
+        self.single_flight: SingleFlight[ResultManifest] = SingleFlight(
+            self.redis,
+            prefix="lease:result:",
+            poll_interval=BatchConfig.dedup_poll_interval,
         )
         self.batch_output_path = os.getenv("BATCH_MOUNT_PATH")
         self.server_mount_path = os.getenv("SERVER_MOUNT_PATH")
         self.blob_url = BlobConfig.BLOB_URL
         self.blob_dir = "output"
         self.pool_id = BatchConfig.pool_id
+        # shared/packed 모드: 요청마다 job을 만들지 않고 오래 유지되는 job에 task만 추가
+        self.job_manager = (
+            JobManager(self.batch_client, self.pool_id) if BatchConfig.job_mode in ("shared", "packed") else None
+        )
+        # packed 모드: 짧은 시간 안에 들어온 요청을 task.add_collection으로 묶어서 제출
+        self.task_packer = (
+            TaskPacker(self.batch_client, self.job_manager)
+            if BatchConfig.job_mode == "packed" else None
+        )
+
+    @traced()
+    async def run(
+        self,
+        request: Request,
+        checkpoint: Checkpoint | None = None,
+        attach: tuple[str, str] | None = None,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Execute batch job and return the manifest of its result files
 
-    async def run(self, request: Request) -> str:
-        """Execute batch job and return result path"""
+        ``checkpoint`` receives the Batch job/task ids once the task is submitted.
+        ``attach`` is a (job_id, task_id) pair of an already running task to wait
+        for instead of submitting a new one. ``progress`` receives the task's
+        output while it runs (only when this call runs the task itself).
+        """
         result_id = hashlib.md5(request.command.encode()).hexdigest()
-        
-        try:
-            # Check existing result
-            existing_result = await self.result_repo.get_result(result_id)
-            if existing_result and existing_result.status == ResultStatus.COMPLETED:
-                logging.info(f"Existing result found: {existing_result.result_path}")
-                await self.request_result_repo.create_relation(
-                    request_id=request.request_id,
-                    result_id=result_id
-                )
-                return existing_result.result_path
+        span = current_span()
+        if span is not None:
+            span.set_attribute("result_id", result_id)
 
-            # Create initial result
-            await self.result_repo.create_result(result_id)
-            
-            # Create relation
+        # Check existing result
+        existing = await self._completed_manifest(result_id)
+        if existing is not None:
+            logging.info(f"Existing result found: {existing}")
+            if span is not None:
+                span.set_attribute("cached", True)
             await self.request_result_repo.create_relation(
                 request_id=request.request_id,
                 result_id=result_id
             )
-            
-            # Process batch job
-            await self.result_repo.update_status(result_id, ResultStatus.RUNNING)
+            return existing
+
+        # Identical commands in flight (here or on another node) share one batch job
+        manifest, shared = await self.single_flight.do(
+            result_id,
+            leader=lambda: self._lead(request, result_id, checkpoint, attach, progress),
+            follower=lambda: self._completed_manifest(result_id),
+        )
+        if span is not None:
+            span.set_attribute("shared", shared)
+        if shared:
+            logging.info(f"Attached to in-flight batch job: {result_id}")
+            await self.request_result_repo.create_relation(
+                request_id=request.request_id,
+                result_id=result_id
+            )
+        return manifest
+
+    @traced()
+    async def resume(
+        self,
+        request: Request,
+        state: dict,
+        checkpoint: Checkpoint | None = None,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Resume a recovered request, reattaching to its Batch task if it still exists"""
+        attach = None
+        job_id, task_id = state.get("job_id"), state.get("task_id")
+        if job_id and task_id:
+            try:
+                await self.batch_client.get_task(job_id, task_id)
+                attach = (job_id, task_id)
+                logging.info(f"Reattaching to running batch task: {job_id}/{task_id}")
+            except BatchErrorException as e:
+                logging.info(f"Batch task {job_id}/{task_id} not found, resubmitting: {str(e)}")
+        if progress is not None and attach is not None:
+            # continue after the output already published before the restart
+            progress.offset = state.get("progress_offset", 0)
+        return await self.run(request, checkpoint=checkpoint, attach=attach, progress=progress)
+
+    async def _completed_manifest(self, result_id: str, fresh: bool = False) -> ResultManifest | None:
+        """Return the result manifest if the result is COMPLETED (``fresh`` skips the result cache)"""
+        result = await self.result_repo.get_result(result_id, use_cache=not fresh)
+        if result and result.status == ResultStatus.COMPLETED:
+            if result.manifest:
+                return ResultManifest.from_dict(result.manifest)
+            # results completed before manifests existed
+            return ResultManifest.from_result_path(result.result_path)
+        return None
+
+    async def _lead(
+        self,
+        request: Request,
+        result_id: str,
+        checkpoint: Checkpoint | None = None,
+        attach: tuple[str, str] | None = None,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Leader path: check again under the lease before running the job
+
+        Another node may have completed the result between the first check and
+        the lease, or the first check may have hit a cached miss.
+        """
+        existing = await self._completed_manifest(result_id, fresh=True)
+        if existing is not None:
+            logging.info(f"Result completed while acquiring the lease: {result_id}")
+            await self.request_result_repo.create_relation(
+                request_id=request.request_id,
+                result_id=result_id
+            )
+            return existing
+        return await self._execute(request, result_id, checkpoint, attach, progress)
+
+    @traced()
+    async def _execute(
+        self,
+        request: Request,
+        result_id: str,
+        checkpoint: Checkpoint | None = None,
+        attach: tuple[str, str] | None = None,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Run (or reattach to) the batch job for result_id while holding its lease"""
+        try:
+            # Create (or reset a failed/stale) result and relation in one transaction
+            async with UnitOfWork(self.session_factory) as uow:
+                await uow.results.upsert(result_id=result_id, result_path=None, status=ResultStatus.RUNNING)
+                await uow.create_relation(request_id=request.request_id, result_id=result_id)
+            await self.result_repo.invalidate(result_id)
             logging.info(f"Starting batch job with RUNNING status: {result_id}")
             
-            result_path = await self._process_batch_job(result_id, request.command)
+            if attach:
+                manifest = await self._reattach_batch_job(*attach, progress=progress)
+            else:
+                manifest = await self._process_batch_job(result_id, request.command, checkpoint, progress)
             
-            # Update final status and path
-            await self.result_repo.update_result_path(result_id, result_path)
-            await self.result_repo.update_status(result_id, ResultStatus.COMPLETED)
+            # Update final status, path and manifest
+            async with UnitOfWork(self.session_factory) as uow:
+                await uow.results.update(
+                    result_id=result_id,
+                    result_path=manifest.primary_path,
+                    manifest=manifest.to_dict(),
+                    status=ResultStatus.COMPLETED
+                )
+            await self.result_repo.invalidate(result_id)
             logging.info(f"Completed batch job: {result_id}")
             
-            return result_path
+            return manifest
 
         except BatchServiceError as e:
             await self.result_repo.update_status(result_id, ResultStatus.FAILED)
@@ -91,91 +236,193 @@ class BatchService:
             logging.error(f"Unexpected error: {str(e)}")
             raise BatchServiceError(f"Unexpected error during batch execution: {str(e)}")
 
-    async def _process_batch_job(self, result_id: str, command: str) -> str:
-        """Process batch job and return result path"""
+    async def close(self) -> None:
+        """Release Batch client resources"""
+        if self.task_packer is not None:
+            await self.task_packer.close()
+        if self.job_manager is not None:
+            await self.job_manager.close()
+        self.batch_client.close()
+
+    async def _process_batch_job(
+        self,
+        result_id: str,
+        command: str,
+        checkpoint: Checkpoint | None = None,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Process batch job and return result manifest"""
+        if self.job_manager is not None:
+            return await self._process_shared_task(result_id, command, checkpoint, progress)
+        # a new job per attempt: a failed result may run again while its old job still exists
+        job_id = self._new_job_id(result_id)
+        handed_off = False
         try:
             # Create job
-            await self._create_batch_job(result_id)
+            await self._create_batch_job(job_id)
             
             # Create and execute task
-            task_id = await self._create_batch_task(result_id, command)
-            result_path = await self._get_task_result(result_id, task_id)
-            return result_path
+            task_id = await self._create_batch_task(job_id, command)
+            if checkpoint:
+                await checkpoint({"result_id": result_id, "job_id": job_id, "task_id": task_id})
+            try:
+                return await self._get_task_result(job_id, task_id, progress)
+            except asyncio.CancelledError:
+                # Shutdown: the checkpointed job keeps running for the node that recovers the request
+                handed_off = checkpoint is not None
+                raise
 
         except Exception as e:
-            await self.result_repo.update_status(result_id, ResultStatus.FAILED)
             raise BatchJobError(f"Failed to process batch job: {str(e)}")
 
         finally:
-            try:
-                self._terminate_batch_job(result_id)
-            except Exception as e:
-                logging.error(f"Error during job cleanup: {str(e)}")
+            if not handed_off:
+                try:
+                    await self._terminate_batch_job(job_id)
+                except Exception as e:
+                    logging.error(f"Error during job cleanup: {str(e)}")
+
+    @traced()
+    async def _process_shared_task(
+        self,
+        result_id: str,
+        command: str,
+        checkpoint: Checkpoint | None = None,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Add the task to a long-lived job (directly or through the packer) and return result manifest"""
+        task_id = JobManager.new_task_id(result_id)
+        job_id = None
+        handed_off = False
+        try:
+            if self.task_packer is not None:
+                job_id = await self.task_packer.submit(lambda job_id: self._build_task(job_id, task_id, command))
+            else:
+                acquired = await self.job_manager.acquire()
+                with BATCH_SUBMIT_SECONDS.time(operation="add_task"):
+                    await self.batch_client.add_task(acquired, self._build_task(acquired, task_id, command))
+                job_id = acquired
+            logging.info(f"Batch task creation success: {job_id}/{task_id}")
+            if checkpoint:
+                await checkpoint({"result_id": result_id, "job_id": job_id, "task_id": task_id})
+            return await self._get_task_result(job_id, task_id, progress)
+
+        except asyncio.CancelledError:
+            # Shutdown: leave the task to the node that recovers the request next
+            handed_off = True
+            raise
 
-    async def _create_batch_job(self, result_id: str) -> None:
+        except Exception as e:
+            raise BatchJobError(f"Failed to process batch job: {str(e)}")
+
+        finally:
+            # 완료되거나 실패한 task는 background에서 정리
+            if job_id is not None and not handed_off:
+                self.job_manager.release(job_id, task_id)
+
+    async def _reattach_batch_job(
+        self,
+        job_id: str,
+        task_id: str,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
+        """Wait for an already submitted task and return result manifest"""
+        handed_off = False
+        try:
+            return await self._get_task_result(job_id, task_id, progress)
+
+        except asyncio.CancelledError:
+            # Shutdown: leave the task to the node that recovers the request next
+            handed_off = True
+            raise
+
+        except Exception as e:
+            raise BatchJobError(f"Failed to process batch job: {str(e)}")
+
+        finally:
+            # shared jobs are not owned by a single request
+            if not handed_off and task_id == SINGLE_TASK_ID:
+                try:
+                    await self._terminate_batch_job(job_id)
+                except Exception as e:
+                    logging.error(f"Error during job cleanup: {str(e)}")
+            elif not handed_off and self.job_manager is not None:
+                self.job_manager.release(job_id, task_id)
+
+    @staticmethod
+    def _new_job_id(result_id: str) -> str:
+        """Job id of one attempt at result_id (job-per-request mode)"""
+        return f"{result_id}-{uuid.uuid4().hex[:8]}"
+
+    @traced()
+    async def _create_batch_job(self, job_id: str) -> None:
         try:
             job = JobAddParameter(
-                id=result_id, 
+                id=job_id, 
                 pool_info=PoolInformation(pool_id=self.pool_id)
             )
-            self.batch_client.job.add(job)
+            with BATCH_SUBMIT_SECONDS.time(operation="add_job"):
+                await self.batch_client.add_job(job)
             
         except BatchErrorException as e:
             raise BatchJobError(f"Failed to create batch job: {str(e)}")
 
-    # does not support async in azure sdk
-    def _terminate_batch_job(self, result_id: str) -> None:
+    @traced()
+    async def _terminate_batch_job(self, job_id: str) -> None:
         """Remove completed Batch Job"""
         try:
-            self.batch_client.job.terminate(job_id=result_id)
+            await self.batch_client.terminate_job(job_id)
 
         except BatchErrorException as e:
             raise BatchJobError(f"Failed to terminate batch job: {str(e)}")
 
-    async def _create_batch_task(self, job_id: str, command: str) -> str:
-        task_id = "task"
+    @staticmethod
+    def _output_prefix(job_id: str, task_id: str) -> str:
+        """Blob path of a task's output (job-per-request tasks keep the job-level path)"""
+        return job_id if task_id == SINGLE_TASK_ID else f"{job_id}/{task_id}"
 
-        try:
-            # stdout 파일 설정
-            output_file = OutputFile(
-                file_pattern="*.txt",  # 모든 txt 파일 매칭
-                destination=OutputFileDestination(
-                    container=OutputFileBlobContainerDestination(
-                        container_url=self.blob_url,
-                        path=f"{job_id}"
-                    )
-                ),
-                upload_options=OutputFileUploadOptions(
-                    upload_condition="taskCompletion"
+    def _build_task(self, job_id: str, task_id: str, command: str) -> TaskAddParameter:
+        # wrapper script가 upload/에 모아둔 결과 파일과 manifest.json 업로드
+        output_file = OutputFile(
+            file_pattern=f"{UPLOAD_DIR}/**/*",
+            destination=OutputFileDestination(
+                container=OutputFileBlobContainerDestination(
+                    container_url=self.blob_url,
+                    path=self._output_prefix(job_id, task_id)
                 )
+            ),
+            upload_options=OutputFileUploadOptions(
+                upload_condition="taskCompletion"
             )
+        )
 
-            # 작업 디렉토리에서 명령어 실행하고 출력을 파일로 저장
-            modified_command = (
-                'bash -c \''
-                'cd $AZ_BATCH_TASK_WORKING_DIR && '  # 작업 디렉토리로 이동
-                f'{command} > output.txt 2>&1 && '   # 표준 출력과 에러를 같은 파일로
-                'cat output.txt\''                   # 출력 확인용
-            )
-
-            batch_task = TaskAddParameter(
-                id=task_id,
-                command_line=modified_command,
-                user_identity=UserIdentity(
-                    auto_user=AutoUserSpecification(
-                        scope=AutoUserScope.pool,
-                        elevation_level=ElevationLevel.admin
-                    )
-                ),
-                output_files=[output_file],
-                constraints=TaskConstraints(
-                    max_wall_clock_time="PT1H",
-                    retention_time="PT1H",
-                    max_task_retry_count=1
+        # 명령어는 환경변수로 전달되어 wrapper script 안에서 실행됨 (src/service/task_script.py)
+        return TaskAddParameter(
+            id=task_id,
+            command_line=COMMAND_LINE,
+            environment_settings=task_environment(command),
+            user_identity=UserIdentity(
+                auto_user=AutoUserSpecification(
+                    scope=AutoUserScope.pool,
+                    elevation_level=ElevationLevel.admin
                 )
+            ),
+            output_files=[output_file],
+            constraints=TaskConstraints(
+                max_wall_clock_time="PT1H",
+                retention_time="PT1H",
+                max_task_retry_count=1
             )
+        )
+
+    @traced()
+    async def _create_batch_task(self, job_id: str, command: str) -> str:
+        task_id = SINGLE_TASK_ID
 
-            self.batch_client.task.add(job_id, batch_task)
+        try:
+            batch_task = self._build_task(job_id, task_id, command)
+            with BATCH_SUBMIT_SECONDS.time(operation="add_task"):
+                await self.batch_client.add_task(job_id, batch_task)
             logging.info(f"Batch task creation success: {task_id}")
             return task_id
 
@@ -183,18 +430,49 @@ class BatchService:
             logging.error(f"Batch task creation failed: {str(e)}")
             raise BatchTaskError(f"Failed to create batch task: {str(e)}")
 
-    async def _get_task_result(self, job_id: str, task_id: str) -> str:
+    @traced()
+    async def _get_task_result(
+        self,
+        job_id: str,
+        task_id: str,
+        progress: ProgressListener | None = None,
+    ) -> ResultManifest:
         try:
-            while True:
-                task = self.batch_client.task.get(job_id, task_id)
-                if task.state == TaskState.completed:
-                    if task.execution_info.result == "success":
-                        return os.path.join(self.blob_url, f"{job_id}/output.txt")
-                    else:
-                        raise TaskExecutionError(
-                            f"Task failed: {task.execution_info.failure_info.message}"
-                        )
-                await asyncio.sleep(1)
-                
+            start = time.perf_counter()
+            if progress is None:
+                task = await self.task_poller.wait(job_id, task_id)
+            else:
+                tailer = asyncio.create_task(self.progress_tailer.tail(job_id, task_id, progress))
+                try:
+                    task = await self.task_poller.wait(job_id, task_id)
+                finally:
+                    tailer.cancel()
+                await self.progress_tailer.drain(job_id, task_id, progress)
+            outcome = task.execution_info.result
+            elapsed = time.perf_counter() - start
+            TASK_RUNTIME_SECONDS.observe(elapsed, result=getattr(outcome, "value", str(outcome)))
+            try:
+                # fleet-wide runtime samples for the pool autoscaler
+                await self.redis.record_task_runtime(elapsed)
+            except Exception as e:
+                logging.warning(f"Failed to record task runtime: {str(e)}")
+            if task.execution_info.result == "success":
+                return await self._read_manifest(job_id, task_id)
+            else:
+                raise TaskExecutionError(
+                    f"Task failed: {task.execution_info.failure_info.message}"
+                )
+
         except BatchErrorException as e:
             raise BatchTaskError(f"Failed to get task result: {str(e)}")
+
+    async def _read_manifest(self, job_id: str, task_id: str) -> ResultManifest:
+        """Read manifest.json written by the wrapper script from the compute node"""
+        base_url = os.path.join(self.blob_url, self._output_prefix(job_id, task_id))
+        try:
+            data = json.loads(await self.batch_client.get_task_file(job_id, task_id, NODE_MANIFEST_FILE))
+        except (BatchErrorException, ValueError) as e:
+            # task submitted before the wrapper script existed: output.txt only
+            logging.warning(f"No result manifest for {job_id}/{task_id}: {str(e)}")
+            return ResultManifest.from_result_path(f"{base_url}/{PRIMARY_FILE}")
+        return ResultManifest.from_dict({**data, "base_url": base_url})
@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+from azure.batch.models import ComputeNodeState, SchedulingState
+
+from src.config.batch_config import BatchConfig
+from src.service.batch_client import AsyncBatchClient
+from src.service.job_manager import JOB_PREFIX
+
+# nodes that take new tasks
+SCHEDULABLE_STATES = (ComputeNodeState.idle, ComputeNodeState.running)
+# nodes that will not run tasks without intervention
+UNAVAILABLE_STATES = (
+    ComputeNodeState.unusable,
+    ComputeNodeState.start_task_failed,
+    ComputeNodeState.offline,
+    ComputeNodeState.leaving_pool,
+    ComputeNodeState.preempted,
+    ComputeNodeState.unknown,
+)
+
+
+@dataclass
+class PoolCapacity:
+    """One sample of the pool's task slots"""
+    nodes: int  # nodes in the pool, or the resize target when the pool is growing
+    schedulable_nodes: int
+    total_slots: int  # slots of all nodes that run or will run tasks (including starting ones)
+    running_slots: int  # slots used by running tasks on schedulable nodes
+    active_tasks: int  # tasks queued in Batch waiting for a slot
+    running_tasks: int
+
+    @property
+    def free_slots(self) -> int:
+        return max(0, self.total_slots - self.running_slots)
+
+    @property
+    def available(self) -> int:
+        """Slots left for new tasks once the queued ones are placed (negative: backlog inside Batch)"""
+        return self.free_slots - self.active_tasks
+
+
+class PoolCapacityMonitor:
+    """Samples the Batch pool and gates session acceptance on its free slots.
+
+    Every ``interval`` seconds the pool size, the task slots in use on its
+    nodes and the active jobs on the pool are read (three list/get calls).
+    Only long-lived ``jobmgr-`` jobs are asked for their task counts; every
+    other job holds the single task of one request, so tasks queued in Batch
+    are the outstanding tasks minus those running on the nodes. Admission pauses once ``available`` slots drop to
+    ``pause_at`` and resumes only when they are back at ``resume_at``, so the
+    server does not flap around a full pool. Between samples every request
+    about to be submitted to Batch reserves one slot (a session may carry
+    several), so a burst cannot overshoot the last sample.
+
+    While paused, requests stay in the durable queue for other nodes or pools.
+    A failing sample keeps admission open: the monitor must never stop the
+    server on its own.
+    """
+
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient,
+        pool_id: str | None = None,
+        interval: float | None = None,
+        pause_at: int | None = None,
+        resume_at: int | None = None,
+    ):
+        self.batch_client = batch_client
+        self.pool_id = pool_id or BatchConfig.pool_id
+        self.interval = interval if interval is not None else BatchConfig.capacity_interval
+        self.pause_at = pause_at if pause_at is not None else BatchConfig.capacity_pause_at
+        self.resume_at = max(self.pause_at + 1, resume_at if resume_at is not None else BatchConfig.capacity_resume_at)
+        self.capacity: PoolCapacity | None = None
+        self.reserved = 0
+        self._open = asyncio.Event()
+        self._open.set()
+        self._sampler: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    @property
+    def admitting(self) -> bool:
+        return self._open.is_set()
+
+    @property
+    def available(self) -> int | None:
+        if self.capacity is None:
+            return None
+        return self.capacity.available - self.reserved
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        await self.refresh()
+        self._sampler = asyncio.create_task(self._sample_loop())
+
+    async def close(self) -> None:
+        if self._sampler is not None:
+            self._sampler.cancel()
+            self._sampler = None
+        self._open.set()
+
+    async def wait_for_capacity(self) -> None:
+        """Return once the pool has room for another session"""
+        await self._open.wait()
+
+    def reserve(self, slots: int = 1) -> None:
+        """Count a request about to be submitted to Batch against the last sample"""
+        if not self.enabled or self.capacity is None:
+            return
+        self.reserved += slots
+        self._update()
+
+    async def refresh(self) -> None:
+        try:
+            self.capacity = await self.sample()
+        except Exception as e:
+            logging.warning(f"Pool capacity sample failed, admitting sessions: {str(e)}")
+            self.capacity = None
+        self.reserved = 0
+        self._update()
+
+    async def sample(self) -> PoolCapacity:
+        pool, nodes, jobs = await asyncio.gather(
+            self.batch_client.get_pool(
+                self.pool_id,
+                select=(
+                    "id,taskSlotsPerNode,currentDedicatedNodes,currentLowPriorityNodes,"
+                    "targetDedicatedNodes,targetLowPriorityNodes"
+                ),
+            ),
+            self.batch_client.list_compute_nodes(
+                self.pool_id, select="id,state,schedulingState,runningTaskSlotsCount,runningTasksCount"
+            ),
+            self.batch_client.list_jobs(
+                filter=f"state eq 'active' and executionInfo/poolId eq '{self.pool_id}'", select="id"
+            ),
+        )
+        shared = [job.id for job in jobs if job.id.startswith(JOB_PREFIX)]
+        counts = await asyncio.gather(*(self.batch_client.get_task_counts(job_id) for job_id in shared))
+        outstanding = (len(jobs) - len(shared)) + sum(
+            count.task_counts.active + count.task_counts.running for count in counts
+        )
+        running_tasks = sum(node.running_tasks_count or 0 for node in nodes)
+
+        schedulable = [
+            node for node in nodes
+            if node.state in SCHEDULABLE_STATES and node.scheduling_state != SchedulingState.disabled
+        ]
+        lost = sum(
+            1 for node in nodes
+            if node.state in UNAVAILABLE_STATES or node.scheduling_state == SchedulingState.disabled
+        )
+        current = (pool.current_dedicated_nodes or 0) + (pool.current_low_priority_nodes or 0)
+        target = (pool.target_dedicated_nodes or 0) + (pool.target_low_priority_nodes or 0)
+        # nodes still being allocated or starting will take the queued tasks: count them as capacity
+        expected = max(len(schedulable), max(current, target) - lost)
+        return PoolCapacity(
+            nodes=max(current, target),
+            schedulable_nodes=len(schedulable),
+            total_slots=expected * (pool.task_slots_per_node or 1),
+            running_slots=sum(node.running_task_slots_count or 0 for node in schedulable),
+            active_tasks=max(0, outstanding - running_tasks),
+            running_tasks=running_tasks,
+        )
+
+    def _update(self) -> None:
+        available = self.available
+        if available is None:
+            self._open.set()
+        elif self.admitting and available <= self.pause_at:
+            self._open.clear()
+            logging.warning(f"Batch pool {self.pool_id} is full ({self.capacity}), pausing session acceptance")
+        elif not self.admitting and available >= self.resume_at:
+            self._open.set()
+            logging.info(f"Batch pool {self.pool_id} has {available} free slots, resuming session acceptance")
+
+    async def _sample_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.refresh()
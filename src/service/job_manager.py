@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+from azure.batch.models import (
+    BatchErrorException,
+    JobAddParameter,
+    JobPatchParameter,
+    OnAllTasksComplete,
+    PoolInformation,
+)
+
+from src.config.batch_config import BatchConfig
+from src.exceptions import BatchJobError
+from src.service.batch_client import AsyncBatchClient
+from src.utils.metrics import BATCH_SUBMIT_SECONDS
+
+JOB_PREFIX = "jobmgr-"
+CLEANUP_BATCH_SIZE = 100
+# tasks may still be on their way into a job when it rotates out
+RETIRE_GRACE_SECONDS = 60
+
+
+@dataclass
+class _ManagedJob:
+    job_id: str
+    created_at: float = field(default_factory=time.monotonic)
+    task_count: int = 0
+
+
+class JobManager:
+    """Keeps one long-lived Batch job per pool and rotates it.
+
+    Tasks are added to the current job (with ids unique within it) instead of
+    creating and terminating a job per request. The current job is retired
+    once it is older than ``max_age`` or holds ``max_tasks`` tasks: it is
+    switched to ``terminateJob`` on completion so Batch closes it after its
+    last task, and a new job takes its place.
+
+    A background loop deletes completed tasks handed to ``release`` and
+    retires ``jobmgr-`` jobs left active by crashed processes, so the request
+    path only pays for the task submission.
+    """
+
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient,
+        pool_id: str | None = None,
+        max_age: float | None = None,
+        max_tasks: int | None = None,
+        cleanup_interval: float | None = None,
+    ):
+        self.batch_client = batch_client
+        self.pool_id = pool_id or BatchConfig.pool_id
+        self.max_age = max_age or BatchConfig.job_max_age
+        self.max_tasks = max(1, max_tasks or BatchConfig.job_max_tasks)
+        self.cleanup_interval = cleanup_interval or BatchConfig.job_cleanup_interval
+        self.current: _ManagedJob | None = None
+        self.completed_tasks: list[tuple[str, str]] = []
+        self._lock = asyncio.Lock()
+        self._cleaner: asyncio.Task | None = None
+        self._retiring: set[asyncio.Task] = set()
+
+    @staticmethod
+    def new_task_id(result_id: str) -> str:
+        """Task id unique within a long-lived job (a result may run again after a failure)"""
+        return f"{result_id}-{uuid.uuid4().hex[:8]}"
+
+    async def acquire(self, task_count: int = 1) -> str:
+        """Reserve room for ``task_count`` tasks and return the job to add them to"""
+        async with self._lock:
+            job = self.current
+            if job is None or self._expired(job) or job.task_count + task_count > self.max_tasks:
+                if job is not None:
+                    self._retire_later(job.job_id)
+                job = await self._create_job()
+                self.current = job
+            job.task_count += task_count
+        if self._cleaner is None or self._cleaner.done():
+            self._cleaner = asyncio.create_task(self._cleanup_loop())
+        return job.job_id
+
+    def release(self, job_id: str, task_id: str) -> None:
+        """Hand a finished or failed task over for background deletion"""
+        self.completed_tasks.append((job_id, task_id))
+
+    async def close(self) -> None:
+        """Retire the current job and stop the cleanup loop"""
+        if self._cleaner is not None:
+            self._cleaner.cancel()
+            self._cleaner = None
+        for task in list(self._retiring):
+            task.cancel()
+        if self.current is not None:
+            await self._retire(self.current.job_id)
+            self.current = None
+
+    def _expired(self, job: _ManagedJob) -> bool:
+        return time.monotonic() - job.created_at >= self.max_age
+
+    async def _create_job(self) -> _ManagedJob:
+        job_id = f"{JOB_PREFIX}{uuid.uuid4().hex}"
+        try:
+            with BATCH_SUBMIT_SECONDS.time(operation="add_job"):
+                await self.batch_client.add_job(
+                    JobAddParameter(id=job_id, pool_info=PoolInformation(pool_id=self.pool_id))
+                )
+        except BatchErrorException as e:
+            raise BatchJobError(f"Failed to create batch job: {str(e)}")
+        logging.info(f"Created long-lived batch job: {job_id}")
+        return _ManagedJob(job_id)
+
+    def _retire_later(self, job_id: str) -> None:
+        task = asyncio.create_task(self._retire(job_id, delay=RETIRE_GRACE_SECONDS))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    async def _retire(self, job_id: str, delay: float = 0) -> None:
+        """Let Batch terminate the job once its remaining tasks complete"""
+        await asyncio.sleep(delay)
+        try:
+            await self.batch_client.patch_job(
+                job_id, JobPatchParameter(on_all_tasks_complete=OnAllTasksComplete.terminate_job)
+            )
+            logging.info(f"Retired batch job: {job_id}")
+        except BatchErrorException as e:
+            logging.error(f"Failed to retire batch job {job_id}: {str(e)}")
+
+    async def _cleanup_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await self.cleanup()
+            except Exception as e:
+                logging.error(f"Batch job cleanup failed: {str(e)}")
+
+    async def cleanup(self) -> None:
+        """Delete released tasks and retire abandoned long-lived jobs"""
+        while self.completed_tasks:
+            chunk = self.completed_tasks[:CLEANUP_BATCH_SIZE]
+            del self.completed_tasks[:CLEANUP_BATCH_SIZE]
+            results = await asyncio.gather(
+                *(self.batch_client.delete_task(job_id, task_id) for job_id, task_id in chunk),
+                return_exceptions=True,
+            )
+            for (job_id, task_id), result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    logging.warning(f"Failed to delete completed task {job_id}/{task_id}: {str(result)}")
+
+        # jobs of crashed processes were never retired: their owner would have rotated them by now
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.max_age * 2)
+        jobs = await self.batch_client.list_jobs(
+            filter="state eq 'active'", select="id,creationTime,onAllTasksComplete"
+        )
+        for job in jobs:
+            if (
+                job.id.startswith(JOB_PREFIX)
+                and (self.current is None or job.id != self.current.job_id)
+                and job.on_all_tasks_complete != OnAllTasksComplete.terminate_job
+                and job.creation_time is not None
+                and job.creation_time < cutoff
+            ):
+                await self._retire(job.id)
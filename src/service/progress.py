@@ -0,0 +1,82 @@
+import asyncio
+import codecs
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+from azure.batch.models import BatchErrorException
+
+from src.config.batch_config import BatchConfig
+from src.service.batch_client import AsyncBatchClient
+from src.service.task_script import NODE_OUTPUT_FILE
+
+
+@dataclass
+class ProgressListener:
+    """Receives new task output as (text, end offset in bytes)"""
+    publish: Callable[[str, int], Awaitable[None]]
+    offset: int = 0  # bytes already published (restored from the checkpoint on recovery)
+    _decoder: codecs.IncrementalDecoder = field(
+        default_factory=lambda: codecs.getincrementaldecoder("utf-8")(errors="replace"), repr=False
+    )
+
+    def feed(self, data: bytes) -> str:
+        """Advance the offset past ``data`` and return its text (a split character waits for the next chunk)"""
+        self.offset += len(data)
+        return self._decoder.decode(data)
+
+
+class ProgressTailer:
+    """Tails a running task's output file with ranged reads.
+
+    Every ``interval`` seconds the file size is checked with a HEAD request and
+    only bytes past the listener's offset are fetched, at most ``max_bytes``
+    per tick, so transfer stays proportional to new output and one progress
+    message is published per tick at most.
+    """
+
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient,
+        interval: float | None = None,
+        max_bytes: int | None = None,
+        file_path: str = NODE_OUTPUT_FILE,
+    ):
+        self.batch_client = batch_client
+        self.interval = interval or BatchConfig.progress_interval
+        self.max_bytes = max(1, max_bytes or BatchConfig.progress_max_bytes)
+        self.file_path = file_path
+
+    async def tail(self, job_id: str, task_id: str, listener: ProgressListener) -> None:
+        """Publish new output until cancelled"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.poll(job_id, task_id, listener, limit=self.max_bytes)
+            except BatchErrorException as e:
+                # not scheduled on a node yet, or the file does not exist yet
+                logging.debug(f"Task output not readable yet {job_id}/{task_id}: {str(e)}")
+            except Exception as e:
+                logging.warning(f"Progress tailing failed {job_id}/{task_id}: {str(e)}")
+
+    async def drain(self, job_id: str, task_id: str, listener: ProgressListener) -> None:
+        """Publish whatever output is left once the task completed"""
+        try:
+            while await self.poll(job_id, task_id, listener, limit=self.max_bytes):
+                pass
+        except BatchErrorException as e:
+            logging.info(f"Final task output not readable {job_id}/{task_id}: {str(e)}")
+
+    async def poll(self, job_id: str, task_id: str, listener: ProgressListener, limit: int) -> int:
+        """Publish up to ``limit`` new bytes and return how many were read"""
+        size = await self.batch_client.get_task_file_size(job_id, task_id, self.file_path)
+        if size <= listener.offset:
+            return 0
+        end = min(size, listener.offset + limit) - 1
+        data = await self.batch_client.read_task_file(job_id, task_id, self.file_path, listener.offset, end)
+        if not data:
+            return 0
+        text = listener.feed(data)
+        if text:
+            await listener.publish(text, listener.offset)
+        return len(data)
@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from src.config.servicebus_config import ServiceBusConfig
+from src.dto import ResponseMessage, codec
+from src.exceptions import MessageTooLargeError, TransportError
+from src.transport import OutgoingMessage, Sender
+from src.utils.metrics import RESPONSE_SEND_SECONDS
+from src.utils.tracing import inject
+
+
+@dataclass
+class _PendingResponse:
+    message: OutgoingMessage
+    future: asyncio.Future
+
+
+class ResponsePublisher:
+    """Micro-batches outgoing responses into batched transport sends.
+
+    Responses are queued and flushed by a single background task when
+    ``max_batch`` messages are waiting, the batch is full, or ``max_delay``
+    seconds passed since the first queued response. Batches are sent strictly in
+    queue order and a failing batch is retried before the next one goes out, so
+    responses of one session keep their order; responses the transport already
+    delivered before a failure are not sent again. ``publish`` returns once the
+    response is delivered (or raises if every retry failed).
+    """
+
+    def __init__(
+        self,
+        sender: Sender,
+        max_batch: int | None = None,
+        max_delay: float | None = None,
+        max_retries: int | None = None,
+        retry_backoff: float | None = None,
+    ):
+        self.sender = sender
+        self.max_batch = max(1, max_batch or ServiceBusConfig.publish_max_batch)
+        self.max_delay = max_delay if max_delay is not None else ServiceBusConfig.publish_max_delay
+        self.max_retries = max_retries if max_retries is not None else ServiceBusConfig.publish_max_retries
+        self.retry_backoff = retry_backoff if retry_backoff is not None else ServiceBusConfig.publish_retry_backoff
+        self.queue: asyncio.Queue[_PendingResponse | None] = asyncio.Queue()  # None: stop after flushing
+        self._flusher: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Flush queued responses, including a batch being sent, and stop the background task"""
+        self.start()
+        await self.queue.put(None)
+        flusher, self._flusher = self._flusher, None
+        await flusher
+
+    async def publish(self, response: ResponseMessage, content_type: str | None = None) -> None:
+        """Queue a response and wait until it is sent (carrying the caller's trace context)"""
+        content_type = codec.normalize(content_type or ServiceBusConfig.content_type)
+        message = OutgoingMessage(
+            response.to_bytes(content_type),
+            session_id=response.session_id,
+            content_type=content_type,
+            application_properties=inject(),
+        )
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingResponse(message, future))
+        self.start()
+        await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self.queue.get()
+            if first is None:
+                return
+            pending = [first]
+            deadline = loop.time() + self.max_delay
+            while len(pending) < self.max_batch:
+                try:
+                    if not self.queue.empty():
+                        item = self.queue.get_nowait()
+                    elif deadline > loop.time():
+                        item = await asyncio.wait_for(self.queue.get(), deadline - loop.time())
+                    else:
+                        break
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                pending.append(item)
+            await self._send(pending)
+
+    async def _send(self, pending: list[_PendingResponse]) -> None:
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                await self.sender.send([item.message for item in pending])
+                RESPONSE_SEND_SECONDS.observe(time.perf_counter() - start, outcome="sent")
+                self._resolve(pending)
+                return
+            except MessageTooLargeError as e:
+                RESPONSE_SEND_SECONDS.observe(time.perf_counter() - start, outcome="too_large")
+                # a single response larger than the batch limit can never be sent
+                logging.error(f"Response too large to send: {str(e)}")
+                self._resolve(pending[:e.sent])
+                self._resolve(pending[e.sent:e.sent + 1], e)
+                pending = pending[e.sent + 1:]
+                if not pending:
+                    return
+            except TransportError as e:
+                RESPONSE_SEND_SECONDS.observe(time.perf_counter() - start, outcome="error")
+                # responses delivered before the failure must not be sent twice
+                self._resolve(pending[:e.sent])
+                pending = pending[e.sent:]
+                if not pending:
+                    return
+                if attempt == self.max_retries:
+                    logging.error(f"Sending {len(pending)} responses failed: {str(e)}")
+                    self._resolve(pending, e)
+                    return
+                logging.warning(f"Sending responses failed, retrying ({attempt + 1}/{self.max_retries}): {str(e)}")
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+            except Exception as e:
+                # unexpected sender errors fail this batch only; the flusher keeps running
+                RESPONSE_SEND_SECONDS.observe(time.perf_counter() - start, outcome="error")
+                logging.error(f"Sending {len(pending)} responses failed: {str(e)}")
+                self._resolve(pending, e)
+                return
+
+    @staticmethod
+    def _resolve(items: list[_PendingResponse], error: Exception | None = None) -> None:
+        for item in items:
+            if item.future.done():
+                continue
+            if error is None:
+                item.future.set_result(None)
+            else:
+                item.future.set_exception(error)
@@ -0,0 +1,178 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from src.config.server_config import ServerConfig
+from src.exceptions import QuotaExceededError
+from src.utils.metrics import SCHEDULER_WAIT_SECONDS
+
+DEFAULT_TENANT = "default"
+
+
+def parse_weights(value: str) -> dict[str, float]:
+    """``"tenant-a=3,tenant-b=0.5"`` -> {"tenant-a": 3.0, "tenant-b": 0.5}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        tenant, _, weight = item.partition("=")
+        try:
+            weights[tenant.strip()] = max(float(weight), 0.001)
+        except ValueError:
+            logging.warning(f"Ignoring invalid tenant weight: {item}")
+    return weights
+
+
+@dataclass(order=True)
+class _Waiter:
+    sort_key: tuple[int, int]  # (-priority, arrival order)
+    tenant: str = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    queued_at: float = field(compare=False, default_factory=time.monotonic)
+
+
+@dataclass
+class _Tenant:
+    weight: float
+    virtual_time: float = 0.0  # dispatched requests / weight
+    running: int = 0
+    waiting: list[_Waiter] = field(default_factory=list)  # heap
+
+
+class FairScheduler:
+    """Orders admitted requests before they are dispatched to Batch.
+
+    At most ``max_running`` requests run at a time; the others wait in memory.
+    When a slot frees up the waiter with the highest priority runs first, and
+    among equal priorities the tenant that received the least weighted service
+    so far (start-time fair queuing: every dispatch advances the tenant's
+    virtual time by ``1 / weight``), then the oldest request. A tenant that
+    becomes active again starts at the current virtual time instead of
+    banking credit while idle.
+
+    Per tenant at most ``tenant_max_running`` requests run. ``admit`` rejects
+    a request with QuotaExceededError while its tenant already has
+    ``tenant_max_queued`` requests waiting. ``max_running=0`` disables
+    scheduling.
+    """
+
+    def __init__(
+        self,
+        max_running: int | None = None,
+        tenant_max_running: int | None = None,
+        tenant_max_queued: int | None = None,
+        weights: dict[str, float] | None = None,
+    ):
+        self.max_running = max_running if max_running is not None else ServerConfig.scheduler_max_running
+        self.tenant_max_running = (
+            tenant_max_running if tenant_max_running is not None else ServerConfig.scheduler_tenant_max_running
+        )
+        self.tenant_max_queued = (
+            tenant_max_queued if tenant_max_queued is not None else ServerConfig.scheduler_tenant_max_queued
+        )
+        self.weights = weights if weights is not None else parse_weights(ServerConfig.scheduler_tenant_weights)
+        self.tenants: dict[str, _Tenant] = {}
+        self.running = 0
+        self.queued = 0
+        self._order = itertools.count()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_running > 0
+
+    def __len__(self) -> int:
+        return self.queued
+
+    def admit(self, tenant: str | None = None) -> None:
+        """Reject the request if its tenant's queue is full"""
+        if not self.enabled or not self.tenant_max_queued:
+            return
+        tenant = tenant or DEFAULT_TENANT
+        state = self.tenants.get(tenant)
+        if state is not None and len(state.waiting) >= self.tenant_max_queued:
+            raise QuotaExceededError(f"Tenant {tenant} has {len(state.waiting)} requests queued")
+
+    @asynccontextmanager
+    async def slot(self, tenant: str | None = None, priority: int = 0) -> AsyncIterator[None]:
+        """Wait for the request's turn and hold a running slot inside the block"""
+        if not self.enabled:
+            yield
+            return
+        tenant = tenant or DEFAULT_TENANT
+        await self.acquire(tenant, priority)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+    async def acquire(self, tenant: str, priority: int = 0) -> None:
+        state = self._tenant(tenant)
+        if not state.waiting and state.running == 0:
+            # idle tenants rejoin at the current virtual time
+            state.virtual_time = max(state.virtual_time, self._min_virtual_time(exclude=tenant))
+        waiter = _Waiter((-priority, next(self._order)), tenant, asyncio.get_running_loop().create_future())
+        heapq.heappush(state.waiting, waiter)
+        self.queued += 1
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # granted right before the cancellation: hand the slot on
+                self.release(tenant)
+            elif waiter in state.waiting:
+                state.waiting.remove(waiter)
+                heapq.heapify(state.waiting)
+                self.queued -= 1
+            raise
+        SCHEDULER_WAIT_SECONDS.observe(time.monotonic() - waiter.queued_at)
+
+    def release(self, tenant: str) -> None:
+        state = self.tenants[tenant]
+        state.running -= 1
+        self.running -= 1
+        if state.running == 0 and not state.waiting and tenant not in self.weights:
+            # forget idle tenants; their virtual time is reset on return anyway
+            del self.tenants[tenant]
+        self._dispatch()
+
+    def _tenant(self, tenant: str) -> _Tenant:
+        state = self.tenants.get(tenant)
+        if state is None:
+            state = self.tenants[tenant] = _Tenant(weight=self.weights.get(tenant, 1.0))
+        return state
+
+    def _min_virtual_time(self, exclude: str) -> float:
+        active = [
+            state.virtual_time
+            for name, state in self.tenants.items()
+            if name != exclude and (state.waiting or state.running)
+        ]
+        return min(active, default=0.0)
+
+    def _dispatch(self) -> None:
+        while self.running < self.max_running:
+            best: tuple | None = None
+            for name, state in self.tenants.items():
+                if not state.waiting:
+                    continue
+                if self.tenant_max_running and state.running >= self.tenant_max_running:
+                    continue
+                head = state.waiting[0]
+                key = (head.sort_key[0], state.virtual_time, head.sort_key[1])
+                if best is None or key < best[0]:
+                    best = (key, name, state)
+            if best is None:
+                return
+            _, name, state = best
+            waiter = heapq.heappop(state.waiting)
+            self.queued -= 1
+            if waiter.future.cancelled():
+                continue
+            state.running += 1
+            self.running += 1
+            state.virtual_time += 1 / state.weight
+            waiter.future.set_result(None)
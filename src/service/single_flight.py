@@ -0,0 +1,141 @@
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from src.config.redis_config import RedisConfig
+from src.exceptions import LeaderFailedError
+from src.repository.redis_repository import RedisConnector
+from src.utils.node import get_node_id
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Runs at most one execution per key across the whole fleet.
+
+    Inside the process concurrent callers share one future. Across nodes the
+    caller that acquires the Redis lease ``{prefix}{key}`` becomes the leader
+    and keeps renewing it while it runs. Everyone else polls ``follower`` until
+    it returns the leader's value, and takes over if the lease disappears
+    without a value.
+
+    A failing leader leaves a failure marker next to the lease for
+    ``failure_ttl`` seconds, so followers on other nodes fail with
+    LeaderFailedError like the ones in its process instead of running the
+    same failing execution again. A cancelled leader (shutdown hand-off) keeps
+    its lease until it expires: the execution is still running and the node
+    recovering it takes the lease over, not a follower starting a duplicate.
+    """
+
+    def __init__(
+        self,
+        redis: RedisConnector,
+        prefix: str = "lease:",
+        lease_ttl: float | None = None,
+        poll_interval: float = 5,
+        failure_ttl: float | None = None,
+    ):
+        self.redis = redis
+        self.prefix = prefix
+        self.lease_ttl = lease_ttl or RedisConfig.lease_ttl
+        self.poll_interval = poll_interval
+        # followers notice a released lease within one poll interval
+        self.failure_ttl = failure_ttl or poll_interval * 3
+        self.owner = get_node_id()
+        self.inflight: dict[str, asyncio.Future] = {}
+
+    async def do(
+        self,
+        key: str,
+        leader: Callable[[], Awaitable[T]],
+        follower: Callable[[], Awaitable[T | None]],
+    ) -> tuple[T, bool]:
+        """Return (value, shared); shared is False only for the caller that ran ``leader``"""
+        future = self.inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future), True
+
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            value, shared = await self._claim_or_follow(key, leader, follower)
+            future.set_result(value)
+            return value, shared
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self.inflight[key]
+
+    async def _claim_or_follow(
+        self,
+        key: str,
+        leader: Callable[[], Awaitable[T]],
+        follower: Callable[[], Awaitable[T | None]],
+    ) -> tuple[T, bool]:
+        lease_key = f"{self.prefix}{key}"
+        while True:
+            if await self.redis.acquire_lease(lease_key, self.owner, self.lease_ttl):
+                renewer = asyncio.create_task(self._keep_lease(lease_key))
+                handed_off = False
+                try:
+                    return await leader(), False
+                except asyncio.CancelledError:
+                    # the execution keeps running: let the lease expire for the node that recovers it
+                    handed_off = True
+                    raise
+                except Exception as e:
+                    await self._mark_failed(lease_key, e)
+                    raise
+                finally:
+                    renewer.cancel()
+                    if not handed_off:
+                        await self.redis.release_lease(lease_key, self.owner)
+
+            logging.info(f"Waiting for in-flight execution on another node: {key}")
+            leader_owner = None
+            while (lease_owner := await self.redis.get_lease_owner(lease_key)) is not None:
+                leader_owner = lease_owner
+                value = await follower()
+                if value is not None:
+                    return value, True
+                await asyncio.sleep(self.poll_interval)
+
+            value = await follower()
+            if value is not None:
+                return value, True
+            failure = await self._failure(lease_key, leader_owner)
+            if failure is not None:
+                raise LeaderFailedError(f"In-flight execution of {key} failed on {failure['owner']}: {failure['error']}")
+
+    async def _mark_failed(self, lease_key: str, error: Exception) -> None:
+        try:
+            marker = json.dumps({"owner": self.owner, "error": str(error)})
+            await self.redis.set_marker(f"{lease_key}:failed", marker, self.failure_ttl)
+        except Exception as e:
+            logging.error(f"Recording failure marker failed {lease_key}: {str(e)}")
+
+    async def _failure(self, lease_key: str, leader_owner: str | None) -> dict | None:
+        """Failure marker of the leader this follower waited for (any recent one if it saw none)"""
+        marker = await self.redis.get_marker(f"{lease_key}:failed")
+        if marker is None:
+            return None
+        failure = json.loads(marker)
+        if leader_owner is not None and failure.get("owner") != leader_owner:
+            return None
+        return failure
+
+    async def _keep_lease(self, lease_key: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                if not await self.redis.renew_lease(lease_key, self.owner, self.lease_ttl):
+                    logging.warning(f"Lease lost: {lease_key}")
+                    return
+            except Exception as e:
+                logging.error(f"Lease renewal failed {lease_key}: {str(e)}")
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable
+
+from azure.batch.models import TaskAddParameter, TaskAddStatus
+
+from src.config.batch_config import BatchConfig
+from src.exceptions import BatchJobError, BatchTaskError
+from src.service.batch_client import AsyncBatchClient
+from src.service.job_manager import JobManager
+from src.utils.metrics import BATCH_SUBMIT_SECONDS
+
+# task.add_collection API limit
+MAX_TASKS_PER_CALL = 100
+MAX_SERVER_ERROR_RETRIES = 2
+
+# job_id -> TaskAddParameter (the task's output path depends on the job it lands in)
+TaskBuilder = Callable[[str], TaskAddParameter]
+
+
+@dataclass
+class _PendingTask:
+    build: TaskBuilder
+    future: asyncio.Future
+
+
+class TaskPacker:
+    """Packs tasks submitted within a short window into the job manager's job.
+
+    A background task collects submissions for ``window`` seconds (or until
+    ``max_tasks`` are waiting), reserves room for them in the long-lived job
+    of ``job_manager`` and adds them with ``task.add_collection`` in chunks of
+    100, so a pack costs ``ceil(n / 100)`` control-plane calls instead of one
+    per request.
+    """
+
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient,
+        job_manager: JobManager,
+        window: float | None = None,
+        max_tasks: int | None = None,
+    ):
+        self.batch_client = batch_client
+        self.job_manager = job_manager
+        self.window = window if window is not None else BatchConfig.pack_window
+        self.max_tasks = max(1, max_tasks or BatchConfig.pack_max_tasks)
+        self.queue: asyncio.Queue[_PendingTask] = asyncio.Queue()
+        self._runner: asyncio.Task | None = None
+        self._packs: set[asyncio.Task] = set()
+
+    async def submit(self, build: TaskBuilder) -> str:
+        """Queue a task and return the id of the job it was added to"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put(_PendingTask(build, future))
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run())
+        return await future
+
+    async def close(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+
+    def _drain(self, limit: int) -> list[_PendingTask]:
+        pending = []
+        while len(pending) < limit and not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        return pending
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self.queue.get()]
+            deadline = loop.time() + self.window
+            while len(pending) < self.max_tasks:
+                pending.extend(self._drain(self.max_tasks - len(pending)))
+                timeout = deadline - loop.time()
+                if len(pending) >= self.max_tasks or timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # packs are submitted concurrently so a slow one does not hold back the next window
+            task = asyncio.create_task(self._submit_pack(pending))
+            self._packs.add(task)
+            task.add_done_callback(self._packs.discard)
+
+    async def _submit_pack(self, pending: list[_PendingTask]) -> None:
+        try:
+            job_id = await self.job_manager.acquire(len(pending))
+        except Exception as e:
+            error = BatchJobError(f"Failed to create batch job: {str(e)}")
+            for item in pending:
+                self._resolve(item, error=error)
+            return
+
+        tasks: dict[str, tuple[_PendingTask, TaskAddParameter]] = {}
+        for item in pending:
+            try:
+                task = item.build(job_id)
+            except Exception as e:
+                self._resolve(item, error=e)
+                continue
+            if task.id in tasks:
+                # task ids must be unique within a job: move the duplicate to the next pack
+                self.queue.put_nowait(item)
+                continue
+            tasks[task.id] = (item, task)
+
+        for start in range(0, len(tasks), MAX_TASKS_PER_CALL):
+            chunk = list(tasks.values())[start:start + MAX_TASKS_PER_CALL]
+            await self._add_chunk(job_id, chunk)
+        logging.info(f"Packed {len(tasks)} tasks into batch job {job_id}")
+
+    async def _add_chunk(self, job_id: str, chunk: list[tuple[_PendingTask, TaskAddParameter]]) -> None:
+        for attempt in range(MAX_SERVER_ERROR_RETRIES + 1):
+            try:
+                with BATCH_SUBMIT_SECONDS.time(operation="add_task_collection"):
+                    result = await self.batch_client.add_task_collection(job_id, [task for _, task in chunk])
+            except Exception as e:
+                error = BatchTaskError(f"Failed to create batch tasks: {str(e)}")
+                for item, _ in chunk:
+                    self._resolve(item, error=error)
+                return
+
+            by_id = {item_task.id: (item, item_task) for item, item_task in chunk}
+            retry = []
+            for task_result in result.value:
+                entry = by_id.pop(task_result.task_id, None)
+                if entry is None:
+                    continue
+                item, task = entry
+                if task_result.status == TaskAddStatus.success:
+                    self._resolve(item, job_id)
+                elif task_result.status == TaskAddStatus.server_error and attempt < MAX_SERVER_ERROR_RETRIES:
+                    retry.append((item, task))
+                else:
+                    error = task_result.error
+                    message = error.message.value if error is not None and error.message else task_result.status
+                    self._resolve(item, error=BatchTaskError(f"Failed to create batch task {task.id}: {message}"))
+            # tasks missing from the response were not added
+            retry.extend(by_id.values())
+            if not retry:
+                return
+            chunk = retry
+        for item, task in chunk:
+            self._resolve(item, error=BatchTaskError(f"Failed to create batch task {task.id}"))
+
+    @staticmethod
+    def _resolve(item: _PendingTask, job_id: str | None = None, error: Exception | None = None) -> None:
+        if item.future.done():
+            return
+        if error is None:
+            item.future.set_result(job_id)
+        else:
+            item.future.set_exception(error)
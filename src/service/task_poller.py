@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from azure.batch.models import BatchErrorException, CloudTask, TaskState
+
+from src.config.batch_config import BatchConfig
+from src.service.batch_client import AsyncBatchClient
+
+# throttling and transient service errors: retry the poll instead of failing the waiters
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+# list polls a watched task may be missing from before it is fetched on its own (deleted task, terminated job)
+MAX_LIST_MISSES = 5
+
+
+def is_retryable(error: BatchErrorException) -> bool:
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) in RETRYABLE_STATUS_CODES
+
+
+@dataclass
+class _WatchedTask:
+    job_id: str
+    task_id: str
+    future: asyncio.Future
+    registered_at: float = field(default_factory=time.monotonic)
+    next_poll_at: float = field(default_factory=time.monotonic)
+    waiters: int = 0
+    list_misses: int = 0  # consecutive list polls that did not return the task as completed
+
+
+class BatchTaskPoller:
+    """Shared poller resolving one future per watched Batch task.
+
+    Instead of every job polling its own task once a second, all in-flight
+    tasks are polled from a single loop. Tasks of the same job are fetched with
+    one filtered list call, the interval grows with task age (fresh tasks are
+    checked often, multi-hour ones rarely) and at most ``max_jobs_per_tick``
+    jobs are queried per tick, so the request rate stays bounded. The list call
+    only saves requests for long-lived jobs (``shared``/``packed`` modes); in
+    ``per_request`` mode every job holds one task and is polled with one get.
+    A task missing from ``MAX_LIST_MISSES`` list polls in a row is fetched on
+    its own, so a deleted task fails its waiters instead of hanging them.
+
+    Throttling (429) and 5xx responses back the job's next poll off
+    exponentially; only permanent errors such as a missing job or task fail
+    the waiters.
+    """
+
+    def __init__(
+        self,
+        batch_client: AsyncBatchClient,
+        min_interval: float | None = None,
+        max_interval: float | None = None,
+        backoff: float | None = None,
+        max_jobs_per_tick: int | None = None,
+    ):
+        self.batch_client = batch_client
+        self.min_interval = min_interval or BatchConfig.poll_min_interval
+        self.max_interval = max_interval or BatchConfig.poll_max_interval
+        self.backoff = backoff or BatchConfig.poll_backoff
+        self.max_jobs_per_tick = max_jobs_per_tick or BatchConfig.poll_max_jobs_per_tick
+        self.tasks: dict[tuple[str, str], _WatchedTask] = {}
+        self.failures: dict[str, int] = {}  # consecutive retryable errors per job
+        self._runner: asyncio.Task | None = None
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self.tasks)
+
+    async def wait(self, job_id: str, task_id: str) -> CloudTask:
+        """Wait until the task reaches the completed state and return it"""
+        key = (job_id, task_id)
+        watched = self.tasks.get(key)
+        if watched is None:
+            watched = _WatchedTask(job_id, task_id, asyncio.get_running_loop().create_future())
+            self.tasks[key] = watched
+            self._wakeup.set()
+            if self._runner is None or self._runner.done():
+                self._runner = asyncio.create_task(self._run())
+
+        watched.waiters += 1
+        try:
+            return await asyncio.shield(watched.future)
+        finally:
+            watched.waiters -= 1
+            if watched.waiters == 0 and self.tasks.get(key) is watched:
+                del self.tasks[key]
+
+    def _interval(self, watched: _WatchedTask, now: float) -> float:
+        age = now - watched.registered_at
+        return min(self.max_interval, max(self.min_interval, age * self.backoff))
+
+    async def _run(self) -> None:
+        while self.tasks:
+            now = time.monotonic()
+            due: dict[str, float] = {}
+            for watched in self.tasks.values():
+                if watched.next_poll_at <= now and not watched.future.done():
+                    due[watched.job_id] = min(due.get(watched.job_id, now), watched.next_poll_at)
+
+            # oldest overdue jobs first, bounded number of Batch calls per tick
+            job_ids = sorted(due, key=due.get)[: self.max_jobs_per_tick]
+            if job_ids:
+                await asyncio.gather(*(self._poll_job(job_id) for job_id in job_ids))
+
+            pending = [w.next_poll_at for w in self.tasks.values() if not w.future.done()]
+            if not pending:
+                await asyncio.sleep(0)
+                continue
+            delay = max(0.0, min(pending) - time.monotonic())
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(delay, 0.05))
+            except asyncio.TimeoutError:
+                pass
+        self.failures.clear()
+        logging.info("Batch task poller idle")
+
+    async def _poll_job(self, job_id: str) -> None:
+        watched = {w.task_id: w for w in self.tasks.values() if w.job_id == job_id and not w.future.done()}
+        if not watched:
+            return
+
+        try:
+            if len(watched) == 1:
+                (task_id,) = watched
+                tasks = [await self.batch_client.get_task(job_id, task_id)]
+            else:
+                tasks = await self.batch_client.list_tasks(
+                    job_id,
+                    filter="state eq 'completed'",
+                    select="id,state,executionInfo",
+                )
+        except BatchErrorException as e:
+            if is_retryable(e):
+                self._back_off(job_id, watched.values(), e)
+                return
+            self.failures.pop(job_id, None)
+            for w in watched.values():
+                if not w.future.done():
+                    w.future.set_exception(e)
+            return
+        except Exception as e:
+            self._back_off(job_id, watched.values(), e)
+            return
+
+        self.failures.pop(job_id, None)
+        for task in tasks:
+            w = watched.get(task.id)
+            if w and task.state == TaskState.completed and not w.future.done():
+                w.future.set_result(task)
+
+        if len(watched) > 1:
+            missing = [w for w in watched.values() if not w.future.done()]
+            for w in missing:
+                w.list_misses += 1
+            await asyncio.gather(*(self._get_missing(w) for w in missing if w.list_misses >= MAX_LIST_MISSES))
+
+        now = time.monotonic()
+        for w in watched.values():
+            w.next_poll_at = now + self._interval(w, now)
+
+    async def _get_missing(self, watched: _WatchedTask) -> None:
+        """Fetch a task the list polls keep missing: fail its waiters if it no longer exists"""
+        watched.list_misses = 0
+        try:
+            task = await self.batch_client.get_task(watched.job_id, watched.task_id)
+        except BatchErrorException as e:
+            if not is_retryable(e) and not watched.future.done():
+                watched.future.set_exception(e)
+            return
+        except Exception as e:
+            logging.warning(f"Fetching batch task {watched.job_id}/{watched.task_id} failed: {str(e)}")
+            return
+        if task.state == TaskState.completed and not watched.future.done():
+            watched.future.set_result(task)
+
+    def _back_off(self, job_id: str, watched: Iterable[_WatchedTask], error: Exception) -> None:
+        failures = self.failures[job_id] = self.failures.get(job_id, 0) + 1
+        delay = min(self.max_interval, self.min_interval * 2 ** failures)
+        logging.warning(f"Polling batch job {job_id} failed ({failures}x), retrying in {delay:.0f}s: {str(error)}")
+        now = time.monotonic()
+        for w in watched:
+            w.next_poll_at = now + max(delay, self._interval(w, now))
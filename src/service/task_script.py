@@ -0,0 +1,74 @@
+"""Shell wrapper run on the compute node around every request command.
+
+The command runs in the task working directory with ``RESULT_DIR`` pointing at
+``results/``; its stdout/stderr go to ``results/output.txt`` and any other file
+it writes under ``RESULT_DIR`` is a result file too. Afterwards every result
+file is staged into ``upload/`` (compressed with gzip/zstd when it is larger
+than the threshold) and described in ``upload/manifest.json`` with its size and
+sha256. ``upload/`` is what the OutputFile uploads to blob storage.
+
+The script and the command are passed as environment variables, so the
+command needs no extra quoting.
+"""
+from azure.batch.models import EnvironmentSetting
+
+from src.config.batch_config import BatchConfig
+from src.dto.result_manifest import PRIMARY_FILE
+
+RESULT_DIR = "results"
+UPLOAD_DIR = "upload"
+MANIFEST_FILE = "manifest.json"
+# paths relative to the task directory on the node (for file.get_from_task)
+NODE_OUTPUT_FILE = f"wd/{RESULT_DIR}/{PRIMARY_FILE}"
+NODE_MANIFEST_FILE = f"wd/{UPLOAD_DIR}/{MANIFEST_FILE}"
+
+COMMAND_LINE = "/bin/bash -c 'eval \"$JOB_SCRIPT\"'"
+
+NODE_SCRIPT = r"""
+cd "$AZ_BATCH_TASK_WORKING_DIR" || exit 1
+mkdir -p results upload
+export RESULT_DIR="$PWD/results"
+( eval "$JOB_COMMAND" ) > results/output.txt 2>&1
+rc=$?
+
+manifest="$PWD/manifest.tmp"
+printf '{"exit_code": %d, "files": [' "$rc" > "$manifest"
+cd results
+sep=""
+while IFS= read -r f; do
+    mkdir -p "../upload/$(dirname "$f")"
+    size=$(stat -c %s "$f")
+    name="$f"
+    comp=""
+    if [ "$JOB_COMPRESSION" != "none" ] && [ "$size" -ge "$JOB_COMPRESS_MIN_BYTES" ]; then
+        case "$JOB_COMPRESSION" in
+            gzip) name="$f.gz"; gzip -c "$f" > "../upload/$name" && comp="gzip" ;;
+            zstd) name="$f.zst"; zstd -q -c "$f" > "../upload/$name" && comp="zstd" ;;
+        esac
+        if [ -z "$comp" ]; then rm -f "../upload/$name"; name="$f"; fi
+    fi
+    if [ -z "$comp" ]; then
+        ln -f "$f" "../upload/$f" 2>/dev/null || cp "$f" "../upload/$f"
+    fi
+    usize=$(stat -c %s "../upload/$name")
+    sum=$(sha256sum "../upload/$name" | cut -d' ' -f1)
+    esc=$(printf '%s' "$name" | sed 's/\\/\\\\/g; s/"/\\"/g')
+    if [ -n "$comp" ]; then cjson="\"$comp\""; else cjson="null"; fi
+    printf '%s{"path": "%s", "size": %s, "sha256": "%s", "compression": %s, "original_size": %s}' \
+        "$sep" "$esc" "$usize" "$sum" "$cjson" "$size" >> "$manifest"
+    sep=", "
+done < <(find . -type f | sed 's|^\./||' | sort)
+printf ']}' >> "$manifest"
+mv "$manifest" ../upload/manifest.json
+exit $rc
+"""
+
+
+def task_environment(command: str) -> list[EnvironmentSetting]:
+    """Environment carrying the wrapper script, the command and the compression settings"""
+    return [
+        EnvironmentSetting(name="JOB_SCRIPT", value=NODE_SCRIPT),
+        EnvironmentSetting(name="JOB_COMMAND", value=command),
+        EnvironmentSetting(name="JOB_COMPRESSION", value=BatchConfig.output_compression),
+        EnvironmentSetting(name="JOB_COMPRESS_MIN_BYTES", value=str(BatchConfig.output_compress_min_bytes)),
+    ]
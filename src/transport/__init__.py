@@ -0,0 +1,27 @@
+from src.config.server_config import ServerConfig
+from src.transport.base import IncomingMessage, OutgoingMessage, Sender, SessionReceiver, Transport
+
+
+def create_transport(name: str | None = None) -> Transport:
+    """설정된 broker backend 생성 (servicebus, memory, redis)"""
+    name = (name or ServerConfig.transport).lower()
+    if name == "servicebus":
+        from src.transport.servicebus import ServiceBusTransport
+        return ServiceBusTransport()
+    if name == "memory":
+        from src.transport.memory import InMemoryTransport
+        return InMemoryTransport()
+    if name == "redis":
+        from src.transport.redis_streams import RedisStreamsTransport
+        return RedisStreamsTransport()
+    raise ValueError(f"Unknown transport: {name}")
+
+
+__all__ = [
+    "IncomingMessage",
+    "OutgoingMessage",
+    "Sender",
+    "SessionReceiver",
+    "Transport",
+    "create_transport",
+]
@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator
+
+
+@dataclass
+class IncomingMessage:
+    """Message received from a session, independent of the broker"""
+    body: bytes
+    session_id: str
+    sequence_number: int
+    content_type: str | None = None
+    application_properties: dict[str, Any] = field(default_factory=dict)
+    enqueued_time: datetime | None = None
+    raw: Any = None  # backend specific handle used to settle the message
+
+    def __str__(self) -> str:
+        return self.body.decode("utf-8")
+
+
+@dataclass
+class OutgoingMessage:
+    """Message to publish to a session"""
+    body: bytes | str
+    session_id: str
+    content_type: str | None = None
+    application_properties: dict[str, Any] | None = None
+
+
+class SessionReceiver(ABC):
+    """Exclusive receiver of one session"""
+    session_id: str
+
+    @abstractmethod
+    async def set_state(self, state: str) -> None: ...
+
+    @abstractmethod
+    async def get_state(self) -> str | None: ...
+
+    @abstractmethod
+    async def complete(self, message: IncomingMessage) -> None: ...
+
+    @abstractmethod
+    def __aiter__(self) -> AsyncIterator[IncomingMessage]:
+        """Yield messages until the session is idle for the receiver's wait time"""
+
+
+class Sender(ABC):
+    @abstractmethod
+    async def send(self, messages: list[OutgoingMessage]) -> None:
+        """Send messages in as few round trips as the backend allows, keeping their order.
+
+        Raises MessageTooLargeError when a single message can never be sent and
+        TransportError on other failures; their ``sent`` attribute tells how many
+        leading messages were delivered and must not be sent again.
+        """
+
+
+class Transport(ABC):
+    """Broker abstraction covering session receive, settle, session state and send"""
+
+    async def __aenter__(self) -> "Transport":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        return None
+
+    @abstractmethod
+    def accept_session(
+        self,
+        queue_name: str,
+        max_wait_time: float,
+        prefetch_count: int = 0,
+        session_id: str | None = None,
+    ) -> AbstractAsyncContextManager[SessionReceiver]:
+        """Lock the given (or next available) session.
+
+        Raises SessionNotAvailableError when nothing arrives within max_wait_time.
+        """
+
+    @abstractmethod
+    def get_sender(self, queue_name: str) -> AbstractAsyncContextManager[Sender]: ...
+
+    async def queue_depth(self, queue_name: str) -> int | None:
+        """Messages waiting in the queue, or None when the backend cannot tell"""
+        return None
@@ -0,0 +1,174 @@
+import asyncio
+import itertools
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from src.exceptions import SessionNotAvailableError
+from src.transport.base import IncomingMessage, OutgoingMessage, Sender, SessionReceiver, Transport
+
+
+class _Session:
+    def __init__(self):
+        self.messages: deque[IncomingMessage] = deque()
+        self.arrived = asyncio.Event()
+        self.locked = False
+        self.state: str | None = None
+
+
+class _Queue:
+    def __init__(self):
+        self.sessions: dict[str, _Session] = {}
+        self.ready: deque[str] = deque()
+        self.ready_changed = asyncio.Event()
+
+    def session(self, session_id: str) -> _Session:
+        return self.sessions.setdefault(session_id, _Session())
+
+    def mark_ready(self, session_id: str) -> None:
+        if session_id not in self.ready:
+            self.ready.append(session_id)
+            self.ready_changed.set()
+
+
+class InMemoryBroker:
+    """Process-local queues with session semantics, shared by every InMemoryTransport"""
+    _default: "InMemoryBroker | None" = None
+
+    def __init__(self):
+        self.queues: dict[str, _Queue] = {}
+        self._sequence = itertools.count(1)
+
+    @classmethod
+    def default(cls) -> "InMemoryBroker":
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def queue(self, name: str) -> _Queue:
+        return self.queues.setdefault(name, _Queue())
+
+    def publish(self, queue_name: str, message: OutgoingMessage) -> None:
+        queue = self.queue(queue_name)
+        session = queue.session(message.session_id)
+        body = message.body.encode("utf-8") if isinstance(message.body, str) else message.body
+        session.messages.append(
+            IncomingMessage(
+                body=body,
+                session_id=message.session_id,
+                sequence_number=next(self._sequence),
+                content_type=message.content_type,
+                application_properties=dict(message.application_properties or {}),
+                enqueued_time=datetime.now(timezone.utc),
+            )
+        )
+        session.arrived.set()
+        if not session.locked:
+            queue.mark_ready(message.session_id)
+
+
+class InMemorySessionReceiver(SessionReceiver):
+    def __init__(self, session_id: str, session: _Session, max_wait_time: float):
+        self.session_id = session_id
+        self._session = session
+        self._max_wait_time = max_wait_time
+        self.unsettled: list[IncomingMessage] = []
+
+    async def set_state(self, state: str) -> None:
+        self._session.state = state
+
+    async def get_state(self) -> str | None:
+        return self._session.state
+
+    async def complete(self, message: IncomingMessage) -> None:
+        if message in self.unsettled:
+            self.unsettled.remove(message)
+
+    async def __aiter__(self) -> AsyncIterator[IncomingMessage]:
+        while True:
+            if not self._session.messages:
+                self._session.arrived.clear()
+                try:
+                    await asyncio.wait_for(self._session.arrived.wait(), self._max_wait_time)
+                except asyncio.TimeoutError:
+                    return
+                continue
+            message = self._session.messages.popleft()
+            self.unsettled.append(message)
+            yield message
+
+
+class InMemorySender(Sender):
+    def __init__(self, broker: InMemoryBroker, queue_name: str):
+        self._broker = broker
+        self._queue_name = queue_name
+
+    async def send(self, messages: list[OutgoingMessage]) -> None:
+        for message in messages:
+            self._broker.publish(self._queue_name, message)
+
+
+class InMemoryTransport(Transport):
+    """In-process backend for local load testing and running without network access"""
+
+    def __init__(self, broker: InMemoryBroker | None = None):
+        self.broker = broker or InMemoryBroker.default()
+
+    @asynccontextmanager
+    async def accept_session(
+        self,
+        queue_name: str,
+        max_wait_time: float,
+        prefetch_count: int = 0,
+        session_id: str | None = None,
+    ) -> AsyncIterator[InMemorySessionReceiver]:
+        queue = self.broker.queue(queue_name)
+        session_id = await self._lock_session(queue, max_wait_time, session_id)
+        session = queue.session(session_id)
+        receiver = InMemorySessionReceiver(session_id, session, max_wait_time)
+        try:
+            yield receiver
+        finally:
+            # abandon unsettled messages so they are delivered again
+            session.messages.extendleft(reversed(receiver.unsettled))
+            session.locked = False
+            if session.messages:
+                queue.mark_ready(session_id)
+            queue.ready_changed.set()
+
+    async def _lock_session(self, queue: _Queue, max_wait_time: float, session_id: str | None) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait_time
+        while True:
+            if session_id is not None:
+                session = queue.session(session_id)
+                if not session.locked:
+                    session.locked = True
+                    if session_id in queue.ready:
+                        queue.ready.remove(session_id)
+                    return session_id
+            elif queue.ready:
+                candidate = queue.ready.popleft()
+                session = queue.session(candidate)
+                if not session.locked:
+                    session.locked = True
+                    return candidate
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                raise SessionNotAvailableError("No available session")
+            queue.ready_changed.clear()
+            try:
+                await asyncio.wait_for(queue.ready_changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def queue_depth(self, queue_name: str) -> int | None:
+        queue = self.broker.queue(queue_name)
+        return sum(len(session.messages) for session in queue.sessions.values())
+
+    @asynccontextmanager
+    async def get_sender(self, queue_name: str) -> AsyncIterator[InMemorySender]:
+        yield InMemorySender(self.broker, queue_name)
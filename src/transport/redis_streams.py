@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError, ResponseError
+
+from src.config.redis_config import RedisConfig
+from src.exceptions import SessionNotAvailableError, TransportError
+from src.repository.redis_repository import RENEW_LEASE_SCRIPT
+from src.transport.base import IncomingMessage, OutgoingMessage, Sender, SessionReceiver, Transport
+from src.utils.node import get_node_id
+
+GROUP = "workers"
+# Release a session lock only while still holding it. A session with entries
+# left (new or unsettled) is announced again, a drained one has its stream,
+# consumer group and state deleted. Runs atomically, so a concurrent send
+# cannot land in a stream that is being deleted.
+# KEYS: lock, stream, state, ready  ARGV: owner, session id
+RELEASE_SESSION_SCRIPT = """
+if redis.call('get', KEYS[1]) ~= ARGV[1] then
+    return -1
+end
+redis.call('del', KEYS[1])
+if redis.call('exists', KEYS[2]) == 1 and redis.call('xlen', KEYS[2]) > 0 then
+    redis.call('rpush', KEYS[4], ARGV[2])
+    return 1
+end
+redis.call('del', KEYS[2], KEYS[3])
+return 0
+"""
+
+
+class _Keys:
+    def __init__(self, prefix: str, queue_name: str):
+        self.base = f"{prefix}{queue_name}"
+        self.ready = f"{self.base}:ready"
+
+    def stream(self, session_id: str) -> str:
+        return f"{self.base}:s:{session_id}"
+
+    def lock(self, session_id: str) -> str:
+        return f"{self.base}:lock:{session_id}"
+
+    def state(self, session_id: str) -> str:
+        return f"{self.base}:state:{session_id}"
+
+
+class RedisStreamSessionReceiver(SessionReceiver):
+    def __init__(self, transport: "RedisStreamsTransport", keys: _Keys, session_id: str,
+                 max_wait_time: float, prefetch_count: int):
+        self.session_id = session_id
+        self._redis = transport.redis
+        self._consumer = transport.consumer
+        self._keys = keys
+        self._stream = keys.stream(session_id)
+        self._max_wait_time = max_wait_time
+        self._count = max(1, prefetch_count)
+
+    async def set_state(self, state: str) -> None:
+        await self._redis.set(self._keys.state(self.session_id), state)
+
+    async def get_state(self) -> str | None:
+        state = await self._redis.get(self._keys.state(self.session_id))
+        return state.decode("utf-8") if state is not None else None
+
+    async def complete(self, message: IncomingMessage) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.xack(self._stream, GROUP, message.raw)
+            pipe.xdel(self._stream, message.raw)
+            await pipe.execute()
+
+    async def __aiter__(self) -> AsyncIterator[IncomingMessage]:
+        # entries left pending by a consumer that died while holding this session (paged by the returned cursor)
+        start_id = "0-0"
+        while True:
+            cursor, entries, *_ = await self._redis.xautoclaim(
+                self._stream, GROUP, self._consumer, min_idle_time=0, start_id=start_id
+            )
+            for entry_id, fields in entries:
+                if fields:
+                    yield self._to_incoming(entry_id, fields)
+            start_id = cursor.decode("utf-8") if isinstance(cursor, bytes) else cursor
+            if start_id == "0-0":
+                break
+
+        while True:
+            response = await self._redis.xreadgroup(
+                GROUP, self._consumer, {self._stream: ">"},
+                count=self._count, block=int(self._max_wait_time * 1000),
+            )
+            if not response:
+                return
+            for _, stream_entries in response:
+                for entry_id, fields in stream_entries:
+                    yield self._to_incoming(entry_id, fields)
+
+    def _to_incoming(self, entry_id: bytes, fields: dict[bytes, bytes]) -> IncomingMessage:
+        millis, _, seq = entry_id.decode("utf-8").partition("-")
+        content_type = fields.get(b"content_type", b"").decode("utf-8") or None
+        return IncomingMessage(
+            body=fields[b"body"],
+            session_id=self.session_id,
+            sequence_number=int(millis) * 1000 + int(seq or 0),
+            content_type=content_type,
+            application_properties=json.loads(fields.get(b"properties", b"{}")),
+            enqueued_time=datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc),
+            raw=entry_id,
+        )
+
+
+class RedisStreamSender(Sender):
+    def __init__(self, redis: aioredis.Redis, keys: _Keys):
+        self._redis = redis
+        self._keys = keys
+
+    async def send(self, messages: list[OutgoingMessage]) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for message in messages:
+                    pipe.xadd(self._keys.stream(message.session_id), {
+                        "body": message.body,
+                        "content_type": message.content_type or "",
+                        "properties": json.dumps(message.application_properties or {}),
+                    })
+                    pipe.rpush(self._keys.ready, message.session_id)
+                await pipe.execute()
+        except RedisError as e:
+            raise TransportError(str(e)) from e
+
+
+class RedisStreamsTransport(Transport):
+    """Redis Streams backend with session semantics.
+
+    Each session is a stream read through the ``workers`` consumer group. A
+    session is announced on the ``ready`` list and owned through a renewed lock
+    key, so only one consumer reads a session at a time. Unsettled entries stay
+    pending and are claimed by the next owner of the session. A session left
+    empty when its owner lets go is deleted with its group and state.
+    """
+
+    def __init__(self, redis: aioredis.Redis | None = None, prefix: str = "broker:", lock_ttl: float | None = None):
+        self.redis = redis or aioredis.Redis(
+            host=RedisConfig.host,
+            port=RedisConfig.port,
+            password=RedisConfig.password,
+            ssl=False,
+        )
+        self.prefix = prefix
+        self.lock_ttl = lock_ttl or RedisConfig.lease_ttl
+        self.consumer = get_node_id()
+        self._renew_lock = self.redis.register_script(RENEW_LEASE_SCRIPT)
+        self._release_session = self.redis.register_script(RELEASE_SESSION_SCRIPT)
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.redis.close()
+
+    @asynccontextmanager
+    async def accept_session(
+        self,
+        queue_name: str,
+        max_wait_time: float,
+        prefetch_count: int = 0,
+        session_id: str | None = None,
+    ) -> AsyncIterator[RedisStreamSessionReceiver]:
+        keys = _Keys(self.prefix, queue_name)
+        try:
+            session_id = await self._lock_session(keys, max_wait_time, session_id)
+        except RedisError as e:
+            raise TransportError(str(e)) from e
+
+        renewer = asyncio.create_task(self._keep_lock(keys, session_id))
+        try:
+            try:
+                await self.redis.xgroup_create(keys.stream(session_id), GROUP, id="0", mkstream=True)
+            except ResponseError as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            yield RedisStreamSessionReceiver(self, keys, session_id, max_wait_time, prefetch_count)
+        finally:
+            renewer.cancel()
+            await self._release(keys, session_id)
+
+    async def _release(self, keys: _Keys, session_id: str) -> None:
+        """Unlock the session: re-announce it if messages arrived or stayed unsettled, otherwise delete its keys"""
+        released = await self._release_session(
+            keys=[keys.lock(session_id), keys.stream(session_id), keys.state(session_id), keys.ready],
+            args=[self.consumer, session_id],
+        )
+        if released == -1:
+            logging.warning(f"Session lock {session_id} was taken over by another consumer, leaving it")
+
+    async def _lock_session(self, keys: _Keys, max_wait_time: float, session_id: str | None) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait_time
+        while True:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                raise SessionNotAvailableError("No available session")
+
+            if session_id is not None:
+                if await self.redis.set(keys.lock(session_id), self.consumer, nx=True, px=int(self.lock_ttl * 1000)):
+                    return session_id
+                await asyncio.sleep(min(1.0, timeout))
+                continue
+
+            popped = await self.redis.blpop([keys.ready], timeout=max(1, int(timeout)))
+            if popped is None:
+                continue
+            candidate = popped[1].decode("utf-8")
+            if not await self.redis.set(keys.lock(candidate), self.consumer, nx=True, px=int(self.lock_ttl * 1000)):
+                continue
+            # the ready list may hold duplicates of a session that was already drained
+            if await self.redis.xlen(keys.stream(candidate)):
+                return candidate
+            await self._release(keys, candidate)
+
+    async def _keep_lock(self, keys: _Keys, session_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                renewed = await self._renew_lock(
+                    keys=[keys.lock(session_id)], args=[self.consumer, int(self.lock_ttl * 1000)]
+                )
+                if not renewed:
+                    logging.warning(f"Session lock {session_id} lost, no longer renewed")
+                    return
+            except RedisError as e:
+                logging.error(f"Session lock renewal failed {session_id}: {str(e)}")
+
+    async def queue_depth(self, queue_name: str) -> int | None:
+        """Sessions announced on the ready list (approximate: a session may be listed twice)"""
+        try:
+            return await self.redis.llen(_Keys(self.prefix, queue_name).ready)
+        except RedisError as e:
+            raise TransportError(str(e)) from e
+
+    @asynccontextmanager
+    async def get_sender(self, queue_name: str) -> AsyncIterator[RedisStreamSender]:
+        yield RedisStreamSender(self.redis, _Keys(self.prefix, queue_name))
@@ -0,0 +1,156 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from azure.core.exceptions import ServiceRequestError
+from azure.servicebus import NEXT_AVAILABLE_SESSION, ServiceBusMessage, ServiceBusReceivedMessage
+from azure.servicebus.aio import AutoLockRenewer, ServiceBusClient, ServiceBusReceiver, ServiceBusSender
+from azure.servicebus.aio.management import ServiceBusAdministrationClient
+from azure.servicebus.exceptions import MessageSizeExceededError, OperationTimeoutError, ServiceBusError
+
+from src.config.servicebus_config import ServiceBusConfig
+from src.exceptions import MessageTooLargeError, SessionNotAvailableError, TransportError
+from src.transport.base import IncomingMessage, OutgoingMessage, Sender, SessionReceiver, Transport
+
+
+def _decode(value):
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+class ServiceBusSessionReceiver(SessionReceiver):
+    def __init__(self, receiver: ServiceBusReceiver):
+        self._receiver = receiver
+        self.session_id = receiver.session.session_id
+
+    async def set_state(self, state: str) -> None:
+        await self._receiver.session.set_state(state)
+
+    async def get_state(self) -> str | None:
+        return _decode(await self._receiver.session.get_state())
+
+    async def complete(self, message: IncomingMessage) -> None:
+        await self._receiver.complete_message(message.raw)
+
+    async def __aiter__(self) -> AsyncIterator[IncomingMessage]:
+        async for message in self._receiver:
+            yield self._to_incoming(message)
+
+    def _to_incoming(self, message: ServiceBusReceivedMessage) -> IncomingMessage:
+        return IncomingMessage(
+            body=b"".join(message.body),
+            session_id=message.session_id,
+            sequence_number=message.sequence_number,
+            content_type=message.content_type,
+            application_properties={
+                _decode(k): _decode(v) for k, v in (message.application_properties or {}).items()
+            },
+            enqueued_time=message.enqueued_time_utc,
+            raw=message,
+        )
+
+
+class ServiceBusTransportSender(Sender):
+    def __init__(self, sender: ServiceBusSender):
+        self._sender = sender
+
+    async def send(self, messages: list[OutgoingMessage]) -> None:
+        sent = 0
+        try:
+            batch = await self._sender.create_message_batch()
+            batched = 0
+            for index, message in enumerate(messages):
+                sb_message = ServiceBusMessage(
+                    message.body,
+                    session_id=message.session_id,
+                    content_type=message.content_type,
+                    application_properties=message.application_properties,
+                )
+                try:
+                    batch.add_message(sb_message)
+                    batched += 1
+                    continue
+                except MessageSizeExceededError as e:
+                    if batched == 0:
+                        raise MessageTooLargeError(str(e), sent=index)
+                # current batch is full: send it and start a new one
+                await self._sender.send_messages(batch)
+                sent += batched
+                batch = await self._sender.create_message_batch()
+                batched = 0
+                try:
+                    batch.add_message(sb_message)
+                    batched += 1
+                except MessageSizeExceededError as e:
+                    raise MessageTooLargeError(str(e), sent=index)
+            if batched:
+                await self._sender.send_messages(batch)
+        except (ServiceBusError, ServiceRequestError) as e:
+            raise TransportError(str(e), sent=sent) from e
+
+
+class ServiceBusTransport(Transport):
+    """Azure Service Bus backend (session-enabled queues)"""
+
+    def __init__(self, connection_str: str | None = None):
+        self.connection_str = connection_str or ServiceBusConfig.connection_str
+        self.client: ServiceBusClient | None = None
+        self.lock_renewer: AutoLockRenewer | None = None
+        self.admin_client: ServiceBusAdministrationClient | None = None
+
+    async def __aenter__(self) -> "ServiceBusTransport":
+        self.client = ServiceBusClient.from_connection_string(self.connection_str)
+        await self.client.__aenter__()
+        # 세션 lock을 자동 연장 (한 세션에서 여러 시간 동안 메시지를 처리하므로)
+        self.lock_renewer = AutoLockRenewer(max_lock_renewal_duration=ServiceBusConfig.lock_renewal_duration)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.lock_renewer.close()
+        if self.admin_client is not None:
+            await self.admin_client.close()
+            self.admin_client = None
+        await self.client.__aexit__(exc_type, exc, tb)
+
+    async def queue_depth(self, queue_name: str) -> int | None:
+        """Active message count from the queue runtime properties (management API)"""
+        if self.admin_client is None:
+            self.admin_client = ServiceBusAdministrationClient.from_connection_string(self.connection_str)
+        try:
+            properties = await self.admin_client.get_queue_runtime_properties(queue_name)
+        except (ServiceBusError, ServiceRequestError) as e:
+            raise TransportError(str(e)) from e
+        return properties.active_message_count
+
+    @asynccontextmanager
+    async def accept_session(
+        self,
+        queue_name: str,
+        max_wait_time: float,
+        prefetch_count: int = 0,
+        session_id: str | None = None,
+    ) -> AsyncIterator[ServiceBusSessionReceiver]:
+        acquired = False
+        try:
+            async with self.client.get_queue_receiver(
+                queue_name=queue_name,
+                session_id=session_id or NEXT_AVAILABLE_SESSION,
+                max_wait_time=max_wait_time,
+                prefetch_count=prefetch_count,
+                auto_lock_renewer=self.lock_renewer,
+            ) as receiver:
+                if not receiver.session:
+                    raise SessionNotAvailableError("No available session")
+                acquired = True
+                yield ServiceBusSessionReceiver(receiver)
+        except OperationTimeoutError as e:
+            if acquired:
+                raise TransportError(str(e)) from e
+            raise SessionNotAvailableError(str(e)) from e
+        except (ServiceBusError, ServiceRequestError) as e:
+            if not acquired and "timeout" in str(e).lower():
+                raise SessionNotAvailableError(str(e)) from e
+            raise TransportError(str(e)) from e
+
+    @asynccontextmanager
+    async def get_sender(self, queue_name: str) -> AsyncIterator[ServiceBusTransportSender]:
+        async with self.client.get_queue_sender(queue_name=queue_name) as sender:
+            yield ServiceBusTransportSender(sender)
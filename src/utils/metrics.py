@@ -0,0 +1,295 @@
+"""Prometheus text-format metrics for the job pipeline.
+
+Metrics are process-local and kept in a module-level registry. The server
+exposes them with ``MetricsServer`` on ``GET /metrics``; gauges whose value
+lives elsewhere (Redis, the task poller) are computed at scrape time through
+``Gauge.set_function``.
+"""
+import asyncio
+import bisect
+import functools
+import inspect
+import logging
+import math
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Iterator
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600)
+
+LabelValues = tuple[str, ...]
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: dict[str, str] | None = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    type: str = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    async def collect(self) -> list[str]:
+        raise NotImplementedError
+
+    async def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(await self.collect())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    async def collect(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+        self._function: Callable[[], float | Awaitable[float]] | None = None
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float | Awaitable[float]]) -> None:
+        """Compute the (unlabelled) value at scrape time; ``function`` may be a coroutine function"""
+        self._function = function
+
+    async def collect(self) -> list[str]:
+        if self._function is not None:
+            try:
+                value = self._function()
+                if inspect.isawaitable(value):
+                    value = await value
+                self._values[()] = value
+            except Exception as e:
+                logging.warning(f"Metric {self.name} collection failed: {str(e)}")
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: bucket counts (non-cumulative, last one is +Inf), sum
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    async def collect(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = {"le": _format_value(bound) if math.isinf(bound) else repr(bound)}
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> Metric | None:
+        return self._metrics.get(name)
+
+    async def render(self) -> str:
+        parts = [await metric.render() for metric in self._metrics.values()]
+        return "\n".join(parts) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+# pipeline stages
+SESSION_ACQUIRE_SECONDS = histogram(
+    "jobserver_session_acquire_seconds", "Time to acquire a session from the broker", ("outcome",)
+)
+QUEUE_WAIT_SECONDS = histogram(
+    "jobserver_queue_wait_seconds", "Time from broker enqueue until processing starts"
+)
+DB_CALL_SECONDS = histogram(
+    "jobserver_db_call_seconds", "Database call latency per repository method", ("repository", "method"),
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+BATCH_SUBMIT_SECONDS = histogram(
+    "jobserver_batch_submit_seconds", "Latency of Batch job/task submission calls", ("operation",)
+)
+TASK_RUNTIME_SECONDS = histogram(
+    "jobserver_task_runtime_seconds", "Time from Batch task submission (or reattach) until it completes", ("result",)
+)
+RESPONSE_SEND_SECONDS = histogram(
+    "jobserver_response_send_seconds", "Latency of sending one response batch to the broker", ("outcome",)
+)
+SCHEDULER_WAIT_SECONDS = histogram(
+    "jobserver_scheduler_wait_seconds", "Time an admitted request waits in the scheduler for a running slot"
+)
+REQUESTS_TOTAL = counter(
+    "jobserver_requests_total", "Processed request messages", ("status",)
+)
+RESULT_CACHE_LOOKUPS_TOTAL = counter(
+    "jobserver_result_cache_lookups_total", "Completed-result cache lookups", ("outcome",)
+)
+
+# gauges
+ACTIVE_WORKERS = gauge("jobserver_active_workers", "Session workers currently running")
+WORKER_LIMIT = gauge("jobserver_worker_limit", "Current session worker limit")
+INFLIGHT_BATCH_TASKS = gauge("jobserver_inflight_batch_tasks", "Batch tasks currently awaited by this process")
+REDIS_TASK_STATES = gauge("jobserver_redis_task_states", "Task states stored in Redis (fleet-wide)")
+RESULT_CACHE_HIT_RATIO = gauge("jobserver_result_cache_hit_ratio", "Hit ratio of the completed-result cache")
+SCHEDULER_QUEUED = gauge("jobserver_scheduler_queued", "Requests waiting in the scheduler for a running slot")
+POOL_AVAILABLE_SLOTS = gauge(
+    "jobserver_pool_available_slots", "Free Batch pool task slots minus queued tasks at the last sample"
+)
+AUTOSCALE_TARGET_NODES = gauge(
+    "jobserver_autoscale_target_nodes", "Pool size computed by the autoscaler at its last evaluation (leader only)"
+)
+SESSION_ADMISSION_OPEN = gauge(
+    "jobserver_session_admission_open", "1 while new sessions are accepted, 0 while the Batch pool is full"
+)
+
+
+def db_call(fn: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+    """Record a repository coroutine method in DB_CALL_SECONDS, labelled by class and method name"""
+    repository = fn.__qualname__.split(".")[0]
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with DB_CALL_SECONDS.time(repository=repository, method=fn.__name__):
+            return await fn(*args, **kwargs)
+
+    return wrapper
+
+
+class MetricsServer:
+    """Minimal HTTP endpoint serving ``GET /metrics`` from the registry"""
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 9000, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        logging.info(f"Metrics endpoint listening on {self.host}:{self.port}/metrics")
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # skip headers
+            while await asyncio.wait_for(reader.readline(), timeout=5) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, content_type = "200 OK", "text/plain; version=0.0.4; charset=utf-8"
+                body = (await self.registry.render()).encode("utf-8")
+            else:
+                status, content_type, body = "404 Not Found", "text/plain; charset=utf-8", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError) as e:
+            logging.debug(f"Metrics request failed: {str(e)}")
+        finally:
+            writer.close()
@@ -0,0 +1,8 @@
+import os
+
+from src.config.server_config import ServerConfig
+
+
+def get_node_id() -> str:
+    """현재 프로세스를 식별하는 id (호스트명:pid)"""
+    return f"{ServerConfig.node_name}:{os.getpid()}"
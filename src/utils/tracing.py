@@ -0,0 +1,220 @@
+"""Span-based tracing with W3C ``traceparent`` propagation.
+
+The current span lives in a context variable, so it follows ``await`` and is
+inherited by tasks created inside it. Trace context crosses the broker as a
+``traceparent`` application property: the sender calls ``inject`` and the
+receiver passes ``extract(...)`` as the parent of its first span.
+
+Finished spans go to the configured exporter (``TRACE_EXPORTER``):
+``none`` (default), ``console`` (log lines) or ``file`` (JSON lines at
+``TRACE_FILE``). Any object with ``export(span)`` can be installed with
+``set_exporter``.
+"""
+import functools
+import json
+import logging
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from typing import Any, Awaitable, Callable, Iterator
+
+from src.config.server_config import ServerConfig
+
+TRACEPARENT = "traceparent"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, value: str) -> "SpanContext | None":
+        parts = value.strip().split("-")
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            flags = int(parts[3], 16)
+            int(parts[1], 16), int(parts[2], 16)
+        except ValueError:
+            return None
+        if parts[1] == "0" * 32 or parts[2] == "0" * 16:
+            return None
+        return cls(trace_id=parts[1], span_id=parts[2], sampled=bool(flags & 1))
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None = None
+    start_time: float = field(default_factory=time.time)
+    end_time: float | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+    status: str = "ok"
+    error: str | None = None
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id)
+
+    @property
+    def duration(self) -> float | None:
+        return None if self.end_time is None else self.end_time - self.start_time
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["duration_ms"] = None if self.duration is None else self.duration * 1000
+        return data
+
+
+class SpanExporter:
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class NoopSpanExporter(SpanExporter):
+    def export(self, span: Span) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """Writes one log line per finished span"""
+
+    def __init__(self, logger: logging.Logger | None = None):
+        self.logger = logger or logging.getLogger("tracing")
+
+    def export(self, span: Span) -> None:
+        self.logger.info(
+            f"span {span.name} trace={span.trace_id} span={span.span_id} parent={span.parent_id} "
+            f"{span.duration * 1000:.2f}ms {span.status} {span.attributes}"
+        )
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans as JSON lines for offline analysis"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+_exporter: SpanExporter | None = None
+
+
+def create_exporter(name: str | None = None) -> SpanExporter:
+    """설정된 span exporter 생성 (none, console, file)"""
+    name = (name or ServerConfig.trace_exporter).lower()
+    if name in ("", "none"):
+        return NoopSpanExporter()
+    if name == "console":
+        return ConsoleSpanExporter()
+    if name == "file":
+        return FileSpanExporter(ServerConfig.trace_file)
+    raise ValueError(f"Unknown trace exporter: {name}")
+
+
+def get_exporter() -> SpanExporter:
+    global _exporter
+    if _exporter is None:
+        _exporter = create_exporter()
+    return _exporter
+
+
+def set_exporter(exporter: SpanExporter) -> None:
+    global _exporter
+    if _exporter is not None and _exporter is not exporter:
+        _exporter.close()
+    _exporter = exporter
+
+
+def current_span() -> Span | None:
+    return _current_span.get()
+
+
+@contextmanager
+def start_span(name: str, parent: SpanContext | None = None, **attributes: Any) -> Iterator[Span]:
+    """Run the block inside a new span; ``parent`` defaults to the current span"""
+    if parent is None:
+        active = _current_span.get()
+        parent = active.context if active is not None else None
+    span = Span(
+        name=name,
+        trace_id=parent.trace_id if parent is not None else secrets.token_hex(16),
+        span_id=secrets.token_hex(8),
+        parent_id=parent.span_id if parent is not None else None,
+        attributes=attributes,
+    )
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.status = "error"
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end_time = time.time()
+        try:
+            get_exporter().export(span)
+        except Exception as e:
+            logging.warning(f"Span export failed: {str(e)}")
+
+
+def traced(name: str | None = None) -> Callable:
+    """Decorate a coroutine function so every call runs in a span (default name: ``Class.method``)"""
+
+    def decorator(fn: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        span_name = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def inject(properties: dict | None = None) -> dict:
+    """Add the current trace context to message application properties"""
+    properties = dict(properties or {})
+    span = _current_span.get()
+    if span is not None:
+        properties[TRACEPARENT] = span.context.to_traceparent()
+    return properties
+
+
+def extract(properties: dict | None) -> SpanContext | None:
+    """Read the trace context from message application properties"""
+    value = (properties or {}).get(TRACEPARENT)
+    if isinstance(value, bytes):
+        value = value.decode("utf-8")
+    return SpanContext.from_traceparent(value) if value else None
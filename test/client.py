@@ -1,11 +1,13 @@
 from azure.servicebus import ServiceBusClient, ServiceBusMessage
 import uuid
-import json
 from datetime import datetime
 import logging
 import dotenv
 import os
 
+from src.dto import codec
+from src.utils.tracing import inject, start_span
+
 dotenv.load_dotenv()
 
 CONNECTION_STR = os.getenv("SERVICEBUS_CONNECTION_STRING")
@@ -34,20 +36,21 @@ def send_batch_request():
             max_wait_time=30  # 30초 동안 응답 대기
         )
         
-        with sender, receiver:
-            # 메시지 전송
+        with sender, receiver, start_span("client.request", session_id=session_id) as span:
+            # 메시지 전송 (trace context를 application property로 전달)
             message = ServiceBusMessage(
-                json.dumps(request),
+                codec.encode(request, codec.JSON),
                 session_id=session_id,
-                content_type="application/json"
+                content_type=codec.JSON,
+                application_properties=inject(),
             )
             sender.send_messages(message)
-            logging.info(f"Request sent (Session ID: {session_id})")
+            logging.info(f"Request sent (Session ID: {session_id}, trace: {span.trace_id})")
             
             # 응답 대기
             received_msgs = receiver.receive_messages(max_wait_time=100000)
             for msg in received_msgs:
-                response = json.loads(str(msg))
+                response = codec.decode(b"".join(msg.body), msg.content_type)
                 logging.info(f"Response received: {response}")
                 receiver.complete_message(msg)
 